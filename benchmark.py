@@ -0,0 +1,538 @@
+#!/usr/bin/env python3
+"""
+Hipot AI Analyzer 성능 벤치마크
+분석기/API 주요 경로의 처리 시간을 측정하고, 결과를 JSON으로 저장해
+기준 실행(baseline)과 비교하여 성능 회귀를 검출합니다.
+
+    python benchmark.py --sections suite --output baseline.json
+    python benchmark.py --sections suite --baseline baseline.json --threshold 0.2
+"""
+
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import subprocess
+import tempfile
+import tracemalloc
+from datetime import datetime
+import numpy as np
+import pandas as pd
+import torch
+
+import flask_api
+from flask_api import (COLUMNAR_CONTENT_TYPE, encode_columnar_session, decode_columnar_sessions,
+                       _json_session_columns)
+from hipot_ai_analyzer import (HipotAIAnalyzer, HipotDataPreprocessor, PlotRenderQueue, OUTLIER_METHODS,
+                               make_outlier_detector)
+
+SECTIONS = ('startup', 'ingest', 'preprocess', 'parallel', 'outliers', 'inference', 'training', 'suite')
+DEFAULT_SIZES = [100, 1000, 10000, 100000]
+SUITE_SIZES = [100, 1000, 10000, 100000, 1000000]
+
+
+def make_session(size: int, seed: int = 42) -> dict:
+    """create_sample_data와 같은 파형의 세션 배열 생성 (임의 길이)"""
+    rng = np.random.default_rng(seed)
+    time_values = np.linspace(0, 10 * size / 100, size)
+    voltage = 1000 + 500 * np.sin(0.5 * time_values) + rng.normal(0, 10, size)
+    current = 0.001 + 0.0005 * np.sin(0.5 * time_values + np.pi / 4) + rng.normal(0, 0.0001, size)
+    resistance = voltage / (current + 1e-10) + rng.normal(0, 1e6, size)
+    return {'time': time_values, 'voltage': voltage, 'current': current, 'resistance': resistance}
+
+
+def _best_time(func, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def bench_ingest(sizes, repeat: int = 5) -> list:
+    """JSON 리스트 파싱과 이진 열 블록 디코딩 비교"""
+    results = []
+    for size in sizes:
+        session = make_session(size)
+        json_body = json.dumps({
+            column.capitalize(): session[column].tolist() for column in session
+        }).encode()
+        binary_body = encode_columnar_session(session['time'], session['voltage'],
+                                              session['current'], session['resistance'])
+
+        json_time = _best_time(lambda: _json_session_columns(json.loads(json_body)), repeat)
+        binary_time = _best_time(lambda: decode_columnar_sessions(binary_body), repeat)
+
+        results.append({
+            'benchmark': 'ingest',
+            'size': size,
+            'json_seconds': json_time,
+            'binary_seconds': binary_time,
+            'json_bytes': len(json_body),
+            'binary_bytes': len(binary_body),
+            'speedup': json_time / binary_time if binary_time > 0 else float('inf')
+        })
+    return results
+
+
+def _peak_allocation(func) -> int:
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def bench_preprocess(sizes, repeat: int = 5) -> list:
+    """단계별 전처리와 융합 전처리 비교 (float32 입력, 이상치 판정 포함)"""
+    results = []
+    preprocessor = HipotDataPreprocessor()
+    for size in sizes:
+        data = pd.DataFrame(make_session(size)).astype(np.float32)
+        if not preprocessor.is_fitted:
+            preprocessor.fit(data)
+
+        stepwise = lambda: preprocessor._preprocess_small_data(data)
+        fused = lambda: preprocessor._preprocess_fused(data)
+        stepwise_time = _best_time(stepwise, repeat)
+        fused_time = _best_time(fused, repeat)
+
+        results.append({
+            'benchmark': 'preprocess',
+            'size': size,
+            'stepwise_seconds': stepwise_time,
+            'fused_seconds': fused_time,
+            'stepwise_peak_bytes': _peak_allocation(stepwise),
+            'fused_peak_bytes': _peak_allocation(fused),
+            'speedup': stepwise_time / fused_time if fused_time > 0 else float('inf')
+        })
+    return results
+
+
+def bench_parallel_preprocess(sizes, workers, repeat: int = 3) -> list:
+    """구간 병렬 전처리의 워커 수별 처리 시간 (1 워커 = 단일 블록 융합 경로)"""
+    results = []
+    fitted = HipotDataPreprocessor()
+    fitted.fit(pd.DataFrame(make_session(2000)))
+    for size in sizes:
+        data = pd.DataFrame(make_session(size))
+        timings = {}
+        for n_workers in workers:
+            preprocessor = HipotDataPreprocessor(n_workers=n_workers)
+            preprocessor.scaler = fitted.scaler
+            preprocessor.outlier_detector = fitted.outlier_detector
+            preprocessor.is_fitted = True
+            if n_workers == 1:
+                run = lambda: preprocessor._preprocess_fused(data)
+            else:
+                run = lambda: preprocessor._preprocess_large_data(data)
+            timings[n_workers] = _best_time(run, repeat)
+
+        baseline = timings[workers[0]]
+        results.append({
+            'benchmark': 'parallel_preprocess',
+            'size': size,
+            'seconds_by_workers': timings,
+            'speedup_by_workers': {n: baseline / t if t > 0 else float('inf') for n, t in timings.items()}
+        })
+    return results
+
+
+def bench_outliers(sizes, repeat: int = 3, spike_fraction: float = 0.02) -> list:
+    """이상치 판정 방식별 학습/판정 시간과 IsolationForest 판정과의 일치율
+
+    판정 데이터에는 spike_fraction 비율의 전압/전류 스파이크를 넣어 스파이크 검출률도 함께 기록한다.
+    """
+    columns = ['voltage', 'current', 'resistance']
+    fit_data = pd.DataFrame(make_session(2000, seed=1))[columns].to_numpy()
+    detectors, fit_seconds = {}, {}
+    for method in OUTLIER_METHODS:
+        detectors[method] = make_outlier_detector(method).fit(fit_data)
+        fit_seconds[method] = _best_time(lambda: make_outlier_detector(method).fit(fit_data), repeat)
+
+    results = []
+    rng = np.random.default_rng(7)
+    for size in sizes:
+        data = pd.DataFrame(make_session(size, seed=2))[columns].to_numpy()
+        spikes = rng.choice(size, max(1, int(size * spike_fraction)), replace=False)
+        data[spikes, 0] *= 1.5
+        data[spikes[::2], 1] *= 3
+
+        exact = detectors['isolation_forest'].predict(data)
+        for method, detector in detectors.items():
+            predicted = detector.predict(data)
+            results.append({
+                'benchmark': 'outliers',
+                'case': method,
+                'size': size,
+                'fit_seconds': fit_seconds[method],
+                'predict_seconds': _best_time(lambda: detector.predict(data), repeat),
+                'agreement': float((predicted == exact).mean()),
+                'kept_fraction': float((predicted == 1).mean()),
+                'spike_recall': float((predicted[spikes] == -1).mean())
+            })
+    return results
+
+
+def bench_inference(sizes, batch_sizes, repeat: int = 3) -> list:
+    """슬라이딩 윈도우 추론의 배치 크기별 처리량 (창/초)"""
+    results = []
+    analyzer = HipotAIAnalyzer()
+    analyzer.initialize_model()
+    inference = analyzer.window_inference
+    for size in sizes:
+        data = pd.DataFrame(make_session(size))
+        analyzer.preprocessor.fit(data)
+        processed = analyzer.preprocessor.preprocess(data)
+        num_windows = len(inference.make_windows(processed)[0])
+
+        throughput = {}
+        for batch_size in batch_sizes:
+            inference.batch_size = batch_size
+            seconds = _best_time(lambda: inference.run(processed), repeat)
+            throughput[batch_size] = num_windows / seconds if seconds > 0 else float('inf')
+
+        results.append({
+            'benchmark': 'inference',
+            'size': size,
+            'num_windows': num_windows,
+            'windows_per_second_by_batch': throughput
+        })
+    return results
+
+
+def bench_training(compile_modes, thread_counts, size: int = 10000, epochs: int = 3,
+                   samples_per_epoch: int = 256) -> list:
+    """훈련 컴파일 방식/스레드 수별 epoch 처리량 (창/초)
+
+    첫 epoch는 컴파일/워밍업 비용이 섞이므로 이후 epoch의 중앙값을 처리량으로 기록한다.
+    """
+    results = []
+    processed = None
+    for mode in compile_modes:
+        for threads in thread_counts:
+            analyzer = HipotAIAnalyzer()
+            analyzer.initialize_model()
+            analyzer.config['training'].update(epochs=epochs, samples_per_epoch=samples_per_epoch,
+                                               early_stopping_patience=epochs, compile=mode,
+                                               num_threads=threads)
+            if processed is None:
+                processed = analyzer.preprocessor.preprocess(pd.DataFrame(make_session(size, seed=0)))
+            loader = analyzer._create_data_loader(analyzer._create_dataset([processed] * 8))
+            started = time.perf_counter()
+            training = analyzer._train_model(loader)
+            results.append({
+                'benchmark': 'training',
+                'case': f"{mode or 'eager'}/{threads}t",
+                'size': size,
+                'compile': mode or 'eager',
+                'threads': threads,
+                'seconds': time.perf_counter() - started,
+                'first_epoch_samples_per_second': training['samples_per_second'][0],
+                'samples_per_second': float(np.median(training['samples_per_second'][1:] or
+                                                      training['samples_per_second']))
+            })
+    return results
+
+
+class _NullGraphGenerator:
+    """/analyze 왕복 측정 시 백그라운드 렌더링이 다른 측정에 끼어들지 않도록 하는 생성기"""
+
+    def create_comparison_plots(self, test_data, reference_data, timestamp=None, **options):
+        return []
+
+
+def _make_suite_analyzer() -> HipotAIAnalyzer:
+    """훈련 없이 기준 데이터만 설정한 분석기 (훈련 1 에폭 측정용 설정 포함)"""
+    analyzer = HipotAIAnalyzer()
+    analyzer.initialize_model()
+    analyzer.config['training']['epochs'] = 1
+    # 크기와 무관하게 epoch당 같은 양의 창을 학습 (임의 추출)
+    analyzer.config['training']['samples_per_epoch'] = 256
+    reference = analyzer.preprocessor.preprocess(pd.DataFrame(make_session(2000, seed=0)))
+    analyzer._set_reference_data([reference])
+    return analyzer
+
+
+def _suite_preprocess(analyzer, data, processed):
+    return lambda: analyzer.preprocessor.preprocess(data)
+
+
+def _suite_calculate_accuracy(analyzer, data, processed):
+    return lambda: analyzer.accuracy_calculator.calculate_accuracy(processed)
+
+
+def _suite_pattern_similarity(analyzer, data, processed):
+    return lambda: analyzer.accuracy_calculator._calculate_pattern_similarity(processed)
+
+
+def _suite_calculate_defect_rate(analyzer, data, processed):
+    voltage, current, resistance = (processed[column].to_numpy() for column in ('voltage', 'current', 'resistance'))
+    return lambda: analyzer.accuracy_calculator.calculate_defect_rate_columnar(voltage, current, resistance)
+
+
+def _suite_calculate_defect_rate_records(analyzer, data, processed):
+    records = processed[['voltage', 'current', 'resistance']].to_dict('records')
+    return lambda: analyzer.accuracy_calculator.calculate_defect_rate(records)
+
+
+def _suite_graph_generator(analyzer, data, processed):
+    return lambda: analyzer.graph_generator.create_comparison_plots(processed, analyzer.reference_data, 'benchmark')
+
+
+def _suite_create_dataset(analyzer, data, processed):
+    return lambda: analyzer._create_dataset([processed] * 8)
+
+
+def _suite_training_epoch(analyzer, data, processed):
+    loader = analyzer._create_data_loader(analyzer._create_dataset([processed] * 8))
+    return lambda: analyzer._train_model(loader)
+
+
+def _suite_api_analyze(analyzer, data, processed):
+    flask_api.analyzer = analyzer
+    flask_api.model_initialized = True
+    analyzer.plot_queue = PlotRenderQueue(_NullGraphGenerator())
+    client = flask_api.app.test_client()
+    body = encode_columnar_session(data['time'], data['voltage'], data['current'], data['resistance'])
+
+    def round_trip():
+        # 결과 캐시를 비워 매번 실제 분석 경로를 측정
+        flask_api._result_cache.clear()
+        response = client.post('/analyze', data=body, content_type=COLUMNAR_CONTENT_TYPE)
+        assert response.status_code == 200, response.get_data(as_text=True)
+        # 렌더링 작업이 실패하면 실패 경로를 측정하게 되므로 중단
+        assert response.json['plot_job']['status'] != PlotRenderQueue.FAILED, response.json['plot_job']
+
+    return round_trip
+
+
+# 측정 항목: (이름, 측정 함수 생성기, 최대 크기)
+SUITE_CASES = [
+    ('preprocess', _suite_preprocess, None),
+    ('calculate_accuracy', _suite_calculate_accuracy, None),
+    ('pattern_similarity', _suite_pattern_similarity, None),
+    ('calculate_defect_rate', _suite_calculate_defect_rate, None),
+    ('calculate_defect_rate_records', _suite_calculate_defect_rate_records, 100000),
+    ('graph_generator', _suite_graph_generator, 100000),
+    ('create_dataset', _suite_create_dataset, None),
+    ('training_epoch', _suite_training_epoch, 100000),
+    ('api_analyze', _suite_api_analyze, 100000),
+]
+
+
+def bench_suite(sizes, repeat: int = 3, cases=None) -> list:
+    """분석기/API 주요 경로 측정 (그래프와 체크포인트 파일은 임시 디렉토리에 생성)"""
+    selected = [case for case in SUITE_CASES if cases is None or case[0] in cases]
+    results = []
+    analyzer = _make_suite_analyzer()
+    original_dir = os.getcwd()
+    with tempfile.TemporaryDirectory() as work_dir:
+        os.chdir(work_dir)
+        try:
+            for size in sizes:
+                data = pd.DataFrame(make_session(size))
+                processed = analyzer.preprocessor.preprocess(data)
+                for name, make_case, max_size in selected:
+                    if max_size is not None and size > max_size:
+                        continue
+                    seconds = _best_time(make_case(analyzer, data, processed), repeat)
+                    results.append({'benchmark': 'suite', 'case': name, 'size': size, 'seconds': seconds})
+                    print(f"  {name:<30} {size:>8} 포인트: {seconds * 1000:10.3f} ms")
+        finally:
+            os.chdir(original_dir)
+    return results
+
+
+# 새 인터프리터에서 실행할 시작 시간 측정 코드 (측정값을 초 단위로 출력)
+STARTUP_CASES = {
+    'import_hipot_ai_analyzer': (
+        "import time; started = time.perf_counter(); import hipot_ai_analyzer; "
+        "print(time.perf_counter() - started)"
+    ),
+    'import_flask_api': (
+        "import time; started = time.perf_counter(); import flask_api; "
+        "print(time.perf_counter() - started)"
+    ),
+    'first_health_response': (
+        "import time; started = time.perf_counter(); import flask_api; "
+        "flask_api.start_warmup(); flask_api.app.test_client().get('/health'); "
+        "print(time.perf_counter() - started)"
+    ),
+    'warmup_ready': (
+        "import time; started = time.perf_counter(); import flask_api; "
+        "flask_api.start_warmup().join(); assert flask_api.is_ready(); "
+        "print(time.perf_counter() - started)"
+    ),
+}
+
+
+def bench_startup(repeat: int = 3) -> list:
+    """모듈 임포트, 첫 /health 응답, 워밍업 완료까지의 시간 (새 인터프리터 기준)"""
+    results = []
+    package_dir = os.path.dirname(os.path.abspath(__file__))
+    for name, code in STARTUP_CASES.items():
+        timings = []
+        for _ in range(repeat):
+            output = subprocess.run([sys.executable, '-c', code], cwd=package_dir, check=True,
+                                    capture_output=True, text=True).stdout
+            timings.append(float(output.strip().splitlines()[-1]))
+        results.append({'benchmark': 'startup', 'case': name, 'size': 0, 'seconds': min(timings)})
+    return results
+
+
+def _result_key(result: dict) -> tuple:
+    return result['benchmark'], result.get('case', ''), result['size']
+
+
+def compare_results(current: list, baseline: list, threshold: float, min_delta: float = 0.0005) -> list:
+    """기준 실행보다 threshold 비율 이상 느려진 측정값 목록
+
+    '_seconds'로 끝나는 모든 수치를 비교하며, min_delta(초)보다 작은 차이는 측정 잡음으로 본다.
+    """
+    baseline_by_key = {_result_key(result): result for result in baseline}
+    regressions = []
+    for result in current:
+        reference = baseline_by_key.get(_result_key(result))
+        if reference is None:
+            continue
+        for metric, value in result.items():
+            if not metric.endswith('seconds') or metric not in reference:
+                continue
+            previous = reference[metric]
+            if value > previous * (1 + threshold) and value - previous > min_delta:
+                regressions.append({
+                    'benchmark': result['benchmark'],
+                    'case': result.get('case'),
+                    'size': result['size'],
+                    'metric': metric,
+                    'baseline': previous,
+                    'current': value,
+                    'ratio': value / previous if previous > 0 else float('inf')
+                })
+    return regressions
+
+
+def _environment() -> dict:
+    return {
+        'timestamp': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'torch': torch.__version__
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Hipot AI Analyzer 성능 벤치마크')
+    parser.add_argument('--sections', nargs='+', choices=SECTIONS, default=list(SECTIONS))
+    parser.add_argument('--sizes', type=int, nargs='+', default=None,
+                        help=f'측정 크기 (기본: 비교 항목 {DEFAULT_SIZES}, suite {SUITE_SIZES})')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[16, 64, 128, 256])
+    parser.add_argument('--cases', nargs='+', choices=[case[0] for case in SUITE_CASES], default=None)
+    parser.add_argument('--compile-modes', nargs='+', choices=['eager', 'torchscript', 'inductor'],
+                        default=['eager', 'torchscript'], help='훈련 벤치마크 컴파일 방식')
+    parser.add_argument('--threads', type=int, nargs='+', default=None,
+                        help='훈련 벤치마크 torch 스레드 수 (기본: 1과 CPU 수)')
+    parser.add_argument('--output', help='측정 결과 JSON 저장 경로')
+    parser.add_argument('--baseline', help='비교할 기준 결과 JSON 경로')
+    parser.add_argument('--threshold', type=float, default=0.2, help='허용 성능 저하 비율 (0.2 = 20%%)')
+    args = parser.parse_args()
+
+    sizes = args.sizes or DEFAULT_SIZES
+    results = []
+
+    if 'startup' in args.sections:
+        print("=== 시작 시간 벤치마크 (새 인터프리터) ===")
+        for result in bench_startup(min(args.repeat, 3)):
+            results.append(result)
+            print(f"  {result['case']:<30} {result['seconds'] * 1000:10.1f} ms")
+
+    if 'ingest' in args.sections:
+        print("\n=== 요청 수신 경로 벤치마크 (JSON vs 이진 열 블록) ===")
+        for result in bench_ingest(sizes, args.repeat):
+            results.append(result)
+            print(f"{result['size']:>8} 포인트: JSON {result['json_seconds'] * 1000:9.3f} ms "
+                  f"({result['json_bytes']:>9} B) | 이진 {result['binary_seconds'] * 1000:7.3f} ms "
+                  f"({result['binary_bytes']:>8} B) | {result['speedup']:.0f}x")
+
+    if 'preprocess' in args.sections:
+        print("\n=== 전처리 벤치마크 (단계별 vs 융합) ===")
+        for result in bench_preprocess(sizes, args.repeat):
+            results.append(result)
+            print(f"{result['size']:>8} 포인트: 단계별 {result['stepwise_seconds'] * 1000:9.3f} ms "
+                  f"({result['stepwise_peak_bytes'] / 1e6:6.1f} MB) | 융합 {result['fused_seconds'] * 1000:9.3f} ms "
+                  f"({result['fused_peak_bytes'] / 1e6:6.1f} MB) | {result['speedup']:.1f}x")
+
+    if 'parallel' in args.sections:
+        print("\n=== 구간 병렬 전처리 벤치마크 (워커 수별) ===")
+        large_sizes = [size for size in sizes if size >= 10000] or sizes
+        for result in bench_parallel_preprocess(large_sizes, args.workers, args.repeat):
+            results.append(result)
+            cells = " | ".join(
+                f"{n}w {seconds * 1000:8.2f} ms ({result['speedup_by_workers'][n]:.2f}x)"
+                for n, seconds in result['seconds_by_workers'].items()
+            )
+            print(f"{result['size']:>8} 포인트: {cells}")
+
+    if 'outliers' in args.sections:
+        print("\n=== 이상치 판정 방식 벤치마크 (IsolationForest 대비 일치율) ===")
+        for result in bench_outliers(sizes, args.repeat):
+            results.append(result)
+            print(f"{result['size']:>8} 포인트 {result['case']:<16} 판정 {result['predict_seconds'] * 1000:9.2f} ms | "
+                  f"학습 {result['fit_seconds'] * 1000:7.1f} ms | 일치 {result['agreement']:.2%} | "
+                  f"유지 {result['kept_fraction']:.2%} | 스파이크 검출 {result['spike_recall']:.2%}")
+
+    if 'inference' in args.sections:
+        print("\n=== 슬라이딩 윈도우 추론 벤치마크 (배치 크기별 창/초) ===")
+        for result in bench_inference(sizes, args.batch_sizes, args.repeat):
+            results.append(result)
+            cells = " | ".join(
+                f"배치 {batch_size} {rate:9.1f}" for batch_size, rate in result['windows_per_second_by_batch'].items()
+            )
+            print(f"{result['size']:>8} 포인트 ({result['num_windows']:>5} 창): {cells}")
+
+    if 'training' in args.sections:
+        print("\n=== 훈련 루프 벤치마크 (컴파일 방식/스레드 수별 창/초) ===")
+        thread_counts = args.threads or sorted({1, os.cpu_count() or 1})
+        compile_modes = [None if mode == 'eager' else mode for mode in args.compile_modes]
+        for result in bench_training(compile_modes, thread_counts):
+            results.append(result)
+            print(f"  {result['compile']:<12} {result['threads']:>3} 스레드: {result['samples_per_second']:8.1f} 창/초 "
+                  f"(첫 epoch {result['first_epoch_samples_per_second']:8.1f}) | 총 {result['seconds']:.2f} s")
+
+    if 'suite' in args.sections:
+        print("\n=== 분석기/API 주요 경로 벤치마크 ===")
+        results.extend(bench_suite(args.sizes or SUITE_SIZES, args.repeat, args.cases))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'environment': _environment(), 'results': results}, f, indent=2)
+        print(f"\n결과 저장: {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+        regressions = compare_results(results, baseline['results'], args.threshold)
+        print(f"\n=== 기준 실행 대비 비교 (허용 {args.threshold:.0%}) ===")
+        for regression in regressions:
+            label = '/'.join(str(part) for part in (regression['benchmark'], regression['case']) if part)
+            print(f"✗ {label} {regression['size']} 포인트 {regression['metric']}: "
+                  f"{regression['baseline'] * 1000:.3f} ms → {regression['current'] * 1000:.3f} ms "
+                  f"({regression['ratio']:.2f}x)")
+        if regressions:
+            return 1
+        print("✓ 성능 회귀 없음")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
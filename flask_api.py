@@ -4,23 +4,41 @@ C# WPF 애플리케이션과의 연동을 위한 RESTful API
 성능 최적화 버전
 """
 
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, request, jsonify, send_file, Response
 from flask_cors import CORS
 import pandas as pd
 import numpy as np
 import json
 import os
+import io
+import base64
 import logging
 from datetime import datetime
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
 import traceback
 from functools import wraps
 import time
 from concurrent.futures import ThreadPoolExecutor
 import threading
+import uuid
+import signal
+import socket
+import hashlib
+import sqlite3
+import struct
+import argparse
+from collections import OrderedDict
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows - 다중 워커 모드 미지원
+    fcntl = None
 
 # Hipot AI Analyzer 임포트
-from hipot_ai_analyzer import HipotAIAnalyzer, DataClassification, TestResult
+from hipot_ai_analyzer import (HipotAIAnalyzer, HipotReferenceRegistry, DataClassification, TestResult,
+                               HipotGraphGenerator, PlotArtifactStore, PlotRenderQueue, validate_plot_options,
+                               stage_metrics, _load_matplotlib)
 
 # Flask 앱 초기화
 app = Flask(__name__)
@@ -34,56 +52,381 @@ logger = logging.getLogger(__name__)
 analyzer = None
 model_initialized = False
 _analyzer_lock = threading.Lock()
-_executor = ThreadPoolExecutor(max_workers=4)
+_executor = ThreadPoolExecutor(
+    max_workers=int(os.environ.get('HIPOT_ANALYSIS_THREADS', str(max(4, os.cpu_count() or 1)))),
+    thread_name_prefix='hipot-analyze'
+)
+
+# 다중 워커 모드: 다른 워커가 저장한 기본 모델을 감지하기 위한 체크포인트 수정 시각
+MODEL_PATH = 'hipot_reference_model.pth'
+_model_mtime = None
+_model_checked_at = 0.0
+_model_sync_interval = None  # None이면 단일 프로세스 (확인하지 않음)
+# 다중 워커 모드 여부 - 렌더링 작업/그래프 이미지/스트리밍 세션은 워커 메모리에 있어 다른 워커에서 조회할 수 없으므로
+# 비동기 그래프와 스트리밍 API를 끄고, 그래프는 plots=inline으로만 제공
+_multi_worker = False
+
+# 그래프는 메모리 버퍼로 렌더링해 개수/용량 상한이 있는 저장소에 보관 (/get_plot으로 조회)
+_plot_queue = PlotRenderQueue(
+    HipotGraphGenerator(
+        dpi=int(os.environ.get('HIPOT_PLOT_DPI', '300')),
+        fmt=os.environ.get('HIPOT_PLOT_FORMAT', 'png'),
+        artifact_store=PlotArtifactStore(max_bytes=int(os.environ.get('HIPOT_PLOT_STORE_MB', '256')) * 1024 * 1024)
+    ),
+    workers=int(os.environ.get('HIPOT_PLOT_THREADS', '1'))
+)
+
+# 제품/시험 모드별 기준 모델 레지스트리 (요청에 키가 없으면 기본 분석기 사용)
+_registry = HipotReferenceRegistry(
+    os.environ.get('HIPOT_REFERENCE_DIR', 'references'),
+    max_loaded=int(os.environ.get('HIPOT_REFERENCE_CACHE_SIZE', '8')),
+    plot_queue=_plot_queue
+)
 
-# 성능 모니터링을 위한 데코레이터
+# 실시간 증분 분석 세션 (session_id -> [세션, 마지막 사용 시각], 오래 쓰지 않은 순서)
+# 닫히지 않고 버려진 세션은 유휴 시간(초)이나 개수 상한을 넘으면 제거
+STREAM_SESSION_TTL = float(os.environ.get('HIPOT_STREAM_TTL', '600'))
+MAX_STREAM_SESSIONS = int(os.environ.get('HIPOT_MAX_STREAMS', '256'))
+_stream_sessions = OrderedDict()
+_stream_lock = threading.Lock()
+
+# 백그라운드 워밍업 상태 (/health는 즉시 응답하고 준비 여부는 /ready로 확인)
+_warmup_lock = threading.Lock()
+_warmup_thread = None
+_warmup_state = {'status': 'idle', 'started_at': None, 'finished_at': None, 'error': None, 'stages': {}}
+
+# 성능 모니터링을 위한 데코레이터 (요청 전체 시간은 request.<함수명> 단계로 기록)
 def monitor_performance(f):
+    stage = f'request.{f.__name__}'
+    
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        start_time = time.time()
-        result = f(*args, **kwargs)
-        execution_time = time.time() - start_time
+        start_time = time.perf_counter()
+        with stage_metrics.span(stage):
+            result = f(*args, **kwargs)
+        execution_time = time.perf_counter() - start_time
         logger.info(f"{f.__name__} executed in {execution_time:.3f} seconds")
         return result
     return decorated_function
 
-# 캐시 데코레이터
-def cache_result(timeout_seconds=300):
-    cache = {}
-    cache_times = {}
-    
-    def decorator(f):
-        @wraps(f)
-        def decorated_function(*args, **kwargs):
-            # 간단한 캐시 키 생성
-            cache_key = str(hash(str(args) + str(sorted(kwargs.items()))))
-            current_time = time.time()
-            
-            # 캐시 확인
-            if (cache_key in cache and 
-                current_time - cache_times.get(cache_key, 0) < timeout_seconds):
-                logger.info(f"Cache hit for {f.__name__}")
-                return cache[cache_key]
-            
-            # 캐시 미스 - 함수 실행
-            result = f(*args, **kwargs)
-            cache[cache_key] = result
-            cache_times[cache_key] = current_time
-            
-            return result
-        return decorated_function
-    return decorator
+def single_worker_only(f):
+    """워커 메모리 상태(스트리밍 세션, 렌더링 작업/이미지)를 쓰는 엔드포인트 - 다중 워커 모드에서는 501"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if _multi_worker:
+            return jsonify({'status': 'error',
+                            'message': '다중 워커 모드에서는 지원하지 않는 API입니다 (--workers 1로 실행하거나 plots=inline 사용).'}), 501
+        return f(*args, **kwargs)
+    return decorated_function
+
+# 이진 열 블록 형식 (리틀 엔디언)
+#   헤더: 매직 b'HPC1' + 샘플 수 N (uint32) + 열 수 C (uint32)
+#   본문: Time, Voltage, Current, Resistance 순서의 float32 열 블록 C개 (각 N개)
+# 세션 여러 개는 블록을 이어 붙여 전송한다 (/train, /analyze_batch).
+COLUMNAR_CONTENT_TYPE = 'application/x-hipot-columnar'
+ARROW_CONTENT_TYPE = 'application/vnd.apache.arrow.stream'
+COLUMNAR_MAGIC = b'HPC1'
+SESSION_COLUMNS = ('time', 'voltage', 'current', 'resistance')
+_COLUMNAR_HEADER = struct.Struct('<4sII')
+
+class PayloadFormatError(ValueError):
+    """요청 본문 형식 오류 (400 응답)"""
+
+def encode_columnar_session(time_values, voltage, current, resistance) -> bytes:
+    """세션 배열을 이진 열 블록으로 인코딩 (클라이언트/벤치마크용)"""
+    columns = [np.asarray(values, dtype='<f4') for values in (time_values, voltage, current, resistance)]
+    num_samples = len(columns[0])
+    if any(len(column) != num_samples for column in columns):
+        raise PayloadFormatError('열 길이가 서로 다릅니다.')
+    
+    header = _COLUMNAR_HEADER.pack(COLUMNAR_MAGIC, num_samples, len(columns))
+    return header + b''.join(column.tobytes() for column in columns)
+
+def decode_columnar_sessions(buffer) -> List[Dict[str, np.ndarray]]:
+    """이진 열 블록 디코딩 - 요청 버퍼를 복사하지 않는 float32 뷰 반환"""
+    buffer = memoryview(buffer)
+    sessions = []
+    offset = 0
+    
+    while offset < len(buffer):
+        if len(buffer) - offset < _COLUMNAR_HEADER.size:
+            raise PayloadFormatError('이진 데이터 헤더가 잘렸습니다.')
+        
+        magic, num_samples, num_columns = _COLUMNAR_HEADER.unpack_from(buffer, offset)
+        if magic != COLUMNAR_MAGIC or num_columns != len(SESSION_COLUMNS):
+            raise PayloadFormatError('잘못된 이진 데이터 형식입니다.')
+        offset += _COLUMNAR_HEADER.size
+        
+        count = num_samples * num_columns
+        if len(buffer) - offset < count * 4:
+            raise PayloadFormatError('이진 데이터 본문이 잘렸습니다.')
+        
+        block = np.frombuffer(buffer, dtype='<f4', count=count, offset=offset).reshape(num_columns, num_samples)
+        sessions.append(dict(zip(SESSION_COLUMNS, block)))
+        offset += count * 4
+    
+    return sessions
+
+def _decode_arrow_sessions(buffer) -> List[Dict[str, np.ndarray]]:
+    """Arrow IPC 스트림 디코딩 (레코드 배치 하나가 세션 하나, pyarrow 필요)"""
+    try:
+        import pyarrow as pa
+    except ImportError:
+        raise PayloadFormatError('Arrow 형식을 사용하려면 pyarrow가 필요합니다.')
+    
+    try:
+        batches = list(pa.ipc.open_stream(pa.py_buffer(buffer)))
+    except pa.ArrowInvalid as e:
+        raise PayloadFormatError(f'잘못된 Arrow 스트림입니다: {str(e)}')
+    
+    sessions = []
+    for batch in batches:
+        names = {name.lower(): i for i, name in enumerate(batch.schema.names)}
+        if not all(column in names for column in SESSION_COLUMNS):
+            raise PayloadFormatError(f'필수 열이 누락되었습니다: {list(SESSION_COLUMNS)}')
+        
+        session = {}
+        for column in SESSION_COLUMNS:
+            values = batch.column(names[column]).to_numpy(zero_copy_only=False)
+            session[column] = values if values.dtype == np.float32 else values.astype(np.float32)
+        sessions.append(session)
+    
+    return sessions
+
+def _read_binary_sessions():
+    """이진 요청 본문이면 세션 배열 목록 반환, JSON 요청이면 None"""
+    if request.mimetype == COLUMNAR_CONTENT_TYPE:
+        return decode_columnar_sessions(request.get_data(cache=False))
+    if request.mimetype == ARROW_CONTENT_TYPE:
+        return _decode_arrow_sessions(request.get_data(cache=False))
+    return None
+
+def _read_single_session() -> Tuple[pd.DataFrame, Optional[Dict]]:
+    """요청 본문의 세션 하나를 DataFrame으로 변환 - (세션 데이터, JSON 본문 또는 None)"""
+    sessions = _read_binary_sessions()
+    if sessions is not None:
+        if len(sessions) != 1:
+            raise PayloadFormatError('세션 하나만 전송해야 합니다.')
+        return pd.DataFrame(sessions[0], copy=False), None
+    
+    data = request.json
+    required_fields = ['Time', 'Voltage', 'Current', 'Resistance']
+    if not all(field in data for field in required_fields):
+        raise PayloadFormatError(f'필수 필드가 누락되었습니다: {required_fields}')
+    return pd.DataFrame(_json_session_columns(data), copy=False), data
+
+def _json_session_columns(session_data: Dict, dtype=np.float32) -> Dict[str, np.ndarray]:
+    """JSON 세션 필드(Time/Voltage/Current/Resistance)를 배열로 변환"""
+    return {
+        column: np.array(session_data.get(column.capitalize(), []), dtype=dtype)
+        for column in SESSION_COLUMNS
+    }
+
+def _request_reference_key(data: Optional[Dict] = None) -> Optional[Tuple[str, str]]:
+    """요청의 (제품, 시험 모드) - 쿼리 문자열 product/test_mode 또는 JSON Product/TestMode"""
+    data = data if isinstance(data, dict) else {}
+    product = request.args.get('product', data.get('Product'))
+    test_mode = request.args.get('test_mode', data.get('TestMode'))
+    if product is None and test_mode is None:
+        return None
+    if product is None or test_mode is None:
+        raise PayloadFormatError('product와 test_mode를 함께 지정해야 합니다.')
+    
+    try:
+        return HipotReferenceRegistry.make_key(product, test_mode)
+    except ValueError as e:
+        raise PayloadFormatError(str(e))
+
+PLOT_MODES = ('async', 'inline', 'none')
+
+def _request_plot_options() -> Tuple[str, Dict]:
+    """쿼리 문자열의 그래프 요청 방식과 렌더링 옵션
+    
+    plots=async(기본: 렌더링 큐 작업), inline(응답에 base64 이미지 포함) 또는 none(그래프 없음),
+    plot_format=png/svg/webp/jpeg, plot_dpi=20~600, full_resolution=1 (점 축소 안 함)
+    다중 워커 모드에서는 기본값이 none이고 async는 지원하지 않는다.
+    """
+    mode = request.args.get('plots', 'none' if _multi_worker else 'async')
+    if mode not in PLOT_MODES:
+        raise PayloadFormatError(f'plots는 {"/".join(PLOT_MODES)} 중 하나여야 합니다: {mode}')
+    if mode == 'async' and _multi_worker:
+        raise PayloadFormatError('다중 워커 모드에서는 plots=async를 지원하지 않습니다 (plots=inline 사용).')
+    
+    options = {
+        'fmt': request.args.get('plot_format'),
+        'dpi': request.args.get('plot_dpi', type=int),
+        'full_resolution': request.args.get('full_resolution', type=lambda value: value.lower() in ('1', 'true'))
+    }
+    try:
+        validate_plot_options(options['dpi'], options['fmt'])
+    except ValueError as e:
+        raise PayloadFormatError(str(e))
+    return mode, {key: value for key, value in options.items() if value is not None}
+
+def _route_analyzer(key: Optional[Tuple[str, str]], refresh: bool = False) -> Optional[HipotAIAnalyzer]:
+    """키에 맞는 분석기 (키가 없으면 초기화된 기본 분석기, 없으면 None)
+    
+    반환된 분석기는 요청이 끝날 때까지 그대로 사용한다 (모델 교체는 새 객체로 이루어짐).
+    """
+    if key is None:
+        _refresh_default_analyzer(force=refresh)
+        return analyzer if model_initialized else None
+    return _registry.get(*key, refresh=refresh)
+
+def _route_error(key: Optional[Tuple[str, str]]):
+    if key is None:
+        return jsonify({'status': 'error', 'message': '모델이 초기화되지 않았습니다.'}), 400
+    return jsonify({'status': 'error', 'message': f'등록된 기준 모델이 없습니다: {key[0]}/{key[1]}'}), 404
+
+class AnalysisResultCache:
+    """분석 결과 캐시 (내용 주소 기반, LRU 제거, 선택적 sqlite 영속화)
+    
+    키는 원시 샘플 배열과 기준 모델 버전의 해시이며, 값은 직렬화된 JSON 응답이다.
+    메모리 캐시는 항목 수와 바이트 수로 제한되고, db_path가 주어지면
+    디스크에도 저장되어 서버 재시작 후에도 재사용된다.
+    """
+    
+    def __init__(self, max_entries: int = 256, max_bytes: int = 64 * 1024 * 1024,
+                 db_path: str = None, max_disk_entries: int = 4096):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.db_path = db_path
+        self.max_disk_entries = max_disk_entries
+        
+        self._entries = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self._counters = {'hits': 0, 'disk_hits': 0, 'misses': 0, 'evictions': 0}
+        
+        if self.db_path:
+            with self._connect() as conn:
+                conn.execute('CREATE TABLE IF NOT EXISTS analysis_cache '
+                             '(key TEXT PRIMARY KEY, value BLOB, last_access REAL)')
+    
+    @staticmethod
+    def make_key(arrays: List[np.ndarray], version: str) -> str:
+        """샘플 배열 내용과 모델/기준 버전으로 캐시 키 생성"""
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(str(version).encode())
+        for array in arrays:
+            array = np.ascontiguousarray(array)
+            digest.update(f'{array.dtype.str}:{array.shape}'.encode())
+            digest.update(array.tobytes())
+        return digest.hexdigest()
+    
+    def get(self, key: str):
+        """캐시된 응답 바이트 반환 (없으면 None)"""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self._counters['hits'] += 1
+                return value
+        
+        value = self._load_from_disk(key)
+        with self._lock:
+            if value is None:
+                self._counters['misses'] += 1
+                return None
+            self._counters['hits'] += 1
+            self._counters['disk_hits'] += 1
+            self._store_in_memory(key, value)
+        return value
+    
+    def put(self, key: str, value: bytes):
+        with self._lock:
+            self._store_in_memory(key, value)
+        self._save_to_disk(key, value)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+        if self.db_path:
+            with self._connect() as conn:
+                conn.execute('DELETE FROM analysis_cache')
+    
+    def stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._counters)
+            stats.update({
+                'entries': len(self._entries),
+                'bytes': self._total_bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'persistent': bool(self.db_path)
+            })
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        return stats
+    
+    def _store_in_memory(self, key: str, value: bytes):
+        # 호출자가 _lock을 잡고 있어야 함
+        if len(value) > self.max_bytes:
+            return
+        
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._total_bytes -= len(previous)
+        
+        self._entries[key] = value
+        self._total_bytes += len(value)
+        
+        while len(self._entries) > self.max_entries or self._total_bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._total_bytes -= len(evicted)
+            self._counters['evictions'] += 1
+    
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=5)
+    
+    def _load_from_disk(self, key: str):
+        if not self.db_path:
+            return None
+        try:
+            with self._connect() as conn:
+                row = conn.execute('SELECT value FROM analysis_cache WHERE key = ?', (key,)).fetchone()
+                if row is None:
+                    return None
+                conn.execute('UPDATE analysis_cache SET last_access = ? WHERE key = ?', (time.time(), key))
+                return bytes(row[0])
+        except sqlite3.Error as e:
+            logger.warning(f"캐시 디스크 조회 실패: {str(e)}")
+            return None
+    
+    def _save_to_disk(self, key: str, value: bytes):
+        if not self.db_path:
+            return
+        try:
+            with self._connect() as conn:
+                conn.execute('INSERT OR REPLACE INTO analysis_cache (key, value, last_access) VALUES (?, ?, ?)',
+                             (key, sqlite3.Binary(value), time.time()))
+                # 디스크 항목 수 제한 (가장 오래 사용되지 않은 항목부터 삭제)
+                conn.execute('DELETE FROM analysis_cache WHERE key NOT IN '
+                             '(SELECT key FROM analysis_cache ORDER BY last_access DESC LIMIT ?)',
+                             (self.max_disk_entries,))
+        except sqlite3.Error as e:
+            logger.warning(f"캐시 디스크 저장 실패: {str(e)}")
+
+# /analyze 결과 캐시 (HIPOT_ANALYSIS_CACHE_DB 지정 시 sqlite로 영속화)
+_result_cache = AnalysisResultCache(db_path=os.environ.get('HIPOT_ANALYSIS_CACHE_DB'))
 
 def initialize_analyzer():
     """분석기 초기화"""
     global analyzer, model_initialized
     try:
-        analyzer = HipotAIAnalyzer()
-        analyzer.initialize_model()
+        # 초기화가 끝난 분석기만 다른 요청 스레드에 노출
+        new_analyzer = HipotAIAnalyzer(plot_queue=_registry.plot_queue)
+        new_analyzer.initialize_model()
         
         # 기존 모델이 있다면 로드
-        if os.path.exists('hipot_reference_model.pth'):
-            analyzer.load_model('hipot_reference_model.pth')
+        loaded = os.path.exists(MODEL_PATH)
+        if loaded:
+            _set_model_mtime()
+            new_analyzer.load_model(MODEL_PATH)
+        
+        analyzer = new_analyzer
+        if loaded:
             model_initialized = True
             logger.info("기존 모델을 로드했습니다.")
         else:
@@ -94,15 +437,135 @@ def initialize_analyzer():
         logger.error(f"분석기 초기화 실패: {str(e)}")
         return False
 
+def _set_model_mtime():
+    global _model_mtime
+    _model_mtime = os.stat(MODEL_PATH).st_mtime_ns
+
+def _save_default_model(target: HipotAIAnalyzer):
+    """기본 분석기 저장 (자기 저장을 다른 워커의 변경으로 오인하지 않도록 수정 시각 기록)"""
+    target.save_model(MODEL_PATH)
+    _set_model_mtime()
+
+def _refresh_default_analyzer(force: bool = False):
+    """다중 워커 모드: 다른 워커가 저장한 기본 모델을 감지하면 새로 로드한 분석기로 교체
+    
+    _analyzer_lock을 잡은 상태에서 호출하면 안 된다.
+    """
+    global analyzer, model_initialized, _model_checked_at
+    if _model_sync_interval is None:
+        return
+    now = time.monotonic()
+    if not force and now - _model_checked_at < _model_sync_interval:
+        return
+    _model_checked_at = now
+    
+    try:
+        mtime = os.stat(MODEL_PATH).st_mtime_ns
+    except FileNotFoundError:
+        return
+    if mtime == _model_mtime:
+        return
+    
+    with _analyzer_lock:
+        if mtime == _model_mtime:
+            return
+        new_analyzer = HipotAIAnalyzer(plot_queue=_registry.plot_queue)
+        new_analyzer.load_model(MODEL_PATH)
+        _set_model_mtime()
+        # 진행 중인 요청은 이전 분석기를 계속 사용
+        analyzer, model_initialized = new_analyzer, True
+    logger.info("다른 워커가 저장한 기준 모델을 다시 로드했습니다.")
+
+@contextmanager
+def _model_write_lock(path: str):
+    """체크포인트 갱신 구간 (다중 워커 모드에서는 파일 잠금으로 프로세스 간 직렬화)"""
+    if _model_sync_interval is None or fcntl is None:
+        yield
+        return
+    
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(f'{path}.lock', 'w') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def _run_warmup(stages: Tuple[str, ...] = ('analyzer', 'plotting', 'inference')):
+    """무거운 라이브러리 로드, 분석기 초기화, 첫 추론을 미리 수행"""
+    def run_stage(name, func):
+        started = time.perf_counter()
+        with stage_metrics.span(f'warmup.{name}'):
+            func()
+        _warmup_state['stages'][name] = time.perf_counter() - started
+    
+    def init_analyzer():
+        if not initialize_analyzer():
+            raise RuntimeError('분석기 초기화에 실패했습니다.')
+    
+    def warm_inference():
+        # 첫 추론의 스레드 풀/메모리 할당 비용을 요청 전에 지불
+        window_size = analyzer.window_inference.window_size
+        dummy = pd.DataFrame(np.zeros((window_size, 4), dtype=np.float32),
+                             columns=['time', 'voltage', 'current', 'resistance'])
+        analyzer.window_inference.run(dummy)
+    
+    try:
+        for name, func in (('analyzer', init_analyzer), ('plotting', _load_matplotlib),
+                           ('inference', warm_inference)):
+            if name in stages:
+                run_stage(name, func)
+        _warmup_state['status'] = 'ready'
+        logger.info(f"워밍업 완료: {_warmup_state['stages']}")
+    except Exception as e:
+        _warmup_state['status'] = 'failed'
+        _warmup_state['error'] = str(e)
+        logger.error(f"워밍업 실패: {str(e)}")
+    finally:
+        _warmup_state['finished_at'] = datetime.now().isoformat()
+
+def start_warmup() -> threading.Thread:
+    """백그라운드 워밍업 시작 (이미 진행 중이거나 완료되었으면 기존 스레드 반환)"""
+    global _warmup_thread
+    with _warmup_lock:
+        if _warmup_state['status'] in ('idle', 'failed'):
+            _warmup_state.update(status='warming', started_at=datetime.now().isoformat(),
+                                 finished_at=None, error=None, stages={})
+            _warmup_thread = threading.Thread(target=_run_warmup, name='hipot-warmup', daemon=True)
+            _warmup_thread.start()
+        return _warmup_thread
+
+def is_ready() -> bool:
+    return _warmup_state['status'] == 'ready' or (analyzer is not None and analyzer.reference_model is not None)
+
 @app.route('/health', methods=['GET'])
 def health_check():
-    """API 상태 확인"""
+    """API 상태 확인 (무거운 라이브러리 로드와 무관하게 즉시 응답)"""
     return jsonify({
         'status': 'healthy',
+        'ready': is_ready(),
+        'pid': os.getpid(),
+        'warmup': _warmup_state['status'],
         'model_initialized': model_initialized,
         'timestamp': datetime.now().isoformat()
     })
 
+@app.route('/ready', methods=['GET'])
+def readiness_check():
+    """분석 요청 처리 준비 여부 (준비 전에는 503)"""
+    ready = is_ready()
+    return jsonify({
+        'ready': ready,
+        'model_initialized': model_initialized,
+        'warmup': {
+            'status': _warmup_state['status'],
+            'started_at': _warmup_state['started_at'],
+            'finished_at': _warmup_state['finished_at'],
+            'error': _warmup_state['error'],
+            'stage_seconds': dict(_warmup_state['stages'])
+        }
+    }), 200 if ready else 503
+
 @app.route('/initialize', methods=['POST'])
 def initialize_model():
     """모델 초기화 (필요한 경우)"""
@@ -119,29 +582,36 @@ def initialize_model():
         return jsonify({'status': 'error', 'message': str(e)}), 500
 
 @app.route('/train', methods=['POST'])
+@monitor_performance
 def train_reference_model():
-    """기준 모델 훈련"""
-    global model_initialized
+    """기준 모델 훈련 (product/test_mode를 지정하면 레지스트리의 해당 키로 훈련/저장)
+    
+    새 분석기에서 훈련한 뒤 교체하므로 진행 중인 분석은 이전 모델을 그대로 사용한다.
+    """
+    global analyzer, model_initialized
     
     try:
-        if analyzer is None:
-            return jsonify({'status': 'error', 'message': '분석기가 초기화되지 않았습니다.'}), 400
-        
-        data = request.json
+        # 훈련 데이터 변환 (이진 열 블록 또는 JSON)
+        with stage_metrics.span('api.parse'):
+            sessions = _read_binary_sessions()
+            data = None
+            if sessions is None:
+                data = request.json
+                
+                # 훈련 데이터 검증
+                if 'training_data' not in data:
+                    return jsonify({'status': 'error', 'message': '훈련 데이터가 필요합니다.'}), 400
+                
+                sessions = [_json_session_columns(session_data, dtype=np.float64)
+                            for session_data in data['training_data']]
+            reference_key = _request_reference_key(data)
         
-        # 훈련 데이터 검증
-        if 'training_data' not in data:
-            return jsonify({'status': 'error', 'message': '훈련 데이터가 필요합니다.'}), 400
+        if reference_key is None and analyzer is None:
+            return jsonify({'status': 'error', 'message': '분석기가 초기화되지 않았습니다.'}), 400
         
-        # 훈련 데이터 변환
         training_datasets = []
-        for session_data in data['training_data']:
-            df = pd.DataFrame({
-                'time': session_data.get('Time', []),
-                'voltage': session_data.get('Voltage', []),
-                'current': session_data.get('Current', []),
-                'resistance': session_data.get('Resistance', [])
-            })
+        for columns in sessions:
+            df = pd.DataFrame(columns, copy=False)
             
             if len(df) > 0:
                 training_datasets.append(df)
@@ -149,12 +619,20 @@ def train_reference_model():
         if not training_datasets:
             return jsonify({'status': 'error', 'message': '유효한 훈련 데이터가 없습니다.'}), 400
         
-        # 모델 훈련
-        training_results = analyzer.train_reference_model(training_datasets)
-        
-        # 모델 저장
-        analyzer.save_model('hipot_reference_model.pth')
-        model_initialized = True
+        # 모델 훈련 후 저장 및 교체
+        if reference_key is not None:
+            target = _registry.new_analyzer()
+            with stage_metrics.span('api.train'):
+                training_results = target.train_reference_model(training_datasets)
+            with _model_write_lock(_registry.path_for(reference_key)):
+                _registry.save(*reference_key, analyzer=target)
+        else:
+            target = HipotAIAnalyzer(plot_queue=_registry.plot_queue)
+            with stage_metrics.span('api.train'):
+                training_results = target.train_reference_model(training_datasets)
+            with _model_write_lock(MODEL_PATH):
+                _save_default_model(target)
+                analyzer, model_initialized = target, True
         
         logger.info(f"모델 훈련 완료. 최종 손실: {training_results['final_loss']:.6f}")
         
@@ -167,6 +645,8 @@ def train_reference_model():
             }
         })
         
+    except PayloadFormatError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
     except Exception as e:
         logger.error(f"모델 훈련 오류: {str(e)}")
         logger.error(traceback.format_exc())
@@ -175,55 +655,194 @@ def train_reference_model():
 @app.route('/analyze', methods=['POST'])
 @monitor_performance
 def analyze_data():
-    """테스트 데이터 분석 - 최적화 버전"""
+    """테스트 데이터 분석 - 최적화 버전
+    
+    product/test_mode(쿼리 문자열 또는 JSON Product/TestMode)를 지정하면
+    레지스트리의 해당 기준 모델로 분석한다. 기준 모델 윈도우 추론은 기본으로 생략되며
+    inference=1이면 요약을, inference_windows=1이면 창별 결과까지 'model_inference'로 반환한다.
+    """
     try:
-        with _analyzer_lock:
-            if analyzer is None or not model_initialized:
-                return jsonify({'status': 'error', 'message': '모델이 초기화되지 않았습니다.'}), 400
-        
-        data = request.json
-        
-        # 데이터 검증
-        required_fields = ['Time', 'Voltage', 'Current', 'Resistance']
-        if not all(field in data for field in required_fields):
-            return jsonify({'status': 'error', 'message': f'필수 필드가 누락되었습니다: {required_fields}'}), 400
+        # 이진 열 블록이면 복사 없이 디코딩, 아니면 JSON 파싱 후 필수 필드 검증
+        with stage_metrics.span('api.parse'):
+            test_data, data = _read_single_session()
+            reference_key = _request_reference_key(data)
+            plot_mode, plot_options = _request_plot_options()
+            include_heatmap = request.args.get('heatmap', '0').lower() in ('1', 'true')
+            # 기준 모델 윈도우 추론은 요청할 때만 (inference=1: 요약, inference_windows=1: 창별 결과 포함)
+            inference_windows = request.args.get('inference_windows', '0').lower() in ('1', 'true')
+            include_inference = request.args.get('inference', type=lambda value: value.lower() in ('1', 'true'))
         
-        # DataFrame 생성 - 최적화
-        test_data = pd.DataFrame({
-            'time': np.array(data['Time'], dtype=np.float32),
-            'voltage': np.array(data['Voltage'], dtype=np.float32),
-            'current': np.array(data['Current'], dtype=np.float32),
-            'resistance': np.array(data['Resistance'], dtype=np.float32)
-        })
+        with stage_metrics.span('api.route'):
+            target = _route_analyzer(reference_key)
+        if target is None:
+            return _route_error(reference_key)
         
         if len(test_data) == 0:
             return jsonify({'status': 'error', 'message': '분석할 데이터가 없습니다.'}), 400
         
+        # 같은 샘플 + 같은 기준 모델이면 캐시된 결과 반환
+        version = target.reference_version
+        if reference_key is not None:
+            version = f'{reference_key[0]}/{reference_key[1]}/{version}'
+        if plot_mode != 'async' or plot_options or include_heatmap:
+            version = f'{version}/{plot_mode}/{sorted(plot_options.items())}/{include_heatmap}'
+        if include_inference is not None or inference_windows:
+            version = f'{version}/inference={include_inference}/{inference_windows}'
+        with stage_metrics.span('api.cache_lookup'):
+            cache_key = AnalysisResultCache.make_key(
+                [test_data[column].values for column in ('time', 'voltage', 'current', 'resistance')],
+                version
+            )
+            cached = _result_cache.get(cache_key)
+        if cached is not None:
+            logger.info("분석 결과 캐시 적중")
+            if plot_mode != 'async':
+                return Response(cached, mimetype='application/json')
+            # 그래프 작업은 캐시하지 않음 - 내용 해시 작업 ID로 조회하고 없으면 다시 등록
+            cached_result = json.loads(cached)
+            cached_result['plot_job'] = target.submit_plots(test_data, plot_options,
+                                                            cached_result.pop('plot_job_id', None))
+            return jsonify(cached_result)
+        
         # 병렬 분석 수행
         def run_analysis():
-            return analyzer.analyze_test_session(test_data)
+            if plot_mode == 'none':
+                return target.analyze_session_metrics(test_data, include_heatmap=include_heatmap,
+                                                      include_inference=include_inference,
+                                                      inference_windows=inference_windows)
+            # 그래프는 백그라운드 렌더링 큐로 넘기고 지표만 즉시 반환 (inline이면 함께 렌더링)
+            return target.analyze_test_session(test_data, async_plots=True, plot_options=plot_options,
+                                               inline_plots=plot_mode == 'inline', include_heatmap=include_heatmap,
+                                               include_inference=include_inference,
+                                               inference_windows=inference_windows)
         
-        future = _executor.submit(run_analysis)
-        analysis_result = future.result(timeout=30)  # 30초 타임아웃
+        with stage_metrics.span('api.analyze'):
+            future = _executor.submit(run_analysis)
+            analysis_result = future.result(timeout=30)  # 30초 타임아웃
         
         # 결과 변환 최적화 - 메모리 효율적 변환
-        serializable_result = _convert_analysis_result(analysis_result)
+        with stage_metrics.span('api.serialize'):
+            serializable_result = _convert_analysis_result(analysis_result)
+            response = jsonify(serializable_result)
         
         logger.info(f"분석 완료. 정확도: {serializable_result['accuracy_metrics']['overall_accuracy']:.3f}")
         
-        return jsonify(serializable_result)
+        # 그래프 작업 상태/산출물 ID는 이 프로세스의 렌더링 큐에만 유효하므로 캐시에서 제외
+        cached_result = dict(serializable_result, plots=[], plot_job=None)
+        if analysis_result.get('plot_job'):
+            cached_result['plot_job_id'] = analysis_result['plot_job']['job_id']
+        _result_cache.put(cache_key, jsonify(cached_result).get_data())
+        return response
         
+    except PayloadFormatError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
     except Exception as e:
         logger.error(f"데이터 분석 오류: {str(e)}")
         logger.error(traceback.format_exc())
         return jsonify({'status': 'error', 'message': str(e)}), 500
 
+@app.route('/analyze_batch', methods=['POST'])
+@monitor_performance
+def analyze_batch():
+    """여러 테스트 세션 일괄 분석 (그래프 제외)"""
+    try:
+        target = _route_analyzer(None)
+        if target is None:
+            return jsonify({'status': 'error', 'message': '모델이 초기화되지 않았습니다.'}), 400
+        
+        with stage_metrics.span('api.parse'):
+            session_columns = _read_binary_sessions()
+            if session_columns is not None:
+                max_workers = request.args.get('max_workers', type=int)
+            else:
+                data = request.json
+                
+                if 'sessions' not in data or not data['sessions']:
+                    return jsonify({'status': 'error', 'message': '분석할 세션 목록이 필요합니다.'}), 400
+                
+                session_columns = [_json_session_columns(session_data) for session_data in data['sessions']]
+                max_workers = data.get('max_workers')
+        
+        if not session_columns:
+            return jsonify({'status': 'error', 'message': '분석할 세션 목록이 필요합니다.'}), 400
+        
+        sessions = [pd.DataFrame(columns, copy=False) for columns in session_columns]
+        with stage_metrics.span('api.analyze_batch'):
+            batch_result = target.analyze_sessions_batch(sessions, max_workers=max_workers)
+        
+        results = []
+        with stage_metrics.span('api.serialize'):
+            for report in batch_result['results']:
+                if 'error' in report:
+                    results.append({'status': 'error', 'message': report['error']})
+                else:
+                    results.append(_convert_analysis_result(report))
+        
+        aggregate = batch_result['aggregate']
+        logger.info(f"일괄 분석 완료. 세션 {len(sessions)}개, 전체 불합률: {aggregate['overall_defect_rate']:.2f}%")
+        
+        return jsonify({
+            'status': 'success',
+            'results': results,
+            'aggregate': {
+                'overall_defect_rate': float(aggregate['overall_defect_rate']),
+                'pass_rate': float(aggregate['pass_rate']),
+                'total_tests': aggregate['total_tests'],
+                'sessions_analyzed': aggregate['sessions_analyzed'],
+                'sessions_failed': aggregate['sessions_failed'],
+                'defect_breakdown': {
+                    k: float(v) for k, v in aggregate['defect_breakdown'].items()
+                }
+            }
+        })
+        
+    except PayloadFormatError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    except Exception as e:
+        logger.error(f"일괄 분석 오류: {str(e)}")
+        logger.error(traceback.format_exc())
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+def _convert_test_summary(test_summary: Dict) -> Dict:
+    """테스트 요약의 NumPy 스칼라를 파이썬 기본 타입으로 변환"""
+    return {
+        'data_points': int(test_summary['data_points']),
+        'test_duration': float(test_summary['test_duration']),
+        'voltage_range': [float(v) for v in test_summary['voltage_range']],
+        'current_range': [float(v) for v in test_summary['current_range']],
+        'resistance_range': [float(v) for v in test_summary['resistance_range']]
+    }
+
+def _convert_plot_images(plot_images: List[Dict]) -> List[Dict]:
+    """메모리에서 렌더링된 그래프 이미지를 base64 문자열로 변환"""
+    return [
+        {'name': image['name'], 'format': image['format'], 'mimetype': image['mimetype'],
+         'data': base64.b64encode(image['data']).decode('ascii')}
+        for image in plot_images
+    ]
+
+def _nullable_list(values: Optional[np.ndarray]):
+    """NaN을 null로 바꾼 중첩 목록 (JSON 표준에는 NaN이 없음)"""
+    if values is None:
+        return None
+    return np.where(np.isnan(values), None, values).tolist()
+
+def _convert_heatmap(heatmap: Dict) -> Dict:
+    """이상 탐지 히트맵 데이터를 JSON 직렬화 가능한 형태로 변환"""
+    return {
+        'parameters': heatmap['parameters'],
+        'window_size': int(heatmap['window_size']),
+        'window_starts': heatmap['window_starts'].tolist(),
+        'evolution': _nullable_list(heatmap['evolution']),
+        'correlation': _nullable_list(heatmap['correlation'])
+    }
+
 def _convert_analysis_result(analysis_result: Dict) -> Dict:
     """분석 결과를 JSON 직렬화 가능한 형태로 변환 - 최적화"""
-    return {
+    result = {
         'status': 'success',
         'timestamp': analysis_result['timestamp'],
-        'test_summary': analysis_result['test_summary'],
+        'test_summary': _convert_test_summary(analysis_result['test_summary']),
         'accuracy_metrics': {
             key: float(value) for key, value in analysis_result['accuracy_metrics'].items()
         },
@@ -236,78 +855,290 @@ def _convert_analysis_result(analysis_result: Dict) -> Dict:
             }
         },
         'recommendations': analysis_result['recommendations'],
-        'plots': analysis_result['plots']
+        'plots': analysis_result['plots'],
+        'plot_job': analysis_result.get('plot_job'),
+        'model_inference': analysis_result.get('model_inference')
     }
+    if 'plot_images' in analysis_result:
+        result['plot_images'] = _convert_plot_images(analysis_result['plot_images'])
+    if 'anomaly_heatmap' in analysis_result:
+        result['anomaly_heatmap'] = _convert_heatmap(analysis_result['anomaly_heatmap'])
+    return result
 
-@app.route('/update_reference', methods=['POST'])
-def update_reference():
-    """기준 모델 업데이트"""
+@app.route('/stream/open', methods=['POST'])
+@single_worker_only
+def open_stream_session():
+    """실시간 증분 분석 세션 시작"""
     try:
-        if analyzer is None or not model_initialized:
+        target = _route_analyzer(None)
+        if target is None:
             return jsonify({'status': 'error', 'message': '모델이 초기화되지 않았습니다.'}), 400
         
+        session = target.open_stream_session()
+        session_id = uuid.uuid4().hex
+        
+        with _stream_lock:
+            _stream_sessions[session_id] = [session, time.monotonic()]
+            _evict_stream_sessions()
+        
+        return jsonify({'status': 'success', 'session_id': session_id})
+        
+    except Exception as e:
+        logger.error(f"스트리밍 세션 시작 오류: {str(e)}")
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+@app.route('/stream/<session_id>/push', methods=['POST'])
+@single_worker_only
+def push_stream_chunk(session_id):
+    """측정 청크 추가 및 누적 지표 반환"""
+    try:
+        session = _get_stream_session(session_id)
+        if session is None:
+            return jsonify({'status': 'error', 'message': '세션을 찾을 수 없습니다.'}), 404
+        
         data = request.json
         
-        # 새로운 참조 데이터 처리
-        new_data = pd.DataFrame({
-            'time': data.get('Time', []),
-            'voltage': data.get('Voltage', []),
-            'current': data.get('Current', []),
-            'resistance': data.get('Resistance', [])
-        })
+        required_fields = ['Time', 'Voltage', 'Current', 'Resistance']
+        if not all(field in data for field in required_fields):
+            return jsonify({'status': 'error', 'message': f'필수 필드가 누락되었습니다: {required_fields}'}), 400
         
-        if len(new_data) == 0:
-            return jsonify({'status': 'error', 'message': '업데이트할 데이터가 없습니다.'}), 400
+        snapshot = session.push(
+            np.array(data['Time'], dtype=np.float64),
+            np.array(data['Voltage'], dtype=np.float64),
+            np.array(data['Current'], dtype=np.float64),
+            np.array(data['Resistance'], dtype=np.float64)
+        )
         
-        # 참조 모델 업데이트 (간단한 구현)
-        # 실제로는 더 정교한 검증 및 업데이트 로직 필요
-        current_reference = analyzer.reference_data
-        if current_reference is not None:
-            # 기존 참조 데이터와 결합
-            logger.info("기준 모델이 업데이트되었습니다.")
+        return jsonify(_convert_stream_snapshot(snapshot))
+        
+    except Exception as e:
+        logger.error(f"스트리밍 청크 처리 오류: {str(e)}")
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+@app.route('/stream/<session_id>/close', methods=['POST'])
+@single_worker_only
+def close_stream_session(session_id):
+    """실시간 증분 분석 세션 종료 및 최종 지표 반환 (진행 중인 청크 처리가 끝난 뒤의 지표)"""
+    session = _get_stream_session(session_id, remove=True)
+    if session is None:
+        return jsonify({'status': 'error', 'message': '세션을 찾을 수 없습니다.'}), 404
+    
+    return jsonify(_convert_stream_snapshot(session.snapshot()))
+
+def _get_stream_session(session_id: str, remove: bool = False):
+    """세션 조회 후 최근 사용으로 표시 (remove이면 목록에서 제거, 없거나 만료되었으면 None)"""
+    with _stream_lock:
+        _evict_stream_sessions()
+        if remove:
+            entry = _stream_sessions.pop(session_id, None)
         else:
-            # 새로운 참조 데이터 설정
-            analyzer._set_reference_data([new_data])
-            logger.info("새로운 기준 모델이 설정되었습니다.")
+            entry = _stream_sessions.get(session_id)
+            if entry is not None:
+                entry[1] = time.monotonic()
+                _stream_sessions.move_to_end(session_id)
+    return entry[0] if entry is not None else None
+
+def _evict_stream_sessions():
+    """유휴 시간이 지났거나 개수 상한을 넘은 세션 제거 (_stream_lock 안에서 호출)"""
+    now = time.monotonic()
+    while _stream_sessions:
+        session_id, (_, last_used) = next(iter(_stream_sessions.items()))
+        if len(_stream_sessions) <= MAX_STREAM_SESSIONS and now - last_used < STREAM_SESSION_TTL:
+            break
+        del _stream_sessions[session_id]
+        logger.info(f"스트리밍 세션 {session_id} 제거 (유휴 시간/개수 상한 초과)")
+
+def _convert_stream_snapshot(snapshot: Dict) -> Dict:
+    """증분 분석 지표를 JSON 직렬화 가능한 형태로 변환"""
+    defect_metrics = snapshot['defect_metrics']
+    return {
+        'status': 'success',
+        'test_summary': _convert_test_summary(snapshot['test_summary']),
+        'accuracy_metrics': {
+            key: float(value) for key, value in snapshot['accuracy_metrics'].items()
+        },
+        'defect_metrics': {
+            'overall_defect_rate': float(defect_metrics['overall_defect_rate']),
+            'pass_rate': float(defect_metrics['pass_rate']),
+            'total_tests': defect_metrics['total_tests'],
+            'defect_breakdown': {
+                k: float(v) for k, v in defect_metrics['defect_breakdown'].items()
+            }
+        }
+    }
+
+@app.route('/update_reference', methods=['POST'])
+@monitor_performance
+def update_reference():
+    """기준 모델 업데이트 - 새 기준 세션을 재훈련 없이 병합 통계에 반영"""
+    try:
+        # 이진 열 블록(세션 여러 개 가능) 또는 JSON 단일 세션
+        with stage_metrics.span('api.parse'):
+            sessions = _read_binary_sessions()
+            data = None
+            if sessions is None:
+                data = request.json
+                sessions = [_json_session_columns(data, dtype=np.float64)]
+            new_sessions = [pd.DataFrame(columns, copy=False) for columns in sessions]
+            new_sessions = [session for session in new_sessions if len(session) > 0]
+            reference_key = _request_reference_key(data)
+        
+        if not new_sessions:
+            return jsonify({'status': 'error', 'message': '업데이트할 데이터가 없습니다.'}), 400
+        
+        # 기준 데이터가 없으면 새로 설정, 있으면 병합 (동시 업데이트가 서로 덮어쓰지 않도록 잠금)
+        # 다중 워커 모드에서는 파일 잠금 안에서 다른 워커의 최신 저장본을 먼저 반영
+        model_path = MODEL_PATH if reference_key is None else _registry.path_for(reference_key)
+        with _model_write_lock(model_path):
+            target = _route_analyzer(reference_key, refresh=True)
+            if target is None:
+                return _route_error(reference_key)
+            
+            with _analyzer_lock:
+                with stage_metrics.span('api.update_reference'):
+                    summary = target.update_reference_data(new_sessions)
+                
+                # 업데이트된 모델 저장
+                if reference_key is not None:
+                    _registry.save(*reference_key)
+                else:
+                    _save_default_model(target)
         
-        # 업데이트된 모델 저장
-        analyzer.save_model('hipot_reference_model.pth')
+        logger.info(f"기준 모델이 업데이트되었습니다. 리비전 {summary['revision']}, 세션 {summary['sessions']}개")
         
-        return jsonify({'status': 'success', 'message': '기준 모델이 업데이트되었습니다.'})
+        return jsonify({
+            'status': 'success',
+            'message': '기준 모델이 업데이트되었습니다.',
+            'reference': summary
+        })
         
+    except PayloadFormatError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
     except Exception as e:
         logger.error(f"기준 모델 업데이트 오류: {str(e)}")
         return jsonify({'status': 'error', 'message': str(e)}), 500
 
-@app.route('/get_plot/<filename>', methods=['GET'])
-def get_plot(filename):
-    """생성된 그래프 파일 반환"""
+@app.route('/references', methods=['GET'])
+def list_references():
+    """레지스트리에 등록된 (제품, 시험 모드) 목록과 메모리 적재 상태"""
+    return jsonify({
+        'status': 'success',
+        'references': [{'product': product, 'test_mode': test_mode} for product, test_mode in _registry.keys()],
+        'registry': _registry.stats()
+    })
+
+@app.route('/heatmap_data', methods=['POST'])
+@monitor_performance
+def get_heatmap_data():
+    """세션의 이상 탐지 히트맵 데이터 (그래프 렌더링 없이 행렬만 반환)
+    
+    windows 쿼리 인자로 시간 창 수를 바꿀 수 있으며 (기본 20), 전처리는 분석과 같은 기준 모델로 수행한다.
+    """
     try:
-        if os.path.exists(filename):
-            return send_file(filename, as_attachment=True)
-        else:
-            return jsonify({'status': 'error', 'message': '파일을 찾을 수 없습니다.'}), 404
+        test_data, data = _read_single_session()
+        reference_key = _request_reference_key(data)
+        num_windows = request.args.get('windows', 20, type=int)
+        if not 1 <= num_windows <= 10000:
+            raise PayloadFormatError(f'windows는 1~10000 범위여야 합니다: {num_windows}')
+        
+        target = _route_analyzer(reference_key)
+        if target is None:
+            return _route_error(reference_key)
+        if len(test_data) == 0:
+            return jsonify({'status': 'error', 'message': '분석할 데이터가 없습니다.'}), 400
+        
+        heatmap = target.anomaly_heatmap(test_data, num_windows)
+        return jsonify({'status': 'success', 'heatmap': _convert_heatmap(heatmap)})
+    except PayloadFormatError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    except Exception as e:
+        logger.error(f"히트맵 데이터 계산 오류: {str(e)}")
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+def _send_plot_artifact(artifact_id: str):
+    artifact = _registry.plot_queue.graph_generator.artifact_store.get(artifact_id)
+    if artifact is None:
+        return jsonify({'status': 'error', 'message': '그래프를 찾을 수 없습니다.'}), 404
+    
+    data, mimetype = artifact
+    return send_file(io.BytesIO(data), mimetype=mimetype, as_attachment=True, download_name=artifact_id)
+
+@app.route('/get_plot/<artifact_id>', methods=['GET'])
+@single_worker_only
+def get_plot(artifact_id):
+    """렌더링된 그래프 이미지 반환 (메모리 저장소에서 제거되었으면 404)"""
+    try:
+        return _send_plot_artifact(artifact_id)
+    except Exception as e:
+        logger.error(f"그래프 전송 오류: {str(e)}")
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+@app.route('/plot_job/<job_id>', methods=['GET'])
+@single_worker_only
+def get_plot_job(job_id):
+    """그래프 렌더링 작업 상태 조회"""
+    job = _registry.plot_queue.status(job_id)
+    if job is None:
+        return jsonify({'status': 'error', 'message': '렌더링 작업을 찾을 수 없습니다.'}), 404
+    
+    return jsonify({'status': 'success', 'job': job})
+
+@app.route('/get_plot/<job_id>/<int:index>', methods=['GET'])
+@single_worker_only
+def get_job_plot(job_id, index):
+    """렌더링 작업의 그래프 이미지 반환 (미완료 시 202)"""
+    try:
+        job = _registry.plot_queue.status(job_id)
+        if job is None:
+            return jsonify({'status': 'error', 'message': '렌더링 작업을 찾을 수 없습니다.'}), 404
+        if job['status'] == 'pending':
+            return jsonify({'status': 'pending', 'job': job}), 202
+        if job['status'] == 'failed':
+            return jsonify({'status': 'error', 'message': job['error']}), 500
+        if not 0 <= index < len(job['plots']):
+            return jsonify({'status': 'error', 'message': '그래프를 찾을 수 없습니다.'}), 404
+        
+        return _send_plot_artifact(job['plots'][index])
     except Exception as e:
-        logger.error(f"그래프 파일 전송 오류: {str(e)}")
+        logger.error(f"그래프 전송 오류: {str(e)}")
         return jsonify({'status': 'error', 'message': str(e)}), 500
 
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """단계별 처리 시간/메모리 지표 (Prometheus 텍스트 형식)"""
+    return Response(stage_metrics.render_prometheus(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+@app.route('/cache_stats', methods=['GET'])
+def get_cache_stats():
+    """분석 결과 캐시 적중/미스/제거 통계 (렌더링된 그래프 저장소 포함)"""
+    return jsonify({'status': 'success', 'cache': _result_cache.stats(),
+                    'plots': _registry.plot_queue.graph_generator.artifact_store.stats()})
+
+@app.route('/cache_clear', methods=['POST'])
+def clear_cache():
+    """분석 결과 캐시 비우기"""
+    _result_cache.clear()
+    return jsonify({'status': 'success', 'message': '분석 결과 캐시를 비웠습니다.'})
+
 @app.route('/get_statistics', methods=['GET'])
 def get_statistics():
     """모델 통계 정보 반환"""
     try:
-        if analyzer is None or not model_initialized:
+        target = _route_analyzer(None)
+        if target is None:
             return jsonify({'status': 'error', 'message': '모델이 초기화되지 않았습니다.'}), 400
         
         stats = {
             'model_initialized': model_initialized,
-            'reference_data_available': analyzer.reference_data is not None,
-            'model_parameters': analyzer.config['model'] if analyzer.config else {},
-            'thresholds': analyzer.config['thresholds'] if analyzer.config else {}
+            'reference_data_available': target.reference_data is not None,
+            'model_parameters': target.config['model'] if target.config else {},
+            'thresholds': target.config['thresholds'] if target.config else {}
         }
         
-        if analyzer.reference_data:
-            ref_stats = analyzer.reference_data['statistics']
+        if target.reference_data:
+            ref_stats = target.reference_data['statistics']
             stats['reference_statistics'] = {k: float(v) for k, v in ref_stats.items()}
+            stats['reference'] = target.reference_summary()
         
         return jsonify({'status': 'success', 'statistics': stats})
         
@@ -319,7 +1150,8 @@ def get_statistics():
 def classify_single_measurement():
     """단일 측정값 분류"""
     try:
-        if analyzer is None or not model_initialized:
+        target = _route_analyzer(None)
+        if target is None:
             return jsonify({'status': 'error', 'message': '모델이 초기화되지 않았습니다.'}), 400
         
         data = request.json
@@ -331,7 +1163,7 @@ def classify_single_measurement():
             'resistance': data.get('resistance', 0)
         }
         
-        classification = analyzer.accuracy_calculator._classify_test_result(result)
+        classification = target.accuracy_calculator._classify_test_result(result)
         
         return jsonify({
             'status': 'success',
@@ -347,15 +1179,19 @@ def classify_single_measurement():
 def export_model():
     """모델 내보내기"""
     try:
-        if analyzer is None or not model_initialized:
+        target = _route_analyzer(None)
+        if target is None:
             return jsonify({'status': 'error', 'message': '모델이 초기화되지 않았습니다.'}), 400
         
-        model_path = 'hipot_reference_model.pth'
-        if os.path.exists(model_path):
-            return send_file(model_path, as_attachment=True, 
-                           download_name=f'hipot_model_{datetime.now().strftime("%Y%m%d_%H%M%S")}.pth')
-        else:
+        if not os.path.exists(MODEL_PATH):
             return jsonify({'status': 'error', 'message': '저장된 모델이 없습니다.'}), 404
+        
+        # 저장 파일은 기준 배열을 별도 .npy로 두므로 배열을 포함한 단일 파일로 내보냄
+        buffer = io.BytesIO()
+        target.export_checkpoint(buffer)
+        buffer.seek(0)
+        return send_file(buffer, mimetype='application/octet-stream', as_attachment=True,
+                         download_name=f'hipot_model_{datetime.now().strftime("%Y%m%d_%H%M%S")}.pth')
             
     except Exception as e:
         logger.error(f"모델 내보내기 오류: {str(e)}")
@@ -363,9 +1199,11 @@ def export_model():
 
 @app.route('/import_model', methods=['POST'])
 def import_model():
-    """모델 가져오기"""
-    global model_initialized
+    """모델 가져오기 (새 분석기로 로드한 뒤 교체)"""
+    global analyzer, model_initialized
     
+    # 여러 워커/요청이 동시에 가져와도 임시 파일이 겹치지 않도록 고유 이름 사용
+    temp_path = f'temp_model_{uuid.uuid4().hex}.pth'
     try:
         if 'model_file' not in request.files:
             return jsonify({'status': 'error', 'message': '모델 파일이 필요합니다.'}), 400
@@ -375,18 +1213,17 @@ def import_model():
             return jsonify({'status': 'error', 'message': '파일이 선택되지 않았습니다.'}), 400
         
         # 임시 파일로 저장
-        temp_path = 'temp_model.pth'
         file.save(temp_path)
         
         # 모델 로드 시도
-        if analyzer is None:
-            initialize_analyzer()
+        new_analyzer = HipotAIAnalyzer(plot_queue=_registry.plot_queue)
+        new_analyzer.load_model(temp_path)
         
-        analyzer.load_model(temp_path)
-        
-        # 기본 모델 경로로 복사
-        os.rename(temp_path, 'hipot_reference_model.pth')
-        model_initialized = True
+        # 기본 모델 경로에 분리 형식(체크포인트 + 기준 배열 .npy)으로 저장
+        with _model_write_lock(MODEL_PATH):
+            _save_default_model(new_analyzer)
+            analyzer, model_initialized = new_analyzer, True
+        os.remove(temp_path)
         
         logger.info("모델이 성공적으로 가져와졌습니다.")
         
@@ -395,8 +1232,8 @@ def import_model():
     except Exception as e:
         logger.error(f"모델 가져오기 오류: {str(e)}")
         # 임시 파일 정리
-        if os.path.exists('temp_model.pth'):
-            os.remove('temp_model.pth')
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
         return jsonify({'status': 'error', 'message': str(e)}), 500
 
 @app.errorhandler(404)
@@ -407,27 +1244,144 @@ def not_found(error):
 def internal_error(error):
     return jsonify({'status': 'error', 'message': '서버 내부 오류가 발생했습니다.'}), 500
 
+def _serve_worker(listener: socket.socket, host: str, port: int, threads_per_worker: int):
+    """fork된 워커 프로세스 - 부모가 미리 로드한 분석기로 공유 리슨 소켓의 요청 처리"""
+    from werkzeug.serving import make_server
+    
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # 종료는 부모가 SIGTERM으로 전달
+    
+    # 워커 수만큼 코어를 나누어 torch/전처리 스레드가 서로 경쟁하지 않게 함
+    import torch
+    torch.set_num_threads(threads_per_worker)
+    if analyzer is not None:
+        analyzer.preprocessor.n_workers = threads_per_worker
+    
+    _run_warmup(('inference',))
+    server = make_server(host, port, app, threaded=True, fd=listener.fileno())
+    logger.info(f"워커 {os.getpid()} 시작")
+    server.serve_forever()
+
+def serve(host: str = '127.0.0.1', port: int = 5000, workers: int = 1, sync_interval: float = 1.0,
+          threads: Optional[int] = None):
+    """API 서버 실행
+    
+    threads는 프로세스(워커)당 torch 연산 스레드 수로, 프로세스 시작 시 한 번만 설정한다
+    (지정하지 않으면 단일 프로세스는 torch 기본값, 다중 워커는 코어 수를 워커 수로 나눈 값).
+    
+    workers가 1보다 크면 (POSIX) 부모 프로세스가 모델/전처리기를 미리 로드한 뒤 워커를 fork하여
+    같은 리슨 소켓을 공유한다. 모델 가중치와 학습된 전처리기는 copy-on-write로, 기준 배열은
+    mmap 페이지로 공유되고, 모델 변경은 체크포인트 파일을 통해 sync_interval초 안에 다른 워커에 반영된다.
+    
+    다중 워커 모드의 제한: 요청마다 다른 워커가 받을 수 있으므로 워커 메모리에만 있는 상태를 쓰는
+    스트리밍(/stream/*)과 비동기 그래프(/plot_job, /get_plot)는 501을 반환하고,
+    /analyze의 그래프는 기본으로 생략되며 plots=inline으로만 받을 수 있다.
+    """
+    global _model_sync_interval, _multi_worker
+    
+    if workers <= 1 or not hasattr(os, 'fork') or fcntl is None:
+        if workers > 1:
+            logger.warning("이 플랫폼은 fork를 지원하지 않아 단일 프로세스로 실행합니다.")
+        if threads:
+            import torch
+            torch.set_num_threads(threads)
+        # 무거운 라이브러리 로드와 분석기 초기화는 백그라운드에서 수행 (/ready로 완료 확인)
+        start_warmup()
+        app.run(host=host, port=port, debug=False, threaded=True)
+        return
+    
+    listener = socket.create_server((host, port), backlog=512)
+    _model_sync_interval = sync_interval
+    _multi_worker = True
+    _registry.refresh_interval = sync_interval
+    threads_per_worker = threads or max(1, (os.cpu_count() or 1) // workers)
+    
+    # fork 전에 한 번만 로드 (추론 스레드 풀은 fork 이후 워커에서 생성)
+    _warmup_state.update(status='warming', started_at=datetime.now().isoformat(), stages={})
+    _run_warmup(('analyzer', 'plotting'))
+    if _warmup_state['status'] != 'ready':
+        raise RuntimeError(f"모델 사전 로드 실패: {_warmup_state['error']}")
+    
+    children = {}
+    stopping = False
+    
+    def spawn(index):
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                _serve_worker(listener, host, port, threads_per_worker)
+            except BaseException:
+                logger.error(traceback.format_exc())
+                code = 1
+            finally:
+                os._exit(code)
+        children[pid] = index
+    
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+    
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for index in range(workers):
+        spawn(index)
+    logger.info(f"워커 {workers}개 시작 (워커당 스레드 {threads_per_worker}개)")
+    
+    # 비정상 종료한 워커는 다시 띄움
+    while children:
+        try:
+            pid, _ = os.wait()
+        except ChildProcessError:
+            break
+        index = children.pop(pid, None)
+        if index is not None and not stopping:
+            logger.warning(f"워커 {pid}가 종료되어 다시 시작합니다.")
+            spawn(index)
+    listener.close()
+
 if __name__ == '__main__':
-    print("Hipot AI Analyzer API 서버를 시작합니다...")
+    parser = argparse.ArgumentParser(description='Hipot AI Analyzer API 서버')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--workers', type=int, default=int(os.environ.get('HIPOT_WORKERS', '1')),
+                        help='워커 프로세스 수 (POSIX, 기본 1 = 단일 프로세스 스레드 서버). '
+                             '2 이상이면 스트리밍/비동기 그래프 API를 쓸 수 없고 그래프는 plots=inline으로만 제공')
+    parser.add_argument('--threads', type=int, default=None,
+                        help='프로세스(워커)당 torch 연산 스레드 수 (기본: 코어 수 / 워커 수)')
+    args = parser.parse_args()
     
-    # 분석기 초기화
-    if initialize_analyzer():
-        print("분석기가 성공적으로 초기화되었습니다.")
-    else:
-        print("경고: 분석기 초기화에 실패했습니다. 나중에 수동으로 초기화해야 합니다.")
+    print("Hipot AI Analyzer API 서버를 시작합니다...")
     
     # API 서버 시작
-    print("API 서버가 http://127.0.0.1:5000 에서 실행됩니다.")
+    print(f"API 서버가 http://{args.host}:{args.port} 에서 실행됩니다. (워커 {args.workers}개)")
     print("\n사용 가능한 엔드포인트:")
     print("- GET  /health                 : API 상태 확인")
+    print("- GET  /ready                  : 분석 준비 상태 (워밍업 전 503)")
     print("- POST /initialize             : 모델 초기화")
     print("- POST /train                  : 기준 모델 훈련")
     print("- POST /analyze                : 테스트 데이터 분석")
+    print("- POST /analyze_batch          : 여러 세션 일괄 분석")
+    print("- POST /stream/open            : 실시간 증분 분석 세션 시작")
+    print("- POST /stream/<id>/push       : 측정 청크 추가")
+    print("- POST /stream/<id>/close      : 실시간 증분 분석 세션 종료")
     print("- POST /update_reference       : 기준 모델 업데이트")
-    print("- GET  /get_plot/<filename>    : 그래프 파일 다운로드")
+    print("- GET  /references             : 제품/시험 모드별 기준 모델 목록")
+    print("- POST /heatmap_data           : 이상 탐지 히트맵 데이터 (렌더링 없음)")
+    print("- GET  /get_plot/<id>          : 렌더링된 그래프 다운로드")
+    print("- GET  /plot_job/<job_id>      : 그래프 렌더링 작업 상태")
+    print("- GET  /get_plot/<job_id>/<n>  : 렌더링 작업의 그래프 다운로드")
     print("- GET  /get_statistics         : 모델 통계 정보")
+    print("- GET  /metrics                : 단계별 처리 시간/메모리 지표 (Prometheus)")
+    print("- GET  /cache_stats            : 분석 결과 캐시 통계")
+    print("- POST /cache_clear            : 분석 결과 캐시 비우기")
     print("- POST /classify_single        : 단일 측정값 분류")
     print("- GET  /export_model           : 모델 내보내기")
     print("- POST /import_model           : 모델 가져오기")
     
-    app.run(host='127.0.0.1', port=5000, debug=False, threaded=True)
\ No newline at end of file
+    serve(args.host, args.port, args.workers, threads=args.threads)
\ No newline at end of file
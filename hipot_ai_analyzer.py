@@ -9,12 +9,32 @@ import pandas as pd
 from typing import Dict, List, Tuple, Optional
 from enum import Enum
 from datetime import datetime
+import io
 import json
+import os
+import re
+import sys
+import time
+import bisect
+import hashlib
 import pickle
+import itertools
 import warnings
+import tracemalloc
+import uuid
 from functools import lru_cache
-from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict, deque
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 import threading
+import atexit
+import multiprocessing
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
 
 # 성능을 위한 지연 로딩
 _matplotlib_loaded = False
@@ -24,13 +44,14 @@ _torch_loaded = False
 warnings.filterwarnings('ignore')
 
 def _load_matplotlib():
-    """matplotlib 지연 로딩"""
+    """matplotlib 지연 로딩 (pyplot 상태 머신 없이 객체지향 Figure/Agg API만 사용)"""
     global _matplotlib_loaded
     if not _matplotlib_loaded:
-        global plt, sns
-        import matplotlib.pyplot as plt
-        import seaborn as sns
-        plt.style.use('seaborn-v0_8')
+        global Figure, FigureCanvasAgg
+        import matplotlib.style
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        matplotlib.style.use('seaborn-v0_8')
         _matplotlib_loaded = True
 
 def _load_sklearn():
@@ -49,13 +70,180 @@ def _load_torch():
     """PyTorch 지연 로딩"""
     global _torch_loaded
     if not _torch_loaded:
-        global torch, nn, optim, DataLoader, TensorDataset
+        global torch, nn, optim, DataLoader, TensorDataset, RandomSampler, BatchSampler
         import torch
         import torch.nn as nn
         import torch.optim as optim
-        from torch.utils.data import DataLoader, TensorDataset
+        from torch.utils.data import DataLoader, TensorDataset, RandomSampler, BatchSampler
         _torch_loaded = True
 
+class _StageSpan:
+    """단계 계측 구간 - 종료 시 소요 시간, 순 할당량, 최대 RSS 증가분 기록"""
+
+    __slots__ = ('metrics', 'stage', 'started', 'peak_rss', 'allocated')
+
+    def __init__(self, metrics: 'StageMetrics', stage: str):
+        self.metrics = metrics
+        self.stage = stage
+
+    def __enter__(self):
+        self.peak_rss = _peak_rss_bytes()
+        self.allocated = tracemalloc.get_traced_memory()[0] if self.metrics.trace_allocations else None
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        seconds = time.perf_counter() - self.started
+        allocated = None
+        if self.allocated is not None:
+            allocated = tracemalloc.get_traced_memory()[0] - self.allocated
+        self.metrics.record(self.stage, seconds, allocated, _peak_rss_bytes() - self.peak_rss)
+        return False
+
+def _peak_rss_bytes() -> int:
+    """프로세스 최대 RSS (resource 모듈이 없는 플랫폼에서는 0)"""
+    if resource is None:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+class StageMetrics:
+    """분석 단계별 처리 시간/메모리 계측
+
+    단계별 누적 히스토그램과 최근 window개 소요 시간의 분위수(p50/p95/p99)를 유지하고
+    Prometheus 텍스트 형식으로 내보낸다. 비활성화 시 span()은 공유 nullcontext를 반환한다.
+    """
+
+    BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+    QUANTILES = (0.5, 0.95, 0.99)
+
+    def __init__(self, enabled: bool = True, trace_allocations: bool = False, window: int = 1024):
+        self.enabled = enabled
+        self.trace_allocations = False
+        self.window = window
+        self._lock = threading.Lock()
+        self._stages = {}
+        self.configure(trace_allocations=trace_allocations)
+
+    def configure(self, enabled: Optional[bool] = None, trace_allocations: Optional[bool] = None):
+        """계측 on/off 및 tracemalloc 기반 할당량 추적 설정"""
+        if enabled is not None:
+            self.enabled = enabled
+        if trace_allocations is not None:
+            if trace_allocations and not tracemalloc.is_tracing():
+                tracemalloc.start()
+            self.trace_allocations = trace_allocations
+
+    def span(self, stage: str):
+        """with 문으로 감싼 구간을 stage 이름으로 계측"""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _StageSpan(self, stage)
+
+    def record(self, stage: str, seconds: float, allocated_bytes: Optional[int] = None, rss_growth_bytes: int = 0):
+        with self._lock:
+            state = self._stages.get(stage)
+            if state is None:
+                state = self._stages[stage] = {
+                    'count': 0,
+                    'sum': 0.0,
+                    'buckets': [0] * len(self.BUCKETS),
+                    'recent': deque(maxlen=self.window),
+                    'allocated_bytes': 0,
+                    'rss_growth_bytes': 0
+                }
+            state['count'] += 1
+            state['sum'] += seconds
+            state['recent'].append(seconds)
+            index = bisect.bisect_left(self.BUCKETS, seconds)
+            if index < len(self.BUCKETS):
+                state['buckets'][index] += 1
+            if allocated_bytes is not None:
+                state['allocated_bytes'] += allocated_bytes
+            state['rss_growth_bytes'] += rss_growth_bytes
+
+    def reset(self):
+        with self._lock:
+            self._stages.clear()
+
+    def snapshot(self) -> Dict:
+        """단계별 호출 수, 총 소요 시간, 최근 분위수 (JSON용)"""
+        with self._lock:
+            stages = {stage: (state['count'], state['sum'], list(state['recent']),
+                              state['allocated_bytes'], state['rss_growth_bytes'])
+                      for stage, state in self._stages.items()}
+
+        result = {}
+        for stage, (count, total, recent, allocated, rss_growth) in stages.items():
+            quantiles = np.quantile(recent, self.QUANTILES)
+            result[stage] = {
+                'count': count,
+                'total_seconds': total,
+                **{f'p{int(q * 100)}': float(value) for q, value in zip(self.QUANTILES, quantiles)},
+                'allocated_bytes': allocated,
+                'rss_growth_bytes': rss_growth
+            }
+        return result
+
+    def render_prometheus(self) -> str:
+        """Prometheus 텍스트 노출 형식 (0.0.4)"""
+        with self._lock:
+            stages = [(stage, dict(state, buckets=list(state['buckets']), recent=list(state['recent'])))
+                      for stage, state in sorted(self._stages.items())]
+
+        lines = [
+            '# HELP hipot_stage_duration_seconds 분석 단계별 소요 시간',
+            '# TYPE hipot_stage_duration_seconds histogram'
+        ]
+        for stage, state in stages:
+            cumulative = 0
+            for bound, count in zip(self.BUCKETS, state['buckets']):
+                cumulative += count
+                lines.append(f'hipot_stage_duration_seconds_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+            lines.append(f'hipot_stage_duration_seconds_bucket{{stage="{stage}",le="+Inf"}} {state["count"]}')
+            lines.append(f'hipot_stage_duration_seconds_sum{{stage="{stage}"}} {state["sum"]}')
+            lines.append(f'hipot_stage_duration_seconds_count{{stage="{stage}"}} {state["count"]}')
+
+        lines += [
+            f'# HELP hipot_stage_recent_duration_seconds 최근 {self.window}회 기준 단계별 소요 시간 분위수',
+            '# TYPE hipot_stage_recent_duration_seconds summary'
+        ]
+        for stage, state in stages:
+            for q, value in zip(self.QUANTILES, np.quantile(state['recent'], self.QUANTILES)):
+                lines.append(f'hipot_stage_recent_duration_seconds{{stage="{stage}",quantile="{q}"}} {value}')
+            lines.append(f'hipot_stage_recent_duration_seconds_sum{{stage="{stage}"}} {sum(state["recent"])}')
+            lines.append(f'hipot_stage_recent_duration_seconds_count{{stage="{stage}"}} {len(state["recent"])}')
+
+        lines += [
+            '# HELP hipot_stage_rss_growth_bytes_total 단계 실행 중 증가한 프로세스 최대 RSS',
+            '# TYPE hipot_stage_rss_growth_bytes_total counter'
+        ]
+        lines += [f'hipot_stage_rss_growth_bytes_total{{stage="{stage}"}} {state["rss_growth_bytes"]}'
+                  for stage, state in stages]
+
+        if self.trace_allocations:
+            lines += [
+                '# HELP hipot_stage_allocated_bytes_total 단계별 순 메모리 할당량 (tracemalloc)',
+                '# TYPE hipot_stage_allocated_bytes_total counter'
+            ]
+            lines += [f'hipot_stage_allocated_bytes_total{{stage="{stage}"}} {state["allocated_bytes"]}'
+                      for stage, state in stages]
+
+        lines += [
+            '# HELP hipot_process_peak_rss_bytes 프로세스 최대 RSS',
+            '# TYPE hipot_process_peak_rss_bytes gauge',
+            f'hipot_process_peak_rss_bytes {_peak_rss_bytes()}'
+        ]
+        return '\n'.join(lines) + '\n'
+
+_NULL_SPAN = nullcontext()
+
+# 전역 계측기 (HIPOT_METRICS=0이면 비활성화, HIPOT_METRICS_TRACEMALLOC=1이면 할당량 추적)
+stage_metrics = StageMetrics(
+    enabled=os.environ.get('HIPOT_METRICS', '1') != '0',
+    trace_allocations=os.environ.get('HIPOT_METRICS_TRACEMALLOC') == '1'
+)
+
 class DataClassification(Enum):
     """데이터 분류 열거형"""
     VALID = "정상"
@@ -71,18 +259,223 @@ class TestResult(Enum):
     LOW_FAIL = "저전류 불합격"
     OUTPUT_FAIL = "출력 불합격"
 
+class RobustZOutlierDetector:
+    """중앙값/MAD 기반 강건 z-점수 울타리
+    
+    특성별 |x - 중앙값| / (1.4826·MAD)의 최댓값이 학습 데이터의 (1 - contamination) 분위수를
+    넘으면 이상치로 판정한다. predict는 IsolationForest와 같이 정상 1, 이상치 -1을 반환한다.
+    """
+    
+    def __init__(self, contamination: float = 0.1):
+        self.contamination = contamination
+    
+    def fit(self, X) -> 'RobustZOutlierDetector':
+        X = np.asarray(X, dtype=np.float64)
+        self.median_ = np.median(X, axis=0)
+        mad = np.median(np.abs(X - self.median_), axis=0) * 1.4826
+        self.scale_ = np.where(mad > 0, mad, 1.0)
+        self.threshold_ = np.quantile(self.score_samples(X), 1 - self.contamination)
+        return self
+    
+    def score_samples(self, X) -> np.ndarray:
+        z = np.abs(np.asarray(X, dtype=np.float64) - self.median_)
+        z /= self.scale_
+        return z.max(axis=1)
+    
+    def predict(self, X) -> np.ndarray:
+        return np.where(self.score_samples(X) <= self.threshold_, 1, -1)
+    
+    def get_state(self) -> Dict:
+        """저장용 학습 파라미터"""
+        return {'contamination': self.contamination, 'median': self.median_, 'scale': self.scale_,
+                'threshold': float(self.threshold_)}
+    
+    @classmethod
+    def from_state(cls, state: Dict) -> 'RobustZOutlierDetector':
+        detector = cls(state['contamination'])
+        detector.median_ = np.asarray(state['median'], dtype=np.float64)
+        detector.scale_ = np.asarray(state['scale'], dtype=np.float64)
+        detector.threshold_ = state['threshold']
+        return detector
+
+class HistogramOutlierDetector:
+    """특성별 히스토그램 밀도 기반 이상치 판정 (HBOS)
+    
+    학습 범위를 n_bins개 균일 구간으로 나누고 구간별 점수(-log 확률, 범위 밖 구간 포함)를
+    미리 계산해 두므로 판정은 특성별 구간 검색과 표 조회의 합뿐이다.
+    """
+    
+    def __init__(self, contamination: float = 0.1, n_bins: int = 32):
+        self.contamination = contamination
+        self.n_bins = n_bins
+    
+    def fit(self, X) -> 'HistogramOutlierDetector':
+        X = np.asarray(X, dtype=np.float64)
+        self.edges_ = []
+        self.bin_scores_ = []
+        for column in X.T:
+            edges = np.linspace(column.min(), column.max(), self.n_bins + 1)
+            edges[-1] = np.nextafter(edges[-1], np.inf)  # 최댓값도 마지막 구간에 포함
+            counts = np.histogram(column, edges)[0]
+            # 양끝 범위 밖 구간(개수 0)을 포함해 라플라스 평활
+            counts = np.concatenate([[0], counts, [0]]) + 1.0
+            self.edges_.append(edges)
+            self.bin_scores_.append(-np.log(counts / counts.sum()))
+        self.threshold_ = np.quantile(self.score_samples(X), 1 - self.contamination)
+        return self
+    
+    def score_samples(self, X) -> np.ndarray:
+        X = np.asarray(X)
+        scores = np.zeros(len(X))
+        for j, (edges, bin_scores) in enumerate(zip(self.edges_, self.bin_scores_)):
+            scores += bin_scores[np.searchsorted(edges, X[:, j], side='right')]
+        return scores
+    
+    def predict(self, X) -> np.ndarray:
+        return np.where(self.score_samples(X) <= self.threshold_, 1, -1)
+    
+    def get_state(self) -> Dict:
+        """저장용 학습 파라미터 (특성별 구간 경계/점수를 (특성 수, 구간 수) 배열로)"""
+        return {'contamination': self.contamination, 'n_bins': self.n_bins, 'edges': np.stack(self.edges_),
+                'bin_scores': np.stack(self.bin_scores_), 'threshold': float(self.threshold_)}
+    
+    @classmethod
+    def from_state(cls, state: Dict) -> 'HistogramOutlierDetector':
+        detector = cls(state['contamination'], state['n_bins'])
+        detector.edges_ = list(np.asarray(state['edges'], dtype=np.float64))
+        detector.bin_scores_ = list(np.asarray(state['bin_scores'], dtype=np.float64))
+        detector.threshold_ = state['threshold']
+        return detector
+
+class ForestGridOutlierDetector:
+    """IsolationForest 판정 함수의 격자 근사
+    
+    학습 범위의 균일 격자 노드(grid_size^특성 수)에서 decision_function을 한 번 계산해 두고,
+    판정 시에는 삼선형 보간으로 조회한다. 트리 분할 임계값은 모두 학습 데이터 범위 안에 있어
+    범위 밖의 점은 경계로 잘라도 점수가 같다. 판정 기준(0 이상이면 정상)은 숲과 같다.
+    """
+    
+    def __init__(self, contamination: float = 0.1, grid_size: int = 32, random_state: int = 42):
+        self.contamination = contamination
+        self.grid_size = grid_size
+        self.random_state = random_state
+    
+    def fit(self, X) -> 'ForestGridOutlierDetector':
+        X = np.asarray(X, dtype=np.float64)
+        self.forest_ = IsolationForest(contamination=self.contamination, random_state=self.random_state,
+                                       n_jobs=-1).fit(X)
+        
+        low, high = X.min(axis=0), X.max(axis=0)
+        self.low_ = low
+        self.step_ = np.where(high > low, (high - low) / (self.grid_size - 1), 1.0)
+        axes = [low[j] + self.step_[j] * np.arange(self.grid_size) for j in range(X.shape[1])]
+        nodes = np.stack(np.meshgrid(*axes, indexing='ij'), axis=-1).reshape(-1, X.shape[1])
+        self.grid_ = self.forest_.decision_function(nodes)
+        self.strides_ = self.grid_size ** np.arange(X.shape[1])[::-1]
+        return self
+    
+    def decision_function(self, X) -> np.ndarray:
+        position = np.asarray(X, dtype=np.float64) - self.low_
+        position /= self.step_
+        np.clip(position, 0, self.grid_size - 1, out=position)
+        cell = np.minimum(position.astype(np.intp), self.grid_size - 2)
+        upper = position - cell
+        lower = 1.0 - upper
+        base = cell @ self.strides_
+        
+        # 셀 꼭짓점 2^d개의 가중합
+        scores = np.zeros(len(position))
+        for corner in itertools.product((0, 1), repeat=position.shape[1]):
+            weight = np.prod([upper[:, j] if bit else lower[:, j] for j, bit in enumerate(corner)], axis=0)
+            scores += weight * np.take(self.grid_, base + int(np.dot(corner, self.strides_)))
+        return scores
+    
+    def predict(self, X) -> np.ndarray:
+        return np.where(self.decision_function(X) >= 0, 1, -1)
+    
+    def get_state(self) -> Dict:
+        """저장용 학습 파라미터 (격자 판정값만 저장 - 숲은 판정에 쓰이지 않으므로 제외)"""
+        return {'contamination': self.contamination, 'grid_size': self.grid_size, 'random_state': self.random_state,
+                'low': self.low_, 'step': self.step_, 'grid': self.grid_}
+    
+    @classmethod
+    def from_state(cls, state: Dict) -> 'ForestGridOutlierDetector':
+        detector = cls(state['contamination'], state['grid_size'], state['random_state'])
+        detector.low_ = np.asarray(state['low'], dtype=np.float64)
+        detector.step_ = np.asarray(state['step'], dtype=np.float64)
+        detector.grid_ = np.asarray(state['grid'], dtype=np.float64)
+        detector.strides_ = detector.grid_size ** np.arange(len(detector.low_))[::-1]
+        detector.forest_ = None
+        return detector
+
+# 전처리 이상치 판정 엔진 (isolation_forest는 매 요청 전체 숲을 평가하는 기존 방식)
+OUTLIER_METHODS = ('forest_grid', 'isolation_forest', 'robust_z', 'histogram')
+
+def make_outlier_detector(method: str, contamination: float = 0.1):
+    """이름에 맞는 이상치 판정기 생성 (fit/predict 인터페이스는 IsolationForest와 동일)"""
+    _load_sklearn()
+    if method == 'forest_grid':
+        return ForestGridOutlierDetector(contamination)
+    if method == 'isolation_forest':
+        return IsolationForest(contamination=contamination, random_state=42, n_jobs=-1)
+    if method == 'robust_z':
+        return RobustZOutlierDetector(contamination)
+    if method == 'histogram':
+        return HistogramOutlierDetector(contamination)
+    raise ValueError(f"지원하지 않는 이상치 판정 방식입니다: {method} (가능: {', '.join(OUTLIER_METHODS)})")
+
+# 학습 파라미터를 저장/복원할 수 있는 판정기 (isolation_forest는 학습 데이터로 다시 학습)
+_OUTLIER_DETECTOR_CLASSES = {
+    'forest_grid': ForestGridOutlierDetector,
+    'robust_z': RobustZOutlierDetector,
+    'histogram': HistogramOutlierDetector
+}
+
 class HipotDataPreprocessor:
     """Hipot 테스터 데이터 전처리 클래스 - 성능 최적화 버전"""
     
-    def __init__(self):
+    BASE_COLUMNS = ['time', 'voltage', 'current', 'resistance']
+    NORM_COLUMNS = ['time_norm', 'voltage_norm', 'current_norm', 'resistance_norm']
+    DIFF_COLUMNS = ['voltage_diff', 'current_diff', 'resistance_diff']
+    MA_COLUMNS = ['voltage_ma', 'current_ma', 'resistance_ma']
+    
+    def __init__(self, n_workers: Optional[int] = None, parallel_threshold: int = 10000,
+                 chunk_size: int = 32768, outlier_method: str = 'forest_grid'):
         _load_sklearn()
         self.scaler = StandardScaler()
-        self.outlier_detector = IsolationForest(contamination=0.1, random_state=42, n_jobs=-1)
+        self.outlier_method = outlier_method
+        self.outlier_detector = make_outlier_detector(outlier_method)
         self.is_fitted = False
+        self._fit_data = None
         self._lock = threading.Lock()
         
+        # 대규모 데이터 병렬 처리 설정 (n_workers가 None이면 CPU 코어 수)
+        self.n_workers = n_workers if n_workers is not None else (os.cpu_count() or 1)
+        self.parallel_threshold = parallel_threshold
+        self.chunk_size = chunk_size
+        self._executor = None
+        
         # 캐시된 통계값들
         self._cached_stats = {}
+    
+    def __getstate__(self):
+        # 프로세스 풀로 전달할 때 락과 스레드 풀은 제외
+        state = self.__dict__.copy()
+        del state['_lock']
+        state['_executor'] = None
+        return state
+    
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+    
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """호출 간에 재사용하는 전처리 스레드 풀 (NumPy/트리 연산은 GIL을 해제함)"""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.n_workers,
+                                                    thread_name_prefix='hipot-preprocess')
+            return self._executor
         
     def fit(self, data: pd.DataFrame):
         """전처리 파라미터 학습"""
@@ -90,44 +483,193 @@ class HipotDataPreprocessor:
         clean_data = self._handle_missing_values(data)
         self.scaler.fit(clean_data[['time', 'voltage', 'current', 'resistance']])
         self.outlier_detector.fit(clean_data[['voltage', 'current', 'resistance']])
+        
+        # isolation_forest는 숲을 체크포인트에 담을 수 없어 같은 파라미터로 다시 학습할 학습 데이터를 (열 수×N)으로 보관
+        # (열별 연속 배치를 유지해야 스케일러 합산 순서까지 같아짐)
+        self._fit_data = None
+        if self.outlier_method not in _OUTLIER_DETECTOR_CLASSES:
+            self._fit_data = np.stack([clean_data[col].to_numpy(dtype=np.float64) for col in self.BASE_COLUMNS])
+        # 모든 파라미터가 준비된 뒤에 표시 (preprocess는 이 플래그만 보고 잠금 없이 진행)
         self.is_fitted = True
+    
+    def get_state(self) -> Dict:
+        """체크포인트용 상태 - 학습된 스케일러/판정기 파라미터 (isolation_forest는 재학습용 학습 데이터)"""
+        if not self.is_fitted:
+            return {}
+        if self._fit_data is not None:
+            return {'fit_data': self._fit_data}
+        return {
+            'scaler': {'mean': self.scaler.mean_, 'scale': self.scaler.scale_, 'var': self.scaler.var_,
+                       'n_samples_seen': int(self.scaler.n_samples_seen_)},
+            'outlier_method': self.outlier_method,
+            'outlier_detector': self.outlier_detector.get_state()
+        }
+    
+    def load_state(self, state: Dict):
+        """get_state 결과로 복원 (파라미터가 있으면 다시 학습하지 않음)"""
+        if 'scaler' in state:
+            scaler = StandardScaler()
+            scaler.mean_ = np.asarray(state['scaler']['mean'], dtype=np.float64)
+            scaler.scale_ = np.asarray(state['scaler']['scale'], dtype=np.float64)
+            scaler.var_ = np.asarray(state['scaler']['var'], dtype=np.float64)
+            scaler.n_samples_seen_ = state['scaler']['n_samples_seen']
+            scaler.n_features_in_ = len(self.BASE_COLUMNS)
+            scaler.feature_names_in_ = np.array(self.BASE_COLUMNS, dtype=object)
+            detector_class = _OUTLIER_DETECTOR_CLASSES[state['outlier_method']]
+            with self._lock:
+                self.scaler = scaler
+                self.outlier_method = state['outlier_method']
+                self.outlier_detector = detector_class.from_state(state['outlier_detector'])
+                self._fit_data = None
+                self.is_fitted = True
+            return
+        
+        fit_data = state.get('fit_data')
+        if fit_data is None:
+            self.is_fitted = False
+            self._fit_data = None
+            return
+        
+        # 이전 형식 체크포인트 또는 isolation_forest - 학습 데이터로 다시 학습
+        fit_data = np.asarray(fit_data)
+        with self._lock:
+            self.fit(pd.DataFrame({col: fit_data[i] for i, col in enumerate(self.BASE_COLUMNS)}))
         
     def preprocess(self, data: pd.DataFrame) -> pd.DataFrame:
         """데이터 전처리 수행 - 병렬화 및 최적화"""
-        with self._lock:
-            if not self.is_fitted:
-                self.fit(data)
+        # 학습된 뒤에는 읽기 전용이므로 잠금 없이 진행 (최초 호출만 잠금 안에서 학습)
+        if not self.is_fitted:
+            with self._lock:
+                if not self.is_fitted:
+                    self.fit(data)
+        
+        # 기본 4개 열이 아니면 단계별 경로 사용
+        if not self._can_fuse(data):
+            return self._preprocess_small_data(data)
         
         # 데이터 크기에 따라 처리 방식 결정
-        if len(data) > 10000:
+        if len(data) > self.parallel_threshold and self.n_workers > 1:
             return self._preprocess_large_data(data)
         else:
-            return self._preprocess_small_data(data)
+            return self._preprocess_fused(data)
+    
+    def _can_fuse(self, data: pd.DataFrame) -> bool:
+        return (len(data.columns) == len(self.BASE_COLUMNS)
+                and set(data.columns) == set(self.BASE_COLUMNS))
+    
+    def _preprocess_fused(self, data: pd.DataFrame) -> pd.DataFrame:
+        """융합 전처리 - 연속 배열에서 정규화/미분/이동평균을 한 번에 계산
+        
+        단계별 경로(_preprocess_small_data)와 같은 결과를 미리 할당한 (특성 수×N)
+        블록 하나에 채우고, 마지막에 그 블록을 복사 없이 감싸는 DataFrame만 만든다.
+        입력이 float32이면 float32로, 그 외에는 float64로 계산한다.
+        """
+        return self._run_fused(data, executor=None)
     
     def _preprocess_small_data(self, data: pd.DataFrame) -> pd.DataFrame:
         """소규모 데이터 전처리"""
-        processed_data = self._handle_missing_values(data.copy())
-        processed_data = self._remove_outliers(processed_data)
-        processed_data = self._normalize_data(processed_data)
-        processed_data = self._extract_temporal_features(processed_data)
-        return processed_data
-    
-    def _preprocess_large_data(self, data: pd.DataFrame) -> pd.DataFrame:
-        """대규모 데이터 병렬 전처리"""
-        with ThreadPoolExecutor(max_workers=4) as executor:
-            # 병렬로 처리할 작업들
-            missing_future = executor.submit(self._handle_missing_values, data.copy())
-            
-            # 결측값 처리 완료 후 후속 작업
-            processed_data = missing_future.result()
-            
-            # 나머지 작업들을 순차적으로 수행 (메모리 효율성을 위해)
+        with stage_metrics.span('preprocess.missing_values'):
+            processed_data = self._handle_missing_values(data.copy())
+        with stage_metrics.span('preprocess.outliers'):
             processed_data = self._remove_outliers(processed_data)
+        with stage_metrics.span('preprocess.features'):
             processed_data = self._normalize_data(processed_data)
             processed_data = self._extract_temporal_features(processed_data)
-            
         return processed_data
     
+    def _preprocess_large_data(self, data: pd.DataFrame) -> pd.DataFrame:
+        """대규모 데이터 병렬 전처리
+        
+        행 구간별로 이상치 판정과 특성 계산을 스레드 풀에 나눠 실행한다.
+        미분/이동평균은 이전 구간의 마지막 행(halo)을 읽어 계산하므로
+        결과는 _preprocess_fused와 비트 단위로 같다.
+        """
+        return self._run_fused(data, executor=self._get_executor())
+    
+    def _run_fused(self, data: pd.DataFrame, executor: Optional[ThreadPoolExecutor]) -> pd.DataFrame:
+        dtype = np.float32 if all(data[col].dtype == np.float32 for col in self.BASE_COLUMNS) else np.float64
+        values = [data[col].to_numpy(dtype=dtype) for col in self.BASE_COLUMNS]
+        
+        if any(np.isnan(column).any() for column in values):
+            with stage_metrics.span('preprocess.missing_values'):
+                data = self._handle_missing_values(data[self.BASE_COLUMNS].copy())
+                values = [data[col].to_numpy(dtype=dtype) for col in self.BASE_COLUMNS]
+        
+        def run_ranges(func, total: int) -> list:
+            # [0, total)을 구간으로 나눠 func(start, stop) 실행 (스레드 풀이 없으면 한 번에)
+            if executor is None:
+                return [func(0, total)]
+            return list(executor.map(lambda bounds: func(*bounds), self._split_ranges(total)))
+        
+        # 이상치 제거
+        with stage_metrics.span('preprocess.outliers'):
+            keep = np.concatenate(run_ranges(
+                lambda start, stop: self.outlier_detector.predict(
+                    np.column_stack([column[start:stop] for column in values[1:]])) == 1,
+                len(data)
+            ))
+        kept_positions = np.flatnonzero(keep)
+        n = len(kept_positions)
+        if n == 0:
+            raise ValueError("이상치 제거 후 남은 데이터가 없습니다.")
+        
+        window_size = min(5, n // 10)
+        columns = self.BASE_COLUMNS + self.NORM_COLUMNS + self.DIFF_COLUMNS
+        if window_size > 1:
+            columns = columns + self.MA_COLUMNS
+        
+        # 특성별로 연속된 행을 갖는 출력 블록 (pandas 내부 블록 배치와 동일)
+        out = np.empty((len(columns), n), dtype=dtype)
+        
+        # 원본 값을 모두 채운 뒤 특성 계산 (특성 구간은 이웃 구간의 원본 값을 읽음)
+        with stage_metrics.span('preprocess.features'):
+            run_ranges(lambda start, stop: self._fill_base(out, values, kept_positions, start, stop), n)
+            run_ranges(lambda start, stop: self._fill_features(out, window_size, start, stop), n)
+        
+        return pd.DataFrame(out.T, index=data.index[kept_positions], columns=columns, copy=False)
+    
+    def _split_ranges(self, total: int) -> List[Tuple[int, int]]:
+        """워커 수와 구간 크기에 맞춰 [0, total)을 분할"""
+        num_chunks = max(1, min(self.n_workers * 2, -(-total // self.chunk_size)))
+        bounds = np.linspace(0, total, num_chunks + 1).astype(int)
+        return [(int(start), int(stop)) for start, stop in zip(bounds[:-1], bounds[1:]) if stop > start]
+    
+    def _fill_base(self, out: np.ndarray, values: List[np.ndarray], kept_positions: np.ndarray,
+                   start: int, stop: int):
+        """출력 구간 [start, stop)에 이상치가 아닌 원본 값 채우기"""
+        positions = kept_positions[start:stop]
+        for i, column in enumerate(values):
+            np.take(column, positions, out=out[i, start:stop])
+    
+    def _fill_features(self, out: np.ndarray, window_size: int, start: int, stop: int):
+        """출력 구간 [start, stop)의 정규화/미분/이동평균 계산"""
+        base = out[0:4]
+        
+        # 정규화 (StandardScaler.transform과 같은 연산 순서)
+        norm = out[4:8, start:stop]
+        np.subtract(base[:, start:stop], self.scaler.mean_[:, np.newaxis], out=norm)
+        np.divide(norm, self.scaler.scale_[:, np.newaxis], out=norm)
+        
+        # 1차 미분 (첫 행은 0)
+        diff = out[8:11]
+        if start == 0:
+            diff[:, 0] = 0
+        first = max(start, 1)
+        np.subtract(base[1:, first:stop], base[1:, first - 1:stop - 1], out=diff[:, first:stop])
+        
+        # 이동평균 (창이 채워지기 전 행은 0)
+        if window_size > 1:
+            ma = out[11:14]
+            lag = window_size - 1
+            ma[:, start:min(stop, lag)] = 0
+            first = max(start, lag)
+            if first < stop:
+                filled = ma[:, first:stop]
+                filled[:] = base[1:, first - lag:stop - lag]
+                for offset in range(1, window_size):
+                    filled += base[1:, first - lag + offset:stop - lag + offset]
+                filled /= window_size
+    
     @lru_cache(maxsize=32)
     def _get_interpolation_method(self, data_size: int) -> str:
         """데이터 크기에 따른 최적 보간 방법 결정"""
@@ -172,77 +714,354 @@ class HipotDataPreprocessor:
         data = data.fillna(0)
         return data
 
-class HipotReferenceModel(nn.Module):
-    """Hipot 기준 모델 (LSTM + Autoencoder + Classifier)"""
-    
-    def __init__(self, input_dim=4, hidden_dim=128, num_layers=3, latent_dim=16):
-        super(HipotReferenceModel, self).__init__()
-        
-        self.input_dim = input_dim
-        self.hidden_dim = hidden_dim
-        self.num_layers = num_layers
-        self.latent_dim = latent_dim
-        
-        # LSTM for temporal patterns
-        self.lstm = nn.LSTM(input_dim, hidden_dim, num_layers, 
-                           batch_first=True, dropout=0.2)
-        
-        # Autoencoder for anomaly detection
-        self.encoder = nn.Sequential(
-            nn.Linear(hidden_dim, 64),
-            nn.ReLU(),
-            nn.BatchNorm1d(64),
-            nn.Linear(64, 32),
-            nn.ReLU(),
-            nn.BatchNorm1d(32),
-            nn.Linear(32, latent_dim)
-        )
-        
-        self.decoder = nn.Sequential(
-            nn.Linear(latent_dim, 32),
-            nn.ReLU(),
-            nn.BatchNorm1d(32),
-            nn.Linear(32, 64),
-            nn.ReLU(),
-            nn.BatchNorm1d(64),
-            nn.Linear(64, hidden_dim)
-        )
-        
-        # Classification head
-        self.classifier = nn.Sequential(
-            nn.Linear(latent_dim, 32),
-            nn.ReLU(),
-            nn.Dropout(0.3),
-            nn.Linear(32, 16),
-            nn.ReLU(),
-            nn.Dropout(0.3),
-            nn.Linear(16, 5)  # Valid, Error, OutOfRange, Critical, Dead
-        )
-        
-    def forward(self, x):
-        # LSTM forward pass
-        lstm_out, _ = self.lstm(x)
-        # 마지막 시퀀스의 출력 사용
-        lstm_last = lstm_out[:, -1, :]
-        
-        # Autoencoder forward pass
-        encoded = self.encoder(lstm_last)
-        decoded = self.decoder(encoded)
-        
-        # Classification forward pass
-        classified = self.classifier(encoded)
+_reference_model_class = None
+_reference_model_lock = threading.Lock()
+
+def _get_reference_model_class():
+    """HipotReferenceModel 클래스 반환 (torch를 처음 필요할 때 로드하고 클래스 정의)"""
+    global _reference_model_class
+    with _reference_model_lock:
+        if _reference_model_class is None:
+            _reference_model_class = _define_reference_model_class()
+        return _reference_model_class
+
+def _define_reference_model_class():
+    _load_torch()
+    
+    class HipotReferenceModel(nn.Module):
+        """Hipot 기준 모델 (LSTM + Autoencoder + Classifier)"""
         
-        return {
-            'encoded': encoded,
-            'decoded': decoded,
-            'classified': classified,
-            'lstm_output': lstm_last
+        def __init__(self, input_dim=4, hidden_dim=128, num_layers=3, latent_dim=16):
+            super(HipotReferenceModel, self).__init__()
+            
+            self.input_dim = input_dim
+            self.hidden_dim = hidden_dim
+            self.num_layers = num_layers
+            self.latent_dim = latent_dim
+            
+            # LSTM for temporal patterns
+            self.lstm = nn.LSTM(input_dim, hidden_dim, num_layers, 
+                               batch_first=True, dropout=0.2)
+            
+            # Autoencoder for anomaly detection
+            self.encoder = nn.Sequential(
+                nn.Linear(hidden_dim, 64),
+                nn.ReLU(),
+                nn.BatchNorm1d(64),
+                nn.Linear(64, 32),
+                nn.ReLU(),
+                nn.BatchNorm1d(32),
+                nn.Linear(32, latent_dim)
+            )
+            
+            self.decoder = nn.Sequential(
+                nn.Linear(latent_dim, 32),
+                nn.ReLU(),
+                nn.BatchNorm1d(32),
+                nn.Linear(32, 64),
+                nn.ReLU(),
+                nn.BatchNorm1d(64),
+                nn.Linear(64, hidden_dim)
+            )
+            
+            # Classification head
+            self.classifier = nn.Sequential(
+                nn.Linear(latent_dim, 32),
+                nn.ReLU(),
+                nn.Dropout(0.3),
+                nn.Linear(32, 16),
+                nn.ReLU(),
+                nn.Dropout(0.3),
+                nn.Linear(16, 5)  # Valid, Error, OutOfRange, Critical, Dead
+            )
+            
+        def forward(self, x):
+            # LSTM forward pass
+            lstm_out, _ = self.lstm(x)
+            # 마지막 시퀀스의 출력 사용
+            lstm_last = lstm_out[:, -1, :]
+            
+            # Autoencoder forward pass
+            encoded = self.encoder(lstm_last)
+            decoded = self.decoder(encoded)
+            
+            # Classification forward pass
+            classified = self.classifier(encoded)
+            
+            return {
+                'encoded': encoded,
+                'decoded': decoded,
+                'classified': classified,
+                'lstm_output': lstm_last
+            }
+    
+    # 모듈 수준 이름으로 pickle 되도록 설정 (__getattr__로 조회됨)
+    HipotReferenceModel.__module__ = __name__
+    HipotReferenceModel.__qualname__ = 'HipotReferenceModel'
+    return HipotReferenceModel
+
+def __getattr__(name):
+    # from hipot_ai_analyzer import HipotReferenceModel 호환 (접근 시점에 torch 로드)
+    if name == 'HipotReferenceModel':
+        return _get_reference_model_class()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def _model_features(processed_data: pd.DataFrame) -> np.ndarray:
+    """모델 입력 특성 (정규화 열이 있으면 정규화 열, 없으면 원본 열) float32 배열"""
+    columns = HipotWindowInference.FEATURE_COLUMNS
+    if not all(col in processed_data.columns for col in columns):
+        columns = ['time', 'voltage', 'current', 'resistance']
+    return processed_data[columns].to_numpy(dtype=np.float32)
+
+def _sliding_windows(features: np.ndarray, window_size: int, stride: int) -> np.ndarray:
+    """(창 수, 창 길이, 특성 수) 슬라이딩 윈도우 뷰 (복사 없음, 창 길이보다 짧으면 마지막 값으로 패딩)"""
+    if len(features) < window_size:
+        padding = np.repeat(features[-1:], window_size - len(features), axis=0)
+        features = np.concatenate([features, padding])
+    
+    windows = np.lib.stride_tricks.sliding_window_view(features, window_size, axis=0)
+    return windows[::stride].transpose(0, 2, 1)
+
+class HipotWindowInference:
+    """슬라이딩 윈도우 배치 추론 - 기준 모델의 창별 재구성 오차와 분류 확률 계산
+    
+    max_windows를 주면 긴 세션은 창 간격을 정수배로 늘려 창 수를 그 이하로 제한한다.
+    """
+    
+    FEATURE_COLUMNS = ['time_norm', 'voltage_norm', 'current_norm', 'resistance_norm']
+    
+    def __init__(self, model: 'HipotReferenceModel', device, window_size: int = 100, stride: int = 50,
+                 batch_size: int = 128, reconstruction_threshold: float = 0.1,
+                 max_windows: Optional[int] = None):
+        self.model = model
+        self.device = device
+        self.window_size = window_size
+        self.stride = stride
+        self.batch_size = batch_size
+        self.reconstruction_threshold = reconstruction_threshold
+        self.max_windows = max_windows
+    
+    def make_windows(self, processed_data: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+        """(창 수, 창 길이, 특성 수) 윈도우 뷰와 창 시작 위치 반환 (복사 없음)
+        
+        데이터가 창 길이보다 짧으면 훈련 데이터셋과 같이 마지막 값으로 패딩한다.
+        """
+        features = _model_features(processed_data)
+        windows = _sliding_windows(features, self.window_size, self.stride)
+        starts = np.arange(len(windows)) * self.stride
+        if self.max_windows and len(windows) > self.max_windows:
+            step = -(-len(windows) // self.max_windows)
+            windows, starts = windows[::step], starts[::step]
+        return windows, starts
+    
+    def run(self, processed_data: pd.DataFrame, include_windows: bool = False) -> Dict:
+        """세션 요약(평균/최대 재구성 오차, 이상 창 수, 예측 분포) 계산
+        
+        include_windows가 True이면 창별 시작 위치/재구성 오차/분류 확률 목록도 반환한다.
+        """
+        if len(processed_data) == 0:
+            raise ValueError("추론할 데이터가 없습니다.")
+        
+        windows, starts = self.make_windows(processed_data)
+        errors = np.empty(len(windows), dtype=np.float32)
+        probabilities = np.empty((len(windows), len(AccuracyDefectCalculator.CLASSIFICATION_CODES)),
+                                 dtype=np.float32)
+        
+        if self.model.training:
+            self.model.eval()
+        
+        with torch.inference_mode():
+            for start in range(0, len(windows), self.batch_size):
+                stop = min(start + self.batch_size, len(windows))
+                batch = torch.from_numpy(np.ascontiguousarray(windows[start:stop])).to(self.device)
+                outputs = self.model(batch)
+                
+                errors[start:stop] = ((outputs['decoded'] - outputs['lstm_output']) ** 2).mean(dim=1).cpu().numpy()
+                probabilities[start:stop] = torch.softmax(outputs['classified'], dim=1).cpu().numpy()
+        
+        predicted = np.bincount(probabilities.argmax(axis=1), minlength=probabilities.shape[1])
+        anomalous = errors > self.reconstruction_threshold
+        
+        result = {
+            'window_size': self.window_size,
+            'stride': int(starts[1] - starts[0]) if len(starts) > 1 else self.stride,
+            'num_windows': len(windows),
+            'mean_reconstruction_error': float(errors.mean()),
+            'max_reconstruction_error': float(errors.max()),
+            'anomalous_windows': int(anomalous.sum()),
+            'predicted_classes': {
+                code.name.lower(): int(count)
+                for code, count in zip(AccuracyDefectCalculator.CLASSIFICATION_CODES, predicted)
+            }
         }
+        if include_windows:
+            result.update(window_starts=starts.tolist(), reconstruction_error=errors.tolist(),
+                          class_probabilities=probabilities.tolist())
+        return result
+
+class HipotWindowDataset:
+    """훈련용 슬라이딩 윈도우 데이터셋
+    
+    세션마다 strided 윈도우 뷰만 보관하고(창을 미리 복사하지 않음), 인덱스 목록을 받으면
+    해당 창들만 모아 (배치, 창 길이, 특성 수) 텐서 하나로 반환한다. 오토인코더의 입력이 곧
+    재구성 목표이므로 목표 텐서는 따로 만들지 않는다.
+    """
+    
+    def __init__(self, sequences: List[np.ndarray], window_size: int = 100, stride: int = 50):
+        self.window_size = window_size
+        self.stride = stride
+        self.sessions = [_sliding_windows(np.asarray(seq, dtype=np.float32), window_size, stride)
+                         for seq in sequences]
+        self._offsets = np.cumsum([0] + [len(windows) for windows in self.sessions])
+    
+    def __len__(self) -> int:
+        return int(self._offsets[-1])
+    
+    def __getitem__(self, index) -> 'torch.Tensor':
+        if np.isscalar(index):
+            return self[[index]][0]
+        
+        indices = np.asarray(index, dtype=np.intp)
+        if len(indices) and (indices.min() < 0 or indices.max() >= len(self)):
+            raise IndexError(f"창 인덱스 범위를 벗어났습니다 (창 {len(self)}개)")
+        sessions = np.searchsorted(self._offsets, indices, side='right') - 1
+        
+        batch = np.empty((len(indices), self.window_size, self.sessions[0].shape[2]), dtype=np.float32)
+        for session in np.unique(sessions):
+            mask = sessions == session
+            batch[mask] = self.sessions[session][indices[mask] - self._offsets[session]]
+        return torch.from_numpy(batch)
+
+class PatternSimilarityEngine:
+    """시간 정렬을 고려한 기준 패턴 유사도
+    
+    테스트/기준 파형을 세션 진행률(0~1)의 공통 격자로 리샘플링하고 채널별로 표준화한 뒤,
+    FFT 교차상관으로 ±max_lag(격자 길이 대비 비율) 안에서 상관이 가장 큰 시간 지연을 찾는다.
+    점수는 그 지연에서 겹치는 구간의 정규화 상관(채널 합)이므로 저항처럼 큰 값의 채널이 점수를 지배하지 않는다.
+    기준 쪽 격자 스펙트럼과 누적 에너지는 생성 시 한 번만 계산하므로 요청마다 테스트 쪽만 변환한다.
+    """
+    
+    def __init__(self, reference_features: np.ndarray, grid_size: int = 2048, max_lag: float = 0.25):
+        reference = np.asarray(reference_features, dtype=np.float64)
+        if reference.ndim != 2 or len(reference) < 2:
+            raise ValueError("기준 패턴은 측정값이 2개 이상인 (N, 채널 수) 배열이어야 합니다.")
+        if not 0 <= max_lag < 1:
+            raise ValueError(f"max_lag는 0 이상 1 미만이어야 합니다: {max_lag}")
+        
+        self.num_channels = reference.shape[1]
+        self.grid_size = max(2, min(int(grid_size), len(reference)))
+        self.max_lag = int(max_lag * self.grid_size)
+        # 선형 교차상관이 순환 겹침 없이 ±max_lag 지연을 담는 FFT 길이
+        self.fft_size = 1 << (self.grid_size + self.max_lag - 1).bit_length()
+        self._lags = np.arange(-self.max_lag, self.max_lag + 1)
+        
+        grid = self._standardize(self._resample(self._progress(len(reference)), reference))
+        self._reference_spectrum = np.conj(np.fft.rfft(grid, self.fft_size, axis=0))
+        self._reference_overlap = self._overlap_energy(grid, reference_side=True)
+    
+    def match(self, values: np.ndarray, time: Optional[np.ndarray] = None) -> Dict:
+        """(N, 채널 수) 테스트 측정값의 최적 정렬 유사도
+        
+        {'similarity': 0~1, 'lag': 격자 길이 대비 지연 비율} - lag > 0이면 테스트가 기준보다 늦게 진행됨.
+        time이 단조 증가하면 측정 시각, 아니면 측정 순서로 진행률을 계산한다.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        if values.ndim != 2 or values.shape[1] != self.num_channels:
+            raise ValueError(f"테스트 측정값은 (N, {self.num_channels}) 배열이어야 합니다.")
+        if len(values) == 0:
+            return {'similarity': 0.0, 'lag': 0.0}
+        
+        grid = self._standardize(self._resample(self._progress(len(values), time), values))
+        spectrum = np.fft.rfft(grid, self.fft_size, axis=0)
+        # 채널 합을 주파수 영역에서 더해 역변환은 한 번만 수행
+        correlation = np.fft.irfft((spectrum * self._reference_spectrum).sum(axis=1), self.fft_size)
+        correlation = correlation[self._lags % self.fft_size]
+        
+        with np.errstate(invalid='ignore', divide='ignore'):
+            scores = correlation / np.sqrt(self._overlap_energy(grid, reference_side=False) * self._reference_overlap)
+        scores[~np.isfinite(scores)] = 0.0
+        
+        best = int(np.argmax(scores))
+        if scores[best] <= 0:
+            # 양의 상관이 있는 정렬이 없으면 지연은 의미가 없음
+            return {'similarity': 0.0, 'lag': 0.0}
+        return {'similarity': float(min(scores[best], 1.0)),
+                'lag': float(self._lags[best] / self.grid_size)}
+    
+    @staticmethod
+    def _progress(n: int, time: Optional[np.ndarray] = None) -> np.ndarray:
+        """측정 시점을 세션 진행률(0~1)로 변환 (시각이 단조 증가하지 않으면 측정 순서 기준)"""
+        if time is not None and n > 1:
+            time = np.asarray(time, dtype=np.float64)
+            span = time[-1] - time[0]
+            if span > 0 and np.all(np.diff(time) >= 0):
+                return (time - time[0]) / span
+        return np.linspace(0.0, 1.0, n) if n > 1 else np.zeros(n)
+    
+    def _resample(self, progress: np.ndarray, values: np.ndarray) -> np.ndarray:
+        """격자 칸 중심으로 리샘플링 - 칸당 평균 2개 이상이면 칸 평균(잡음/앨리어싱 감소), 아니면 선형 보간"""
+        size = self.grid_size
+        centers = (np.arange(size) + 0.5) / size
+        out = np.empty((size, values.shape[1]))
+        finite = np.isfinite(values)
+        
+        if len(values) >= 2 * size and finite.all():
+            starts = np.searchsorted(progress, np.arange(size) / size)
+            counts = np.diff(np.append(starts, len(values)))
+            sums = np.add.reduceat(values, np.minimum(starts, len(values) - 1), axis=0)
+            filled = counts > 0
+            out[filled] = sums[filled] / counts[filled, None]
+            if not filled.all():
+                # 측정 공백으로 빈 칸만 보간
+                for channel in range(values.shape[1]):
+                    out[~filled, channel] = np.interp(centers[~filled], progress, values[:, channel])
+            return out
+        
+        for channel in range(values.shape[1]):
+            valid = finite[:, channel]
+            out[:, channel] = np.interp(centers, progress[valid], values[valid, channel]) if valid.any() else 0.0
+        return out
+    
+    @staticmethod
+    def _standardize(grid: np.ndarray) -> np.ndarray:
+        """채널별 평균 0, 표준편차 1 (값이 일정한 채널은 0)"""
+        centered = grid - grid.mean(axis=0)
+        scale = centered.std(axis=0)
+        # 일정한 채널의 반올림 잔차가 잡음으로 증폭되지 않도록 상대 기준으로 판정
+        constant = scale <= 1e-12 * np.abs(grid).max(axis=0)
+        return np.divide(centered, scale, out=np.zeros_like(centered), where=~constant)
+    
+    def _overlap_energy(self, grid: np.ndarray, reference_side: bool) -> np.ndarray:
+        """지연별로 겹치는 구간의 에너지 (지연 m ≥ 0: 테스트[m:]와 기준[:G-m], m < 0: 테스트[:G+m]와 기준[-m:])"""
+        size = self.grid_size
+        energy = np.concatenate(([0.0], np.cumsum((grid ** 2).sum(axis=1))))
+        ahead = np.maximum(self._lags, 0)
+        behind = np.maximum(-self._lags, 0)
+        if reference_side:
+            return energy[size - ahead] - energy[behind]
+        return energy[size - behind] - energy[ahead]
 
 class AccuracyDefectCalculator:
     """정확도 및 불합률 계산 클래스"""
     
-    def __init__(self, reference_model: HipotReferenceModel):
+    # 분류 코드 순서 (분류 헤드 출력 순서와 동일: Valid, Error, OutOfRange, Critical, Dead)
+    CLASSIFICATION_CODES = (
+        DataClassification.VALID,
+        DataClassification.ERROR,
+        DataClassification.OUT_OF_RANGE,
+        DataClassification.CRITICAL,
+        DataClassification.DEAD
+    )
+    
+    # 불합률 항목 키와 분류 코드 매핑
+    DEFECT_KEYS = (
+        ('error', 1),
+        ('out_of_range', 2),
+        ('critical', 3),
+        ('dead', 4)
+    )
+    
+    def __init__(self, reference_model: Optional['HipotReferenceModel'], similarity_config: Optional[Dict] = None):
         self.reference_model = reference_model
         self.threshold_config = {
             'reconstruction_threshold': 0.1,
@@ -250,26 +1069,42 @@ class AccuracyDefectCalculator:
             'temporal_deviation': 0.05,
             'pattern_similarity_threshold': 0.7
         }
+        # PatternSimilarityEngine 설정 (grid_size, max_lag)
+        self.similarity_config = dict(similarity_config or {})
         self.reference_patterns = None
+        # (기준 패턴, 유사도 엔진) - 기준 패턴이 바뀌면 다시 생성
+        self._similarity_engine = (None, None)
         
     def set_reference_patterns(self, reference_data: Dict):
         """기준 패턴 설정"""
         self.reference_patterns = reference_data
-        
-    def calculate_accuracy(self, test_data: pd.DataFrame) -> Dict:
-        """테스트 데이터의 정확도 계산"""
+    
+    def similarity_engine(self) -> PatternSimilarityEngine:
+        """현재 기준 패턴의 유사도 엔진 (기준 스펙트럼은 기준 패턴마다 한 번만 계산)"""
+        patterns, engine = self._similarity_engine
+        if patterns is not self.reference_patterns or engine is None:
+            patterns = self.reference_patterns
+            engine = PatternSimilarityEngine(patterns['features'], **self.similarity_config)
+            self._similarity_engine = (patterns, engine)
+        return engine
+        
+    def calculate_accuracy(self, test_data: pd.DataFrame, stats: Optional['SessionStatistics'] = None) -> Dict:
+        """테스트 데이터의 정확도 계산 (stats를 주면 이미 계산된 세션 통계를 재사용)"""
         
         if self.reference_patterns is None:
             raise ValueError("기준 패턴이 설정되지 않았습니다.")
+        if stats is None:
+            stats = SessionStatistics(test_data)
         
-        # 1. 패턴 유사도 계산
-        pattern_similarity = self._calculate_pattern_similarity(test_data)
+        # 1. 패턴 유사도 계산 (시간 정렬 포함)
+        pattern_match = self._match_pattern(test_data, stats)
+        pattern_similarity = pattern_match['similarity']
         
         # 2. 통계적 일치도 계산
-        statistical_match = self._calculate_statistical_match(test_data)
+        statistical_match = self._calculate_statistical_match(test_data, stats)
         
         # 3. 시간적 일관성 평가
-        temporal_consistency = self._evaluate_temporal_consistency(test_data)
+        temporal_consistency = self._evaluate_temporal_consistency(test_data, stats)
         
         # 4. 종합 정확도 점수
         overall_accuracy = self._weighted_average([
@@ -281,6 +1116,7 @@ class AccuracyDefectCalculator:
         return {
             'overall_accuracy': overall_accuracy,
             'pattern_similarity': pattern_similarity,
+            'pattern_lag': pattern_match['lag'],
             'statistical_match': statistical_match,
             'temporal_consistency': temporal_consistency
         }
@@ -302,7 +1138,6 @@ class AccuracyDefectCalculator:
             classification = self._classify_test_result(result)
             classifications.append(classification)
         
-        total_tests = len(test_results)
         defect_counts = {
             'error': sum(1 for c in classifications if c == DataClassification.ERROR),
             'out_of_range': sum(1 for c in classifications if c == DataClassification.OUT_OF_RANGE),
@@ -310,6 +1145,54 @@ class AccuracyDefectCalculator:
             'dead': sum(1 for c in classifications if c == DataClassification.DEAD)
         }
         
+        return self._build_defect_metrics(defect_counts, len(test_results))
+    
+    def calculate_defect_rate_columnar(self, voltage: np.ndarray, current: np.ndarray,
+                                       resistance: np.ndarray) -> Dict:
+        """열 배열 기반 불합률 계산 (벡터화 버전)
+        
+        calculate_defect_rate와 동일한 결과를 반환하며, 행 단위 dict 변환 없이
+        분류 코드를 한 번의 bincount로 집계한다.
+        """
+        codes = self.classify_measurements(voltage, current, resistance)
+        
+        if len(codes) == 0:
+            return {
+                'overall_defect_rate': 0.0,
+                'defect_breakdown': {},
+                'total_tests': 0,
+                'pass_rate': 0.0
+            }
+        
+        counts = np.bincount(codes, minlength=len(self.CLASSIFICATION_CODES))
+        defect_counts = {key: int(counts[code]) for key, code in self.DEFECT_KEYS}
+        
+        return self._build_defect_metrics(defect_counts, len(codes))
+    
+    def classify_measurements(self, voltage: np.ndarray, current: np.ndarray,
+                              resistance: np.ndarray) -> np.ndarray:
+        """측정값 배열 일괄 분류 - 분류 코드(CLASSIFICATION_CODES 인덱스) 배열 반환
+        
+        _classify_test_result와 같은 규칙을 우선순위(DEAD → CRITICAL →
+        OUT_OF_RANGE → ERROR) 순서의 마스크로 적용한다.
+        """
+        # float32 입력도 스칼라 규칙과 같은 정밀도로 비교하도록 float64로 변환
+        voltage = np.asarray(voltage, dtype=np.float64)
+        current = np.asarray(current, dtype=np.float64)
+        resistance = np.asarray(resistance, dtype=np.float64)
+        
+        conditions = [
+            (voltage == 0) & (current == 0),                          # Dead
+            current > 0.01,                                           # Critical (10mA 초과)
+            (resistance < 1e3) | (resistance > 1e12),                 # Out of Range
+            (voltage < 0) | (current < 0) | (resistance < 0)          # Error
+        ]
+        choices = [4, 3, 2, 1]
+        
+        return np.select(conditions, choices, default=0).astype(np.intp)
+    
+    def _build_defect_metrics(self, defect_counts: Dict[str, int], total_tests: int) -> Dict:
+        """분류별 개수로부터 불합률 결과 생성"""
         defect_rates = {
             defect_type: count / total_tests * 100
             for defect_type, count in defect_counts.items()
@@ -324,70 +1207,66 @@ class AccuracyDefectCalculator:
             'pass_rate': (total_tests - sum(defect_counts.values())) / total_tests * 100
         }
     
-    def _calculate_pattern_similarity(self, test_data: pd.DataFrame) -> float:
+    def _calculate_pattern_similarity(self, test_data: pd.DataFrame,
+                                      stats: Optional['SessionStatistics'] = None) -> float:
         """패턴 유사도 계산"""
+        return self._match_pattern(test_data, stats)['similarity']
+    
+    def _match_pattern(self, test_data: pd.DataFrame, stats: Optional['SessionStatistics'] = None) -> Dict:
+        """기준 패턴과의 최적 정렬 유사도와 지연 (PatternSimilarityEngine.match)"""
         try:
-            # 기준 패턴과의 코사인 유사도 계산
-            test_features = test_data[['voltage', 'current', 'resistance']].values
-            ref_features = self.reference_patterns['features']
-            
-            # 길이 맞추기 (짧은 쪽에 맞춤)
-            min_len = min(len(test_features), len(ref_features))
-            test_features = test_features[:min_len]
-            ref_features = ref_features[:min_len]
-            
-            # 코사인 유사도 계산
-            test_norm = np.linalg.norm(test_features)
-            ref_norm = np.linalg.norm(ref_features)
-            
-            if test_norm == 0 or ref_norm == 0:
-                return 0.0
-                
-            similarity = np.dot(test_features.flatten(), ref_features.flatten()) / (test_norm * ref_norm)
-            return max(0.0, min(1.0, similarity))
+            test_features = (stats or SessionStatistics(test_data)).values
+            time_values = test_data['time'].to_numpy() if 'time' in test_data.columns else None
+            return self.similarity_engine().match(test_features, time_values)
             
         except Exception:
-            return 0.5  # 기본값
+            return {'similarity': 0.5, 'lag': 0.0}  # 기본값
     
-    def _calculate_statistical_match(self, test_data: pd.DataFrame) -> float:
+    def _calculate_statistical_match(self, test_data: pd.DataFrame,
+                                     stats: Optional['SessionStatistics'] = None) -> float:
         """통계적 일치도 계산"""
         try:
-            test_stats = {
-                'voltage_mean': test_data['voltage'].mean(),
-                'voltage_std': test_data['voltage'].std(),
-                'current_mean': test_data['current'].mean(),
-                'current_std': test_data['current'].std(),
-                'resistance_mean': test_data['resistance'].mean(),
-                'resistance_std': test_data['resistance'].std()
-            }
+            moments = (stats or SessionStatistics(test_data)).moments()
+            test_stats = {}
+            for i, param in enumerate(SessionStatistics.CHANNELS):
+                test_stats[f'{param}_mean'] = moments['mean'][i]
+                test_stats[f'{param}_std'] = moments['std'][i]
             
-            ref_stats = self.reference_patterns['statistics']
-            
-            # 각 통계량의 상대적 차이 계산
-            matches = []
-            for key in test_stats:
-                if key in ref_stats and ref_stats[key] != 0:
-                    diff = abs(test_stats[key] - ref_stats[key]) / abs(ref_stats[key])
-                    match = max(0.0, 1.0 - diff)
-                    matches.append(match)
-            
-            return np.mean(matches) if matches else 0.5
+            return self._compare_statistics(test_stats)
             
         except Exception:
             return 0.5
     
-    def _evaluate_temporal_consistency(self, test_data: pd.DataFrame) -> float:
+    def _compare_statistics(self, test_stats: Dict[str, float]) -> float:
+        """테스트 통계량과 기준 통계량의 일치도 계산"""
+        ref_stats = self.reference_patterns['statistics']
+        
+        # 각 통계량의 상대적 차이 계산
+        matches = []
+        for key in test_stats:
+            if key in ref_stats and ref_stats[key] != 0:
+                diff = abs(test_stats[key] - ref_stats[key]) / abs(ref_stats[key])
+                match = max(0.0, 1.0 - diff)
+                matches.append(match)
+        
+        return np.mean(matches) if matches else 0.5
+    
+    def _evaluate_temporal_consistency(self, test_data: pd.DataFrame,
+                                       stats: Optional['SessionStatistics'] = None) -> float:
         """시간적 일관성 평가"""
         try:
-            # 시간적 변화율의 일관성 확인
-            voltage_diff = test_data['voltage'].diff().dropna()
-            current_diff = test_data['current'].diff().dropna()
-            
-            # 급격한 변화의 비율 계산
-            voltage_stability = 1.0 - (voltage_diff.abs() > voltage_diff.std() * 3).mean()
-            current_stability = 1.0 - (current_diff.abs() > current_diff.std() * 3).mean()
+            # 시간적 변화율(voltage/current 미분)의 일관성 확인 - NaN인 변화량은 제외
+            diffs = (stats or SessionStatistics(test_data)).diffs()
+            valid = ~np.isnan(diffs)
+            counts = valid.sum(axis=0)
+            with warnings.catch_warnings(), np.errstate(invalid='ignore', divide='ignore'):
+                warnings.simplefilter('ignore', RuntimeWarning)
+                std = np.std(diffs, axis=0, ddof=1) if counts.min() == len(diffs) else np.nanstd(diffs, axis=0, ddof=1)
+                
+                # 급격한 변화의 비율 계산
+                stability = 1.0 - (np.abs(diffs) > std * 3).sum(axis=0) / counts
             
-            return (voltage_stability + current_stability) / 2
+            return float(stability.mean())
             
         except Exception:
             return 0.5
@@ -425,11 +1304,574 @@ class AccuracyDefectCalculator:
         total_weight = sum(weight for _, weight in values_weights)
         return total_value / total_weight if total_weight > 0 else 0.0
 
+# 기준 통계/템플릿을 유지하는 측정 채널
+REFERENCE_PARAMETERS = ('voltage', 'current', 'resistance')
+# 체크포인트 밖의 .npy 파일로 분리 저장되는 기준 배열
+REFERENCE_ARRAY_KEYS = ('features', 'voltage_ref', 'current_ref', 'resistance_ref')
+
+class RunningStatistics:
+    """병합 가능한 온라인 통계 (Welford/Chan 병렬 병합 방식)
+    
+    채널별 개수, 평균, 편차제곱합(M2)만 유지하므로 청크 단위 갱신과
+    다른 통계 객체와의 병합이 모두 O(채널 수)로 수행된다.
+    """
+    
+    def __init__(self, num_channels: int):
+        self.count = 0
+        self.mean = np.zeros(num_channels, dtype=np.float64)
+        self.m2 = np.zeros(num_channels, dtype=np.float64)
+    
+    def update(self, values: np.ndarray):
+        """(샘플 수, 채널 수) 배열로 통계 갱신"""
+        values = np.asarray(values, dtype=np.float64)
+        if len(values) == 0:
+            return
+        
+        chunk_mean = values.mean(axis=0)
+        chunk_m2 = ((values - chunk_mean) ** 2).sum(axis=0)
+        self._merge(len(values), chunk_mean, chunk_m2)
+    
+    def merge(self, other: 'RunningStatistics'):
+        """다른 통계 객체 병합"""
+        self._merge(other.count, other.mean, other.m2)
+    
+    def _merge(self, count: int, mean: np.ndarray, m2: np.ndarray):
+        if count == 0:
+            return
+        
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean = self.mean + delta * (count / total)
+        self.m2 = self.m2 + m2 + delta ** 2 * (self.count * count / total)
+        self.count = total
+    
+    def std(self, ddof: int = 1) -> np.ndarray:
+        """표준편차 (기본값은 pandas와 같은 표본 표준편차)"""
+        if self.count - ddof <= 0:
+            return np.full_like(self.mean, np.nan)
+        return np.sqrt(self.m2 / (self.count - ddof))
+    
+    def get_state(self) -> Dict:
+        """저장용 상태 (기본 타입과 배열만 포함)"""
+        return {'count': self.count, 'mean': self.mean.copy(), 'm2': self.m2.copy()}
+    
+    @classmethod
+    def from_state(cls, state: Dict) -> 'RunningStatistics':
+        statistics = cls(len(state['mean']))
+        statistics.count = int(state['count'])
+        statistics.mean = np.array(state['mean'], dtype=np.float64)
+        statistics.m2 = np.array(state['m2'], dtype=np.float64)
+        return statistics
+
+class SessionStatistics:
+    """세션 하나의 통계 컨텍스트 - 정확도/리포트/그래프/히트맵 단계가 공유
+    
+    측정 채널을 (N, 채널 수) float64 배열로 한 번만 꺼내고, 각 통계는 처음 요청될 때
+    모든 채널에 대해 한 번에 계산해 보관한다 (평균/표준편차/상관계수는 중심화 배열의 XᵀX 한 번).
+    NaN이 있으면 pandas와 같이 NaN을 제외하고 계산한다.
+    값은 입력으로 결정되므로 렌더링 스레드와 잠금 없이 공유한다 (동시에 처음 요청되면 중복 계산만 됨).
+    입력 DataFrame은 분석 중에 수정하지 않는다고 가정한다.
+    """
+    
+    CHANNELS = REFERENCE_PARAMETERS
+    DIFF_COLUMNS = ('voltage_diff', 'current_diff')
+    
+    def __init__(self, data: pd.DataFrame):
+        self.data = data
+        self._cache = {}
+    
+    def _cached(self, key, compute):
+        if key not in self._cache:
+            self._cache[key] = compute()
+        return self._cache[key]
+    
+    @property
+    def has_channels(self) -> bool:
+        return all(channel in self.data.columns for channel in self.CHANNELS)
+    
+    @property
+    def values(self) -> np.ndarray:
+        """(N, 채널 수) 측정값"""
+        return self._cached('values', lambda: self.data[list(self.CHANNELS)].to_numpy(dtype=np.float64))
+    
+    @property
+    def complete(self) -> bool:
+        """측정값에 NaN이 없는지 여부"""
+        return self._cached('complete', lambda: not np.isnan(self.values).any())
+    
+    def moments(self) -> Dict[str, np.ndarray]:
+        """채널별 평균, 표준편차(ddof=1), 상관계수 행렬 (2개 미만이면 상관계수는 None)"""
+        return self._cached('moments', self._compute_moments)
+    
+    def _compute_moments(self) -> Dict[str, np.ndarray]:
+        n = len(self.values)
+        if not self.complete:
+            frame = self.data[list(self.CHANNELS)]
+            return {'mean': frame.mean().to_numpy(), 'std': frame.std().to_numpy(),
+                    'correlation': frame.corr().to_numpy() if n > 1 else None}
+        
+        mean = self.values.mean(axis=0)
+        centered = self.values - mean
+        # 대각은 편차제곱합, 나머지는 공분산 (np.corrcoef와 같은 정규화/클리핑)
+        scatter = centered.T @ centered
+        scale = np.sqrt(np.diag(scatter))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            std = scale / np.sqrt(n - 1) if n > 1 else np.full(len(self.CHANNELS), np.nan)
+            correlation = np.clip(scatter / scale[:, None] / scale[None, :], -1, 1) if n > 1 else None
+        return {'mean': mean, 'std': std, 'correlation': correlation}
+    
+    def extrema(self) -> Tuple[np.ndarray, np.ndarray]:
+        """채널별 (최소, 최대)"""
+        return self._cached('extrema', self._compute_extrema)
+    
+    def _compute_extrema(self) -> Tuple[np.ndarray, np.ndarray]:
+        if len(self.values) == 0:
+            empty = np.full(len(self.CHANNELS), np.nan)
+            return empty, empty
+        if self.complete:
+            return self.values.min(axis=0), self.values.max(axis=0)
+        with warnings.catch_warnings():
+            # 값이 모두 NaN인 채널은 pandas와 같이 NaN
+            warnings.simplefilter('ignore', RuntimeWarning)
+            return np.nanmin(self.values, axis=0), np.nanmax(self.values, axis=0)
+    
+    @property
+    def duration(self) -> float:
+        """time 열의 최대 - 최소 (time 열이 없으면 0)"""
+        def compute():
+            if 'time' not in self.data.columns:
+                return 0
+            time_values = self.data['time']
+            return time_values.max() - time_values.min()
+        return self._cached('duration', compute)
+    
+    def diffs(self) -> np.ndarray:
+        """voltage/current 1차 미분 (N-1, 2) - 전처리기가 만든 *_diff 열이 있으면 그대로 사용"""
+        def compute():
+            if all(column in self.data.columns for column in self.DIFF_COLUMNS):
+                # 전처리된 미분 열의 첫 행은 0으로 채워진 값
+                return self.data[list(self.DIFF_COLUMNS)].to_numpy(dtype=np.float64)[1:]
+            return np.diff(self.values[:, :len(self.DIFF_COLUMNS)], axis=0)
+        return self._cached('diffs', compute)
+    
+    def histogram(self, channel: str, bins: int) -> Tuple[np.ndarray, np.ndarray]:
+        """채널의 밀도 히스토그램 (높이, 구간 경계) - Axes.hist(density=True)와 같은 값"""
+        def compute():
+            index = self.CHANNELS.index(channel)
+            low, high = self.extrema()
+            # 범위는 이미 계산된 최소/최대를 사용 (NaN은 구간에서 제외)
+            return np.histogram(self.values[:, index], bins, range=(low[index], high[index]), density=True)
+        return self._cached(('histogram', channel, bins), compute)
+    
+    def anomaly_heatmap(self, num_windows: int = 20) -> Dict:
+        """compute_anomaly_heatmap 결과 (창 수별로 보관)"""
+        return self._cached(('anomaly_heatmap', num_windows),
+                            lambda: compute_anomaly_heatmap(self.data, num_windows, stats=self))
+
+class HipotStreamingSession:
+    """실시간 Hipot 측정용 증분 분석 세션
+    
+    측정 청크가 들어올 때마다 누적 상태(평균/분산, 변화율 안정성, 분류별 개수,
+    기준 패턴 내적)만 갱신하고 전체 이력은 다시 계산하지 않는다.
+    패턴 유사도는 이력 없이 리샘플링/지연 탐색을 할 수 없으므로, 측정 순서대로 겹치는
+    기준 구간과의 코사인 유사도로 배치 분석(PatternSimilarityEngine)을 근사한다.
+    push/snapshot은 세션 잠금 안에서 수행되므로 같은 세션에 동시에 청크가 들어와도 안전하다.
+    """
+    
+    PARAMETERS = ('voltage', 'current', 'resistance')
+    
+    def __init__(self, accuracy_calculator: AccuracyDefectCalculator):
+        self._lock = threading.Lock()
+        self.accuracy_calculator = accuracy_calculator
+        self.reference_features = accuracy_calculator.reference_patterns.get('features')
+        
+        # 채널별 누적 통계 (voltage, current, resistance)
+        self.statistics = RunningStatistics(3)
+        self.minimum = np.full(3, np.inf)
+        self.maximum = np.full(3, -np.inf)
+        self.start_time = None
+        self.last_time = None
+        
+        # 변화율 안정성 (voltage, current)
+        self.diff_statistics = RunningStatistics(2)
+        self.rapid_change_counts = np.zeros(2, dtype=np.int64)
+        self._last_sample = None
+        
+        # 분류별 누적 개수
+        self.classification_counts = np.zeros(len(AccuracyDefectCalculator.CLASSIFICATION_CODES), dtype=np.int64)
+        
+        # 기준 패턴과의 코사인 유사도 누적항
+        self._pattern_dot = 0.0
+        self._test_norm_sq = 0.0
+        self._ref_norm_sq = 0.0
+    
+    @property
+    def data_points(self) -> int:
+        return self.statistics.count
+    
+    def push(self, time: np.ndarray, voltage: np.ndarray, current: np.ndarray,
+             resistance: np.ndarray) -> Dict:
+        """측정 청크 추가 후 현재 누적 지표 반환"""
+        values = np.column_stack([
+            np.asarray(voltage, dtype=np.float64),
+            np.asarray(current, dtype=np.float64),
+            np.asarray(resistance, dtype=np.float64)
+        ])
+        time = np.asarray(time, dtype=np.float64)
+        # 분류는 누적 상태와 무관하므로 잠금 밖에서 계산
+        codes = self.accuracy_calculator.classify_measurements(values[:, 0], values[:, 1], values[:, 2])
+        
+        with self._lock:
+            if len(values) > 0:
+                offset = self.statistics.count
+                
+                self._update_summary(time, values)
+                self._update_temporal_stability(values[:, :2])
+                self._update_pattern_similarity(values, offset)
+                self.classification_counts += np.bincount(codes, minlength=len(self.classification_counts))
+            
+            return self._snapshot()
+    
+    def snapshot(self) -> Dict:
+        """현재까지의 정확도/불합률 지표"""
+        with self._lock:
+            return self._snapshot()
+    
+    def _snapshot(self) -> Dict:
+        calculator = self.accuracy_calculator
+        
+        pattern_similarity = self._pattern_similarity()
+        statistical_match = self._statistical_match()
+        temporal_consistency = self._temporal_consistency()
+        
+        accuracy_metrics = {
+            'overall_accuracy': calculator._weighted_average([
+                (pattern_similarity, 0.4),
+                (statistical_match, 0.3),
+                (temporal_consistency, 0.3)
+            ]),
+            'pattern_similarity': pattern_similarity,
+            'statistical_match': statistical_match,
+            'temporal_consistency': temporal_consistency
+        }
+        
+        if self.data_points == 0:
+            defect_metrics = {
+                'overall_defect_rate': 0.0,
+                'defect_breakdown': {},
+                'total_tests': 0,
+                'pass_rate': 0.0
+            }
+        else:
+            defect_counts = {key: int(self.classification_counts[code]) for key, code in calculator.DEFECT_KEYS}
+            defect_metrics = calculator._build_defect_metrics(defect_counts, self.data_points)
+        
+        if self.data_points == 0:
+            ranges = [[0.0, 0.0] for _ in self.PARAMETERS]
+        else:
+            ranges = [[float(low), float(high)] for low, high in zip(self.minimum, self.maximum)]
+        
+        return {
+            'test_summary': {
+                'data_points': self.data_points,
+                'test_duration': self.last_time - self.start_time if self.start_time is not None else 0,
+                'voltage_range': ranges[0],
+                'current_range': ranges[1],
+                'resistance_range': ranges[2]
+            },
+            'accuracy_metrics': accuracy_metrics,
+            'defect_metrics': defect_metrics
+        }
+    
+    def _update_summary(self, time: np.ndarray, values: np.ndarray):
+        self.statistics.update(values)
+        self.minimum = np.minimum(self.minimum, values.min(axis=0))
+        self.maximum = np.maximum(self.maximum, values.max(axis=0))
+        
+        if len(time) > 0:
+            if self.start_time is None:
+                self.start_time = float(time[0])
+            self.last_time = float(time[-1])
+    
+    def _update_temporal_stability(self, values: np.ndarray):
+        """청크 경계를 포함한 1차 미분으로 급변 비율 갱신"""
+        if self._last_sample is not None:
+            values_with_prev = np.vstack([self._last_sample, values])
+        else:
+            values_with_prev = values
+        self._last_sample = values[-1:].copy()
+        
+        diffs = np.diff(values_with_prev, axis=0)
+        if len(diffs) == 0:
+            return
+        
+        self.diff_statistics.update(diffs)
+        # 누적 표준편차 기준 3σ 초과 변화 (배치 계산의 근사)
+        threshold = self.diff_statistics.std() * 3
+        with np.errstate(invalid='ignore'):
+            self.rapid_change_counts += (np.abs(diffs) > threshold).sum(axis=0)
+    
+    def _update_pattern_similarity(self, values: np.ndarray, offset: int):
+        """기준 패턴과 겹치는 구간만 내적/노름 누적 (짧은 쪽 길이 기준)"""
+        if self.reference_features is None:
+            return
+        
+        overlap = min(len(values), len(self.reference_features) - offset)
+        if overlap <= 0:
+            return
+        
+        test_part = values[:overlap]
+        ref_part = np.asarray(self.reference_features[offset:offset + overlap], dtype=np.float64)
+        self._pattern_dot += float(np.sum(test_part * ref_part))
+        self._test_norm_sq += float(np.sum(test_part ** 2))
+        self._ref_norm_sq += float(np.sum(ref_part ** 2))
+    
+    def _pattern_similarity(self) -> float:
+        if self.reference_features is None:
+            return 0.5
+        if self._test_norm_sq == 0 or self._ref_norm_sq == 0:
+            return 0.0
+        
+        similarity = self._pattern_dot / (np.sqrt(self._test_norm_sq) * np.sqrt(self._ref_norm_sq))
+        return max(0.0, min(1.0, similarity))
+    
+    def _statistical_match(self) -> float:
+        try:
+            means = self.statistics.mean
+            stds = self.statistics.std()
+            test_stats = {}
+            for i, param in enumerate(self.PARAMETERS):
+                test_stats[f'{param}_mean'] = means[i]
+                test_stats[f'{param}_std'] = stds[i]
+            
+            return self.accuracy_calculator._compare_statistics(test_stats)
+        except Exception:
+            return 0.5
+    
+    def _temporal_consistency(self) -> float:
+        diff_count = self.diff_statistics.count
+        if diff_count == 0:
+            return 1.0
+        
+        stability = 1.0 - self.rapid_change_counts / diff_count
+        return float(stability.mean())
+
+# 그래프 점 축소 방식 ('lttb': 삼각형 면적 기준 대표점, 'minmax': 구간별 최소/최대)
+DOWNSAMPLE_METHODS = ('lttb', 'minmax')
+
+def _bucket_edges(n: int, num_buckets: int) -> np.ndarray:
+    """첫/마지막 점을 제외한 [1, n-1) 구간을 num_buckets개로 나눈 경계"""
+    return np.linspace(1, n - 1, num_buckets + 1).astype(np.int64)
+
+def _first_argmax_per_bucket(values: np.ndarray, starts: np.ndarray) -> np.ndarray:
+    """연속 구간(starts로 시작)마다 최대값의 첫 인덱스"""
+    maxima = np.maximum.reduceat(values, starts)
+    counts = np.diff(np.append(starts, len(values)))
+    candidates = np.flatnonzero(values == np.repeat(maxima, counts))
+    buckets = np.searchsorted(starts, candidates, side='right') - 1
+    _, first = np.unique(buckets, return_index=True)
+    return candidates[first]
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, num_points: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets 대표점 인덱스 (벡터화)
+    
+    원래 LTTB는 앞 구간에서 선택된 점을 꼭짓점으로 써서 순차 계산이 필요하므로,
+    앞/뒤 구간의 평균점을 꼭짓점으로 사용해 모든 구간을 한 번에 계산한다.
+    """
+    n = len(y)
+    num_points = max(num_points, 3)
+    if num_points >= n:
+        return np.arange(n)
+    
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    edges = _bucket_edges(n, num_points - 2)
+    starts, counts = edges[:-1], np.diff(edges)
+    
+    mean_x = np.add.reduceat(x[1:n - 1], starts - 1) / counts
+    mean_y = np.add.reduceat(y[1:n - 1], starts - 1) / counts
+    prev_x = np.concatenate(([x[0]], mean_x[:-1]))
+    prev_y = np.concatenate(([y[0]], mean_y[:-1]))
+    next_x = np.concatenate((mean_x[1:], [x[-1]]))
+    next_y = np.concatenate((mean_y[1:], [y[-1]]))
+    
+    # 점마다 (앞 구간 평균, 점, 뒤 구간 평균) 삼각형 면적의 2배
+    ax, ay = np.repeat(prev_x, counts), np.repeat(prev_y, counts)
+    cx, cy = np.repeat(next_x, counts), np.repeat(next_y, counts)
+    area = np.abs((ax - cx) * (y[1:n - 1] - ay) - (ax - x[1:n - 1]) * (cy - ay))
+    
+    selected = _first_argmax_per_bucket(area, starts - 1) + 1
+    return np.concatenate(([0], selected, [n - 1]))
+
+def minmax_indices(y: np.ndarray, num_points: int) -> np.ndarray:
+    """구간마다 최소/최대 점을 남기는 인덱스 (스파이크 포락선 보존, 벡터화)"""
+    n = len(y)
+    num_points = max(num_points, 4)
+    if num_points >= n:
+        return np.arange(n)
+    
+    y = np.asarray(y, dtype=np.float64)
+    starts = _bucket_edges(n, (num_points - 2) // 2)[:-1] - 1
+    inner = y[1:n - 1]
+    lows = _first_argmax_per_bucket(-inner, starts)
+    highs = _first_argmax_per_bucket(inner, starts)
+    selected = np.unique(np.concatenate((lows, highs))) + 1
+    return np.concatenate(([0], selected, [n - 1]))
+
+def downsample_series(x, y, num_points: int, method: str = 'lttb') -> Tuple[np.ndarray, np.ndarray]:
+    """그래프용 점 축소 - 점 수가 num_points 이하이면 그대로 반환"""
+    x = np.asarray(x)
+    y = np.asarray(y)
+    if method == 'lttb':
+        indices = lttb_indices(x, y, num_points)
+    elif method == 'minmax':
+        indices = minmax_indices(y, num_points)
+    else:
+        raise ValueError(f"지원하지 않는 점 축소 방식입니다: {method} (가능: {', '.join(DOWNSAMPLE_METHODS)})")
+    if len(indices) == len(y):
+        return x, y
+    return x[indices], y[indices]
+
+# 이상 탐지 히트맵 파라미터 (행 순서)
+ANOMALY_HEATMAP_PARAMETERS = SessionStatistics.CHANNELS
+
+def compute_anomaly_heatmap(test_data: pd.DataFrame, num_windows: int = 20,
+                            stats: Optional[SessionStatistics] = None) -> Dict:
+    """이상 탐지 히트맵 데이터 (렌더링 없음)
+    
+    evolution: (파라미터 수, 창 수) 열별 min-max 정규화 값의 시간 창 평균 (창 길이 = 데이터 수 // num_windows)
+    correlation: (파라미터 수, 파라미터 수) 피어슨 상관계수
+    파라미터 열이 없거나 데이터가 부족하면 해당 항목은 None.
+    stats를 주면 그 세션 통계의 측정값 배열, 최소/최대, 상관계수를 재사용한다.
+    """
+    params = list(ANOMALY_HEATMAP_PARAMETERS)
+    heatmap = {'parameters': params, 'window_size': 0, 'window_starts': np.zeros(0, dtype=np.int64),
+               'evolution': None, 'correlation': None}
+    n = len(test_data)
+    if stats is None:
+        stats = SessionStatistics(test_data)
+    if n == 0 or not stats.has_channels:
+        return heatmap
+    
+    # 열별 정규화 (NaN은 제외하고 최소/최대 계산)
+    values = stats.values
+    low, high = stats.extrema()
+    normalized = (values - low) / (high - low + 1e-8)
+    
+    # 연속 창별 평균을 reduceat 한 번으로 계산 (NaN은 평균에서 제외)
+    window_size = max(1, n // num_windows)
+    starts = np.arange(0, n, window_size)
+    if stats.complete:
+        sums = np.add.reduceat(normalized, starts, axis=0)
+        counts = np.diff(np.append(starts, n))[:, None]
+    else:
+        valid = ~np.isnan(values)
+        sums = np.add.reduceat(np.where(valid, normalized, 0.0), starts, axis=0)
+        counts = np.add.reduceat(valid.astype(np.int64), starts, axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        heatmap['evolution'] = (sums / counts).T
+    # NaN이 있으면 pandas의 쌍별 결측 제외 규칙을 따름
+    heatmap['correlation'] = stats.moments()['correlation']
+    heatmap['window_size'] = window_size
+    heatmap['window_starts'] = starts
+    return heatmap
+
+# 그래프 출력 형식별 MIME 타입 (webp/jpeg는 Pillow 필요)
+PLOT_FORMATS = {
+    'png': 'image/png',
+    'svg': 'image/svg+xml',
+    'webp': 'image/webp',
+    'jpeg': 'image/jpeg'
+}
+
+def validate_plot_options(dpi: Optional[int] = None, fmt: Optional[str] = None) -> None:
+    """그래프 DPI/형식 검증 (잘못된 값이면 ValueError)"""
+    if fmt is not None and fmt not in PLOT_FORMATS:
+        raise ValueError(f"지원하지 않는 그래프 형식입니다: {fmt} (가능: {', '.join(PLOT_FORMATS)})")
+    if dpi is not None and not 20 <= dpi <= 600:
+        raise ValueError(f"그래프 DPI는 20~600 범위여야 합니다: {dpi}")
+
+class PlotArtifactStore:
+    """렌더링된 그래프 이미지 저장소 (메모리, 개수/바이트 상한 LRU)
+    
+    ID에 임의 UUID를 붙이므로 같은 초에 렌더링된 그래프끼리도 겹치지 않는다.
+    """
+    
+    def __init__(self, max_items: int = 512, max_bytes: int = 256 * 1024 * 1024):
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self._artifacts = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+    
+    def put(self, name: str, fmt: str, data: bytes) -> str:
+        """이미지 저장 후 ID 반환 (상한을 넘으면 오래된 이미지부터 제거)"""
+        artifact_id = f'{name}_{uuid.uuid4().hex}.{fmt}'
+        with self._lock:
+            self._artifacts[artifact_id] = (data, PLOT_FORMATS[fmt])
+            self._bytes += len(data)
+            # 방금 넣은 이미지는 상한을 넘더라도 남김
+            while len(self._artifacts) > 1 and (len(self._artifacts) > self.max_items
+                                                or self._bytes > self.max_bytes):
+                _, (evicted, _) = self._artifacts.popitem(last=False)
+                self._bytes -= len(evicted)
+        return artifact_id
+    
+    def get(self, artifact_id: str) -> Optional[Tuple[bytes, str]]:
+        """(이미지 바이트, MIME 타입) - 없거나 제거된 ID면 None"""
+        with self._lock:
+            artifact = self._artifacts.get(artifact_id)
+            if artifact is not None:
+                self._artifacts.move_to_end(artifact_id)
+        return artifact
+    
+    def __contains__(self, artifact_id: str) -> bool:
+        with self._lock:
+            return artifact_id in self._artifacts
+    
+    def stats(self) -> Dict:
+        with self._lock:
+            return {'items': len(self._artifacts), 'bytes': self._bytes,
+                    'max_items': self.max_items, 'max_bytes': self.max_bytes}
+
 class HipotGraphGenerator:
-    """Hipot 그래프 생성 클래스"""
+    """Hipot 그래프 생성 클래스
     
-    def __init__(self):
-        plt.style.use('seaborn-v0_8')
+    선 그래프는 축의 픽셀 폭 정도로 점을 축소해 그린다 (full_resolution=True면 원본 그대로).
+    그림은 pyplot 없이 Figure 객체로 만들어 메모리 버퍼에 인코딩하므로 여러 스레드에서 동시에 렌더링할 수 있다.
+    
+    reuse_figures가 True이면 그림 템플릿(Figure, 축, 범례, 컬러바, 선/막대/이미지 아티스트)을
+    그림 종류별 공용 풀에서 빌려 쓰고, 아티스트 데이터만 바꾼 뒤 축 범위와 레이아웃을 다시 계산한다.
+    요청마다 새 스레드를 쓰는 서버에서도 템플릿이 스레드 수만큼 늘지 않는다.
+    """
+    
+    FIGURES = (
+        ('hipot_comparison', '_create_real_time_comparison'),
+        ('hipot_statistics', '_create_statistical_analysis_plots'),
+        ('hipot_anomaly', '_create_anomaly_heatmap')
+    )
+    PARAMETERS = ('voltage', 'current', 'resistance')
+    HIST_BINS = 30
+    MAX_TEMPLATES = 2  # 그림 구성별 최대 템플릿 수 (동시에 더 많이 렌더링하면 일회용 Figure 사용)
+    
+    def __init__(self, dpi: int = 300, downsample: str = 'lttb', full_resolution: bool = False,
+                 points_per_pixel: float = 2.0, fmt: str = 'png',
+                 artifact_store: Optional[PlotArtifactStore] = None, reuse_figures: bool = True):
+        if downsample not in DOWNSAMPLE_METHODS:
+            raise ValueError(f"지원하지 않는 점 축소 방식입니다: {downsample} (가능: {', '.join(DOWNSAMPLE_METHODS)})")
+        validate_plot_options(dpi, fmt)
+        self.dpi = dpi
+        self.fmt = fmt
+        self.artifact_store = artifact_store if artifact_store is not None else PlotArtifactStore()
+        self.downsample = downsample
+        self.full_resolution = full_resolution
+        self.points_per_pixel = points_per_pixel
+        self.reuse_figures = reuse_figures
+        # 그림 템플릿 풀 ((그림 이름, 구성) -> 템플릿 목록)
+        # Figure는 한 번에 한 스레드에서만 그려야 하므로 렌더링 중인 템플릿은 'busy'로 표시
+        self._templates = {}
+        self._templates_lock = threading.Lock()
+        # matplotlib은 첫 그래프 생성 시 로드
         self.plot_configs = {
             'voltage_current': {'figsize': (12, 8), 'subplots': (2, 1)},
             'resistance_time': {'figsize': (10, 6)},
@@ -438,111 +1880,221 @@ class HipotGraphGenerator:
             'statistical_distribution': {'figsize': (15, 10), 'subplots': (2, 3)}
         }
     
-    def create_comparison_plots(self, test_data: pd.DataFrame, reference_data: Dict) -> List[str]:
-        """비교 그래프 생성"""
-        
-        plot_paths = []
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        
-        # 1. 실시간 측정 그래프
-        path1 = self._create_real_time_comparison(test_data, reference_data, timestamp)
-        plot_paths.append(path1)
-        
-        # 2. 통계적 분포 비교
-        path2 = self._create_statistical_analysis_plots(test_data, reference_data, timestamp)
-        plot_paths.append(path2)
-        
-        # 3. 이상 탐지 히트맵
-        path3 = self._create_anomaly_heatmap(test_data, timestamp)
-        plot_paths.append(path3)
-        
-        return plot_paths
+    def render_figures(self, test_data: pd.DataFrame, reference_data: Dict, timestamp: Optional[str] = None,
+                       full_resolution: Optional[bool] = None, dpi: Optional[int] = None,
+                       fmt: Optional[str] = None, stats: Optional[SessionStatistics] = None) -> List[Dict]:
+        """비교 그래프를 메모리 버퍼로 렌더링 - {'name', 'format', 'mimetype', 'data'} 목록
+        
+        full_resolution/dpi/fmt를 주면 이번 호출만 생성기 기본 설정을 바꾼다.
+        stats에 분석에서 만든 SessionStatistics를 주면 히스토그램/히트맵을 다시 계산하지 않는다.
+        """
+        _load_matplotlib()
+        validate_plot_options(dpi, fmt)
+        if full_resolution is None:
+            full_resolution = self.full_resolution
+        dpi = dpi or self.dpi
+        fmt = fmt or self.fmt
+        if timestamp is None:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        if stats is None:
+            stats = SessionStatistics(test_data)
+        
+        rendered = []
+        for name, method in self.FIGURES:
+            # 1. 실시간 측정 그래프, 2. 통계적 분포 비교, 3. 이상 탐지 히트맵
+            fig = getattr(self, method)(test_data, reference_data, timestamp,
+                                        full_resolution=full_resolution, dpi=dpi, stats=stats)
+            buffer = io.BytesIO()
+            fig.savefig(buffer, format=fmt, dpi=dpi, bbox_inches='tight')
+            # 템플릿이 마지막 렌더러의 픽셀 버퍼를 붙잡고 있지 않도록 캔버스 교체
+            FigureCanvasAgg(fig)
+            self._release_template(fig)
+            rendered.append({'name': name, 'format': fmt, 'mimetype': PLOT_FORMATS[fmt],
+                             'data': buffer.getvalue()})
+        return rendered
     
-    def _create_real_time_comparison(self, test_data: pd.DataFrame, reference_data: Dict, timestamp: str) -> str:
-        """실시간 비교 그래프 생성"""
-        
-        fig, axes = plt.subplots(2, 2, figsize=(15, 10))
-        fig.suptitle(f'Hipot Test Data Comparison - {timestamp}', fontsize=16)
-        
-        time_test = test_data['time'] if 'time' in test_data.columns else range(len(test_data))
-        
-        # 전압-시간 비교
-        axes[0, 0].plot(time_test, test_data['voltage'], 
-                       label='Current Test', color='blue', alpha=0.7, linewidth=2)
-        if 'voltage_ref' in reference_data:
-            time_ref = range(len(reference_data['voltage_ref']))
-            axes[0, 0].plot(time_ref, reference_data['voltage_ref'], 
-                           label='Reference', color='red', linestyle='--', linewidth=2)
-        axes[0, 0].set_title('Voltage vs Time Comparison')
-        axes[0, 0].set_xlabel('Time (s)')
-        axes[0, 0].set_ylabel('Voltage (V)')
-        axes[0, 0].legend()
-        axes[0, 0].grid(True, alpha=0.3)
-        
-        # 전류-시간 비교
-        axes[0, 1].plot(time_test, test_data['current'], 
-                       label='Current Test', color='blue', alpha=0.7, linewidth=2)
-        if 'current_ref' in reference_data:
-            axes[0, 1].plot(time_ref, reference_data['current_ref'], 
-                           label='Reference', color='red', linestyle='--', linewidth=2)
-        axes[0, 1].set_title('Current vs Time Comparison')
-        axes[0, 1].set_xlabel('Time (s)')
-        axes[0, 1].set_ylabel('Current (A)')
-        axes[0, 1].legend()
-        axes[0, 1].grid(True, alpha=0.3)
-        
-        # 저항-시간 비교 (로그 스케일)
-        axes[1, 0].semilogy(time_test, test_data['resistance'], 
-                           label='Current Test', color='blue', alpha=0.7, linewidth=2)
-        if 'resistance_ref' in reference_data:
-            axes[1, 0].semilogy(time_ref, reference_data['resistance_ref'], 
-                               label='Reference', color='red', linestyle='--', linewidth=2)
-        axes[1, 0].set_title('Resistance vs Time Comparison (Log Scale)')
-        axes[1, 0].set_xlabel('Time (s)')
-        axes[1, 0].set_ylabel('Resistance (Ω)')
-        axes[1, 0].legend()
-        axes[1, 0].grid(True, alpha=0.3)
+    def create_comparison_plots(self, test_data: pd.DataFrame, reference_data: Dict,
+                                timestamp: Optional[str] = None, full_resolution: Optional[bool] = None,
+                                dpi: Optional[int] = None, fmt: Optional[str] = None,
+                                stats: Optional[SessionStatistics] = None) -> List[str]:
+        """비교 그래프를 렌더링해 이미지 저장소에 넣고 이미지 ID 목록 반환"""
+        with stage_metrics.span('plots.encode'):
+            rendered = self.render_figures(test_data, reference_data, timestamp, full_resolution, dpi, fmt,
+                                           stats)
+        return [self.artifact_store.put(item['name'], item['format'], item['data']) for item in rendered]
+    
+    def _new_figure(self, rows: int, cols: int, figsize: Tuple[float, float]):
+        """Agg 캔버스에 연결된 Figure와 축 배열 (pyplot 전역 상태를 거치지 않음)"""
+        fig = Figure(figsize=figsize)
+        FigureCanvasAgg(fig)
+        return fig, fig.subplots(rows, cols, squeeze=False)
+    
+    def _template(self, name: str, signature: tuple, build) -> Dict:
+        """풀에서 같은 구성의 그림 템플릿을 빌림 (유휴 템플릿이 없으면 build()로 생성)
+        
+        재사용할 때는 여백을 생성 직후 값으로 되돌려, 새 그림과 같은 축 크기에서 점 축소와
+        tight_layout이 계산되도록 한다. 빌린 템플릿은 인코딩 후 _release_template으로 반납한다.
+        """
+        if not self.reuse_figures:
+            return build()
+        
+        key = (name, signature)
+        with self._templates_lock:
+            pool = self._templates.setdefault(key, [])
+            template = next((item for item in pool if not item['busy']), None)
+            if template is not None:
+                template['busy'] = True
+        
+        if template is not None:
+            template['fig'].subplots_adjust(**template['subplotpars'])
+            return template
+        
+        template = build()
+        template['subplotpars'] = {param: getattr(template['fig'].subplotpars, param)
+                                   for param in ('left', 'right', 'bottom', 'top', 'wspace', 'hspace')}
+        template['busy'] = True
+        with self._templates_lock:
+            # 풀이 가득 차면 이번 그림은 풀에 넣지 않음 (렌더링 중 예외로 반납되지 않은 템플릿도 상한에 포함)
+            if len(pool) < self.MAX_TEMPLATES:
+                pool.append(template)
+        return template
+    
+    def _release_template(self, fig):
+        """렌더링이 끝난 그림의 템플릿을 풀에 반납 (풀에 없는 그림이면 무시)"""
+        with self._templates_lock:
+            for pool in self._templates.values():
+                for template in pool:
+                    if template['fig'] is fig:
+                        template['busy'] = False
+                        return
+    
+    def _line_data(self, ax, x, y, full_resolution: bool = False, dpi: Optional[int] = None):
+        """축 픽셀 폭에 맞춰 점을 축소한 선 데이터"""
+        if full_resolution:
+            return np.asarray(x), np.asarray(y)
+        pixels = ax.get_position().width * ax.figure.get_figwidth() * (dpi or self.dpi)
+        return downsample_series(x, y, int(pixels * self.points_per_pixel), self.downsample)
+    
+    def _build_real_time_comparison(self, has_reference: Tuple[bool, ...]) -> Dict:
+        fig, axes = self._new_figure(2, 2, figsize=(15, 10))
+        
+        # 전압/전류/저항-시간 비교 (저항은 로그 스케일)
+        panels = [
+            (axes[0, 0], 'Voltage vs Time Comparison', 'Voltage (V)', False),
+            (axes[0, 1], 'Current vs Time Comparison', 'Current (A)', False),
+            (axes[1, 0], 'Resistance vs Time Comparison (Log Scale)', 'Resistance (Ω)', True)
+        ]
+        lines = []
+        for (ax, title, ylabel, log_y), with_reference in zip(panels, has_reference):
+            plot = ax.semilogy if log_y else ax.plot
+            test_line, = plot([], [], label='Current Test', color='blue', alpha=0.7, linewidth=2)
+            reference_line = None
+            if with_reference:
+                reference_line, = plot([], [], label='Reference', color='red', linestyle='--', linewidth=2)
+            lines.append((ax, test_line, reference_line))
+            ax.set_title(title)
+            ax.set_xlabel('Time (s)')
+            ax.set_ylabel(ylabel)
+            ax.legend()
+            ax.grid(True, alpha=0.3)
         
         # V-I 특성 곡선
-        axes[1, 1].plot(test_data['voltage'], test_data['current'], 
-                       'bo-', alpha=0.7, markersize=3, label='Test Data')
+        vi_line, = axes[1, 1].plot([], [], 'bo-', alpha=0.7, markersize=3, label='Test Data')
         axes[1, 1].set_title('V-I Characteristic Curve')
         axes[1, 1].set_xlabel('Voltage (V)')
         axes[1, 1].set_ylabel('Current (A)')
         axes[1, 1].legend()
         axes[1, 1].grid(True, alpha=0.3)
+        lines.append((axes[1, 1], vi_line, None))
         
-        plt.tight_layout()
-        
-        filename = f'hipot_comparison_{timestamp}.png'
-        plt.savefig(filename, dpi=300, bbox_inches='tight')
-        plt.close()
-        
-        return filename
+        return {'fig': fig, 'lines': lines}
     
-    def _create_statistical_analysis_plots(self, test_data: pd.DataFrame, reference_data: Dict, timestamp: str) -> str:
-        """통계적 분석 그래프 생성"""
-        
-        fig, axes = plt.subplots(2, 3, figsize=(18, 12))
-        fig.suptitle(f'Statistical Analysis - {timestamp}', fontsize=16)
+    def _create_real_time_comparison(self, test_data: pd.DataFrame, reference_data: Dict, timestamp: str,
+                                     full_resolution: bool = False, dpi: Optional[int] = None, **options):
+        """실시간 비교 그래프 생성"""
         
-        parameters = ['voltage', 'current', 'resistance']
+        has_reference = tuple(f'{param}_ref' in reference_data for param in self.PARAMETERS)
+        template = self._template('hipot_comparison', has_reference,
+                                  lambda: self._build_real_time_comparison(has_reference))
+        fig = template['fig']
+        fig.suptitle(f'Hipot Test Data Comparison - {timestamp}', fontsize=16)
         
-        # 히스토그램 비교 (상단)
-        for i, param in enumerate(parameters):
-            axes[0, i].hist(test_data[param], bins=30, alpha=0.7, 
-                           label='Test Data', color='blue', density=True)
-            if f'{param}_ref' in reference_data:
-                axes[0, i].hist(reference_data[f'{param}_ref'], bins=30, alpha=0.7, 
-                               label='Reference Data', color='red', density=True)
+        time_test = test_data['time'] if 'time' in test_data.columns else np.arange(len(test_data))
+        time_ref = None
+        for key in ('voltage_ref', 'current_ref', 'resistance_ref'):
+            if key in reference_data:
+                time_ref = np.arange(len(reference_data[key]))
+                break
+        
+        series = [(time_test, test_data[param], time_ref, reference_data.get(f'{param}_ref'))
+                  for param in self.PARAMETERS]
+        # V-I 특성 곡선 (x가 단조가 아니므로 측정 순서대로 구간을 나눠 축소)
+        series.append((test_data['voltage'], test_data['current'], None, None))
+        
+        for (ax, test_line, reference_line), (x, y, x_ref, y_ref) in zip(template['lines'], series):
+            test_line.set_data(*self._line_data(ax, x, y, full_resolution, dpi))
+            if reference_line is not None:
+                reference_line.set_data(*self._line_data(ax, x_ref, y_ref, full_resolution, dpi))
+            ax.relim()
+            ax.autoscale_view()
+        
+        fig.tight_layout()
+        return fig
+    
+    def _build_statistical_analysis_plots(self, has_reference: Tuple[bool, ...]) -> Dict:
+        fig, axes = self._new_figure(2, 3, figsize=(18, 12))
+        
+        # 히스토그램 비교 (상단) - 막대는 분석마다 위치/높이만 갱신
+        histograms = []
+        for i, (param, with_reference) in enumerate(zip(self.PARAMETERS, has_reference)):
+            _, _, test_bars = axes[0, i].hist([], bins=self.HIST_BINS, alpha=0.7,
+                                              label='Test Data', color='blue', density=True)
+            reference_bars = None
+            if with_reference:
+                _, _, reference_bars = axes[0, i].hist([], bins=self.HIST_BINS, alpha=0.7,
+                                                       label='Reference Data', color='red', density=True)
+            histograms.append((axes[0, i], test_bars, reference_bars))
             axes[0, i].set_title(f'{param.capitalize()} Distribution')
             axes[0, i].set_xlabel(param.capitalize())
             axes[0, i].set_ylabel('Density')
             axes[0, i].legend()
             axes[0, i].grid(True, alpha=0.3)
         
-        # 박스 플롯 (하단)
-        for i, param in enumerate(parameters):
+        return {'fig': fig, 'histograms': histograms, 'box_axes': list(axes[1])}
+    
+    @staticmethod
+    def _update_histogram_bars(bars, heights: np.ndarray, edges: np.ndarray):
+        """np.histogram(density=True) 결과로 Axes.hist와 같은 막대 위치/높이 갱신"""
+        widths = np.diff(edges)
+        lefts = (edges[:-1] + 0.5 * widths) - widths / 2
+        for bar, left, width, height in zip(bars, lefts, widths, heights):
+            bar.set_xy((left, 0))
+            bar.set_width(width)
+            bar.set_height(height)
+    
+    def _create_statistical_analysis_plots(self, test_data: pd.DataFrame, reference_data: Dict, timestamp: str,
+                                           stats: Optional[SessionStatistics] = None, **options):
+        """통계적 분석 그래프 생성"""
+        
+        has_reference = tuple(f'{param}_ref' in reference_data for param in self.PARAMETERS)
+        template = self._template('hipot_statistics', has_reference,
+                                  lambda: self._build_statistical_analysis_plots(has_reference))
+        fig = template['fig']
+        fig.suptitle(f'Statistical Analysis - {timestamp}', fontsize=16)
+        
+        # 히스토그램 비교 (상단)
+        if stats is None:
+            stats = SessionStatistics(test_data)
+        for param, (ax, test_bars, reference_bars) in zip(self.PARAMETERS, template['histograms']):
+            self._update_histogram_bars(test_bars, *stats.histogram(param, self.HIST_BINS))
+            if reference_bars is not None:
+                self._update_histogram_bars(reference_bars, *np.histogram(np.asarray(reference_data[f'{param}_ref']),
+                                                                          self.HIST_BINS, density=True))
+            ax.relim()
+            ax.autoscale_view()
+        
+        # 박스 플롯 (하단) - 상자/수염/이상점 수가 데이터마다 달라 축만 재사용하고 다시 그림
+        for param, ax in zip(self.PARAMETERS, template['box_axes']):
             data_to_plot = [test_data[param]]
             labels = ['Test Data']
             
@@ -550,54 +2102,35 @@ class HipotGraphGenerator:
                 data_to_plot.append(reference_data[f'{param}_ref'])
                 labels.append('Reference Data')
             
-            axes[1, i].boxplot(data_to_plot, labels=labels)
-            axes[1, i].set_title(f'{param.capitalize()} Box Plot')
-            axes[1, i].set_ylabel(param.capitalize())
-            axes[1, i].grid(True, alpha=0.3)
-        
-        plt.tight_layout()
-        
-        filename = f'hipot_statistics_{timestamp}.png'
-        plt.savefig(filename, dpi=300, bbox_inches='tight')
-        plt.close()
-        
-        return filename
+            ax.cla()
+            ax.boxplot(data_to_plot, labels=labels)
+            ax.set_title(f'{param.capitalize()} Box Plot')
+            ax.set_ylabel(param.capitalize())
+            ax.grid(True, alpha=0.3)
+        
+        fig.tight_layout()
+        return fig
     
-    def _create_anomaly_heatmap(self, test_data: pd.DataFrame, timestamp: str) -> str:
-        """이상 탐지 히트맵 생성"""
-        
-        fig, axes = plt.subplots(1, 2, figsize=(15, 6))
-        fig.suptitle(f'Anomaly Detection Heatmap - {timestamp}', fontsize=16)
+    def _build_anomaly_heatmap(self, with_evolution: bool, with_correlation: bool) -> Dict:
+        fig, axes = self._new_figure(1, 2, figsize=(15, 6))
+        axes = axes[0]
+        params = list(ANOMALY_HEATMAP_PARAMETERS)
+        template = {'fig': fig, 'evolution': None, 'correlation': None, 'labels': []}
         
         # 시간에 따른 파라미터 변화 히트맵
-        params = ['voltage', 'current', 'resistance']
-        if all(param in test_data.columns for param in params):
-            # 데이터 정규화
-            normalized_data = test_data[params].apply(lambda x: (x - x.min()) / (x.max() - x.min() + 1e-8))
-            
-            # 시간 윈도우별 히트맵
-            window_size = max(1, len(normalized_data) // 20)
-            windowed_data = []
-            
-            for i in range(0, len(normalized_data), window_size):
-                window = normalized_data.iloc[i:i+window_size]
-                windowed_data.append(window.mean().values)
-            
-            if windowed_data:
-                heatmap_data = np.array(windowed_data).T
-                
-                im1 = axes[0].imshow(heatmap_data, aspect='auto', cmap='RdYlBu_r')
-                axes[0].set_title('Parameter Evolution Heatmap')
-                axes[0].set_xlabel('Time Windows')
-                axes[0].set_ylabel('Parameters')
-                axes[0].set_yticks(range(len(params)))
-                axes[0].set_yticklabels(params)
-                plt.colorbar(im1, ax=axes[0])
+        if with_evolution:
+            template['evolution'] = axes[0].imshow(np.zeros((len(params), 1)), aspect='auto', cmap='RdYlBu_r')
+            axes[0].set_title('Parameter Evolution Heatmap')
+            axes[0].set_xlabel('Time Windows')
+            axes[0].set_ylabel('Parameters')
+            axes[0].set_yticks(range(len(params)))
+            axes[0].set_yticklabels(params)
+            fig.colorbar(template['evolution'], ax=axes[0])
         
         # 상관관계 히트맵
-        if len(test_data) > 1:
-            corr_matrix = test_data[params].corr()
-            im2 = axes[1].imshow(corr_matrix, aspect='auto', cmap='coolwarm', vmin=-1, vmax=1)
+        if with_correlation:
+            template['correlation'] = axes[1].imshow(np.zeros((len(params), len(params))), aspect='auto',
+                                                     cmap='coolwarm', vmin=-1, vmax=1)
             axes[1].set_title('Parameter Correlation Heatmap')
             axes[1].set_xticks(range(len(params)))
             axes[1].set_yticks(range(len(params)))
@@ -605,34 +2138,163 @@ class HipotGraphGenerator:
             axes[1].set_yticklabels(params)
             
             # 상관계수 값 표시
-            for i in range(len(params)):
-                for j in range(len(params)):
-                    axes[1].text(j, i, f'{corr_matrix.iloc[i, j]:.2f}', 
-                               ha='center', va='center', color='black')
+            template['labels'] = [[axes[1].text(j, i, '', ha='center', va='center', color='black')
+                                   for j in range(len(params))] for i in range(len(params))]
             
-            plt.colorbar(im2, ax=axes[1])
+            fig.colorbar(template['correlation'], ax=axes[1])
+        
+        return template
+    
+    def _create_anomaly_heatmap(self, test_data: pd.DataFrame, reference_data: Dict, timestamp: str,
+                                stats: Optional[SessionStatistics] = None, **options):
+        """이상 탐지 히트맵 생성"""
         
-        plt.tight_layout()
+        heatmap = (stats or SessionStatistics(test_data)).anomaly_heatmap()
+        evolution, correlation = heatmap['evolution'], heatmap['correlation']
+        template = self._template('hipot_anomaly', (evolution is not None, correlation is not None),
+                                  lambda: self._build_anomaly_heatmap(evolution is not None, correlation is not None))
+        fig = template['fig']
+        fig.suptitle(f'Anomaly Detection Heatmap - {timestamp}', fontsize=16)
         
-        filename = f'hipot_anomaly_{timestamp}.png'
-        plt.savefig(filename, dpi=300, bbox_inches='tight')
-        plt.close()
+        # 시간에 따른 파라미터 변화 히트맵
+        if evolution is not None:
+            image = template['evolution']
+            image.set_data(evolution)
+            image.norm.autoscale(image.get_array())
+            rows, cols = evolution.shape
+            image.set_extent((-0.5, cols - 0.5, rows - 0.5, -0.5))
         
-        return filename
+        # 상관관계 히트맵
+        if correlation is not None:
+            template['correlation'].set_data(correlation)
+            for i, row in enumerate(template['labels']):
+                for j, label in enumerate(row):
+                    label.set_text(f'{correlation[i, j]:.2f}')
+        
+        fig.tight_layout()
+        return fig
+
+class PlotRenderQueue:
+    """백그라운드 그래프 렌더링 큐
+    
+    입력 데이터와 렌더링 옵션(dpi/fmt/full_resolution)의 내용 해시를 작업 ID로 사용하므로
+    같은 세션은 같은 옵션으로 한 번만 렌더링된다.
+    """
+    
+    PENDING = 'pending'
+    DONE = 'done'
+    FAILED = 'failed'
+    
+    def __init__(self, graph_generator: 'HipotGraphGenerator', max_jobs: int = 256, workers: int = 1):
+        self.graph_generator = graph_generator
+        self.max_jobs = max_jobs
+        # 그래프는 Figure 객체 단위로 렌더링되므로 여러 스레드가 동시에 렌더링해도 안전
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='plot-render')
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._reference_digest = (None, None)
+    
+    def submit(self, test_data: pd.DataFrame, reference_data: Dict, options: Optional[Dict] = None,
+               stats: Optional[SessionStatistics] = None) -> str:
+        """렌더링 작업 등록 (이미 있거나 완료된 작업이면 기존 작업 ID 반환)
+        
+        options는 그래프 생성기의 create_comparison_plots에 그대로 전달된다.
+        stats는 test_data의 세션 통계이므로 작업 ID 계산에는 포함하지 않는다.
+        """
+        options = {key: value for key, value in (options or {}).items() if value is not None}
+        job_id = self.content_hash(test_data, reference_data, options)
+        
+        with self._lock:
+            future = self._jobs.get(job_id)
+            if future is not None and not (future.done() and future.exception() is not None):
+                self._jobs.move_to_end(job_id)
+                return job_id
+            
+            # 같은 초에 렌더링된 다른 작업과 파일명이 겹치지 않도록 작업 ID 접두어 추가
+            timestamp = f'{datetime.now().strftime("%Y%m%d_%H%M%S")}_{job_id[:8]}'
+            if stats is not None:
+                options = dict(options, stats=stats)
+            self._jobs[job_id] = self._executor.submit(self._render, test_data, reference_data, timestamp, options)
+            self._jobs.move_to_end(job_id)
+            
+            while len(self._jobs) > self.max_jobs:
+                self._jobs.popitem(last=False)
+        
+        return job_id
+    
+    def _render(self, test_data: pd.DataFrame, reference_data: Dict, timestamp: str, options: Dict) -> List[str]:
+        with stage_metrics.span('plots.render'):
+            return self.graph_generator.create_comparison_plots(test_data, reference_data, timestamp, **options)
+    
+    def status(self, job_id: str) -> Optional[Dict]:
+        """작업 상태 조회 (알 수 없는 작업이면 None)"""
+        with self._lock:
+            future = self._jobs.get(job_id)
+        
+        if future is None:
+            return None
+        if not future.done():
+            return {'job_id': job_id, 'status': self.PENDING, 'plots': []}
+        if future.exception() is not None:
+            return {'job_id': job_id, 'status': self.FAILED, 'plots': [], 'error': str(future.exception())}
+        return {'job_id': job_id, 'status': self.DONE, 'plots': future.result()}
+    
+    def content_hash(self, test_data: pd.DataFrame, reference_data: Dict, options: Optional[Dict] = None) -> str:
+        """테스트 데이터, 기준 데이터, 렌더링 옵션 내용 기반 해시"""
+        digest = hashlib.blake2b(digest_size=16)
+        if options:
+            digest.update(repr(sorted(options.items())).encode())
+        for column in ('time', 'voltage', 'current', 'resistance'):
+            if column in test_data.columns:
+                digest.update(column.encode())
+                digest.update(np.ascontiguousarray(test_data[column].to_numpy()).tobytes())
+        digest.update(self._hash_reference(reference_data))
+        return digest.hexdigest()
+    
+    def _hash_reference(self, reference_data: Dict) -> bytes:
+        # 기준 데이터는 분석마다 같은 객체이므로 해시를 재사용
+        cached_reference, cached_digest = self._reference_digest
+        if cached_reference is reference_data:
+            return cached_digest
+        
+        digest = hashlib.blake2b(digest_size=16)
+        for key in ('voltage_ref', 'current_ref', 'resistance_ref'):
+            if reference_data and key in reference_data:
+                digest.update(key.encode())
+                digest.update(np.ascontiguousarray(reference_data[key]).tobytes())
+        
+        self._reference_digest = (reference_data, digest.digest())
+        return self._reference_digest[1]
+    
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
 
 class HipotAIAnalyzer:
     """메인 Hipot AI 분석기 클래스"""
     
-    def __init__(self, config_path: Optional[str] = None):
+    def __init__(self, config_path: Optional[str] = None, plot_queue: Optional[PlotRenderQueue] = None):
         self.config = self._load_config(config_path)
-        self.preprocessor = HipotDataPreprocessor()
+        self.preprocessor = HipotDataPreprocessor(**self.config['preprocessing'])
         self.reference_model = None
-        self.graph_generator = HipotGraphGenerator()
+        self.window_inference = None
+        # 여러 분석기가 렌더링 큐를 공유하면 pyplot 렌더링 스레드가 프로세스에 하나만 유지됨
+        if plot_queue is None:
+            plot_queue = PlotRenderQueue(HipotGraphGenerator())
+        self.graph_generator = plot_queue.graph_generator
+        self.plot_queue = plot_queue
         self.accuracy_calculator = None
         self.reference_data = None
+        self.reference_version = None
         
-        # 기본 설정
-        self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+        # 연산 장치는 torch 로드 시점에 결정
+        self._device = None
+    
+    @property
+    def device(self):
+        if self._device is None:
+            _load_torch()
+            self._device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+        return self._device
         
     def _load_config(self, config_path: Optional[str]) -> Dict:
         """설정 파일 로드"""
@@ -647,12 +2309,38 @@ class HipotAIAnalyzer:
                 'learning_rate': 0.001,
                 'batch_size': 32,
                 'epochs': 100,
-                'early_stopping_patience': 10
+                'early_stopping_patience': 10,
+                'window_size': 100,  # 훈련 창 길이/간격 (세션당 여러 창으로 학습)
+                'window_stride': 50,
+                'samples_per_epoch': None,  # 설정하면 epoch마다 임의 창을 이만큼 추출
+                'num_threads': None,  # 훈련 중 torch 연산 스레드 수 (None: 현재 설정 유지)
+                'compile': None,  # None, 'torchscript', 'inductor'(torch.compile)
+                'classification_weight': 0.1  # 'VALID' 가정 분류 손실 가중치 (0이면 계산 생략)
             },
             'thresholds': {
                 'reconstruction_threshold': 0.1,
                 'classification_confidence': 0.8,
                 'temporal_deviation': 0.05
+            },
+            'batch': {
+                'max_workers': None  # None이면 CPU 코어 수 사용
+            },
+            'preprocessing': {
+                'n_workers': None,  # None이면 CPU 코어 수 사용
+                'parallel_threshold': 10000,
+                'chunk_size': 32768,
+                'outlier_method': 'forest_grid'  # OUTLIER_METHODS 중 하나
+            },
+            'inference': {
+                'enabled': False,  # 기본 분석에 윈도우 추론 포함 여부 (요청별로 켤 수 있음)
+                'window_size': 100,
+                'stride': 50,
+                'batch_size': 128,
+                'max_windows': 256  # 세션당 추론할 최대 창 수 (긴 세션은 간격을 늘림)
+            },
+            'similarity': {
+                'grid_size': 2048,  # 패턴 유사도 공통 격자 길이 (기준 템플릿보다 길게 잡지 않음)
+                'max_lag': 0.25  # 탐색할 최대 시간 지연 (세션 길이 대비 비율)
             }
         }
         
@@ -666,14 +2354,23 @@ class HipotAIAnalyzer:
     def initialize_model(self):
         """모델 초기화"""
         model_config = self.config['model']
-        self.reference_model = HipotReferenceModel(
+        self.reference_model = _get_reference_model_class()(
             input_dim=model_config['input_dim'],
             hidden_dim=model_config['hidden_dim'],
             num_layers=model_config['num_layers'],
             latent_dim=model_config['latent_dim']
         ).to(self.device)
         
-        self.accuracy_calculator = AccuracyDefectCalculator(self.reference_model)
+        inference_config = self.config['inference']
+        self.window_inference = HipotWindowInference(
+            self.reference_model, self.device,
+            window_size=inference_config['window_size'],
+            stride=inference_config['stride'],
+            batch_size=inference_config['batch_size'],
+            max_windows=inference_config['max_windows'],
+            reconstruction_threshold=self.config['thresholds']['reconstruction_threshold']
+        )
+        self.accuracy_calculator = AccuracyDefectCalculator(self.reference_model, self.config['similarity'])
     
     def train_reference_model(self, training_data: List[pd.DataFrame]) -> Dict:
         """기준 모델 훈련"""
@@ -688,9 +2385,7 @@ class HipotAIAnalyzer:
         
         # 훈련 데이터셋 생성
         train_dataset = self._create_dataset(processed_data)
-        train_loader = DataLoader(train_dataset, 
-                                batch_size=self.config['training']['batch_size'], 
-                                shuffle=True)
+        train_loader = self._create_data_loader(train_dataset)
         
         # 모델 훈련
         training_results = self._train_model(train_loader)
@@ -700,179 +2395,492 @@ class HipotAIAnalyzer:
         
         return training_results
     
-    def analyze_test_session(self, test_data: pd.DataFrame) -> Dict:
-        """완전한 테스트 세션 분석"""
+    def analyze_test_session(self, test_data: pd.DataFrame, async_plots: bool = False,
+                             plot_options: Optional[Dict] = None, inline_plots: bool = False,
+                             include_heatmap: bool = False, include_inference: Optional[bool] = None,
+                             inference_windows: bool = False) -> Dict:
+        """완전한 테스트 세션 분석
+        
+        async_plots가 True이면 그래프는 렌더링 큐에 등록만 하고 즉시 반환하며,
+        리포트의 'plot_job'으로 작업 상태를 조회할 수 있다.
+        inline_plots가 True이면 그래프를 저장소에 넣지 않고 인코딩된 이미지를 'plot_images'로 반환한다.
+        plot_options(dpi/fmt/full_resolution)는 이번 분석의 그래프에만 적용된다.
+        include_heatmap이 True이면 이상 탐지 히트맵 데이터를 'anomaly_heatmap'으로 함께 반환한다.
+        include_inference(None이면 inference.enabled 설정 또는 inference_windows)가 True이면
+        기준 모델 윈도우 추론 요약을 'model_inference'로 반환하고, inference_windows가 True이면
+        창별 결과까지 포함한다.
+        세션 통계(SessionStatistics)는 정확도, 그래프, 히트맵, 리포트 단계가 함께 사용해 한 번만 계산된다.
+        """
         
         if self.reference_model is None or self.accuracy_calculator is None:
             raise ValueError("모델이 초기화되지 않았습니다. train_reference_model을 먼저 실행하세요.")
         
-        # 1. 데이터 전처리
-        processed_data = self.preprocessor.preprocess(test_data)
-        
-        # 2. 기준 모델과 비교
-        accuracy_metrics = self.accuracy_calculator.calculate_accuracy(processed_data)
-        
-        # 3. 불합률 계산
-        test_results = processed_data.to_dict('records')
-        defect_metrics = self.accuracy_calculator.calculate_defect_rate(test_results)
+        # 1~3. 전처리, 기준 모델 비교, 불합률 계산
+        processed_data, stats, accuracy_metrics, defect_metrics = self._compute_session_metrics(test_data)
         
         # 4. 그래프 생성
-        comparison_plots = self.graph_generator.create_comparison_plots(
-            processed_data, self.reference_data
-        )
+        heatmap = None
+        if include_heatmap:
+            with stage_metrics.span('analyze.heatmap'):
+                heatmap = stats.anomaly_heatmap()
+        
+        plot_options = plot_options or {}
+        plot_images = None
+        with stage_metrics.span('analyze.plots'):
+            if inline_plots:
+                plot_images = self.graph_generator.render_figures(processed_data, self.reference_data,
+                                                                  stats=stats, **plot_options)
+                comparison_plots = []
+            elif async_plots:
+                job_id = self.plot_queue.submit(processed_data, self.reference_data, plot_options, stats)
+                comparison_plots = []
+            else:
+                comparison_plots = self.graph_generator.create_comparison_plots(
+                    processed_data, self.reference_data, stats=stats, **plot_options
+                )
         
         # 5. 결과 리포트 생성
-        report = self._generate_analysis_report(
-            accuracy_metrics, defect_metrics, comparison_plots, processed_data
-        )
+        with stage_metrics.span('analyze.report'):
+            report = self._generate_analysis_report(
+                accuracy_metrics, defect_metrics, comparison_plots, processed_data, stats
+            )
+        
+        if heatmap is not None:
+            report['anomaly_heatmap'] = heatmap
+        if plot_images is not None:
+            report['plot_images'] = plot_images
+        elif async_plots:
+            report['plot_job'] = self.plot_queue.status(job_id)
+        
+        self._attach_model_inference(report, processed_data, include_inference, inference_windows)
+        return report
+    
+    def submit_plots(self, test_data: pd.DataFrame, plot_options: Optional[Dict] = None,
+                     job_id: Optional[str] = None) -> Dict:
+        """원시 세션의 그래프 렌더링 작업 상태 반환 (job_id 작업이 큐에 없거나 실패했으면 다시 등록)
+        
+        작업 ID는 내용 해시이므로 캐시된 분석 결과에 남긴 ID로 기존 작업을 찾을 수 있다.
+        """
+        job = self.plot_queue.status(job_id) if job_id else None
+        if job is None or job['status'] == PlotRenderQueue.FAILED:
+            with stage_metrics.span('analyze.preprocess'):
+                processed_data = self.preprocessor.preprocess(test_data)
+            job = self.plot_queue.status(self.plot_queue.submit(processed_data, self.reference_data, plot_options))
+        return job
+    
+    def anomaly_heatmap(self, test_data: pd.DataFrame, num_windows: int = 20) -> Dict:
+        """전처리 후 이상 탐지 히트맵 데이터만 계산 (그래프 렌더링 없음)"""
+        if len(test_data) == 0:
+            raise ValueError("분석할 데이터가 없습니다.")
+        return SessionStatistics(self.preprocessor.preprocess(test_data)).anomaly_heatmap(num_windows)
+    
+    def analyze_session_metrics(self, test_data: pd.DataFrame, include_heatmap: bool = False,
+                                include_inference: Optional[bool] = None, inference_windows: bool = False) -> Dict:
+        """그래프 생성 없이 정확도/불합률 지표만 분석
+        
+        include_heatmap이면 히트맵 데이터를 포함한다. include_inference/inference_windows는
+        analyze_test_session과 같다 (False이면 모델이 있어도 윈도우 추론 생략).
+        """
+        if self.accuracy_calculator is None:
+            raise ValueError("모델이 초기화되지 않았습니다. train_reference_model을 먼저 실행하세요.")
         
+        processed_data, stats, accuracy_metrics, defect_metrics = self._compute_session_metrics(test_data)
+        report = self._generate_analysis_report(accuracy_metrics, defect_metrics, [], processed_data, stats)
+        if include_heatmap:
+            report['anomaly_heatmap'] = stats.anomaly_heatmap()
+        self._attach_model_inference(report, processed_data, include_inference, inference_windows)
         return report
     
-    def _create_dataset(self, data_list: List[pd.DataFrame]) -> TensorDataset:
-        """PyTorch 데이터셋 생성"""
-        sequences = []
-        
-        for data in data_list:
-            # 정규화된 특성 사용
-            features = ['time_norm', 'voltage_norm', 'current_norm', 'resistance_norm']
-            if all(col in data.columns for col in features):
-                seq = data[features].values.astype(np.float32)
-                sequences.append(seq)
-        
-        if not sequences:
-            # 기본 특성 사용
-            for data in data_list:
-                seq = data[['time', 'voltage', 'current', 'resistance']].values.astype(np.float32)
-                sequences.append(seq)
-        
-        # 시퀀스 길이 맞추기 (패딩 또는 트리밍)
-        max_len = max(len(seq) for seq in sequences)
-        min_len = min(len(seq) for seq in sequences)
-        target_len = min(max_len, 1000)  # 최대 1000 포인트로 제한
-        
-        padded_sequences = []
-        for seq in sequences:
-            if len(seq) > target_len:
-                # 균등하게 샘플링
-                indices = np.linspace(0, len(seq)-1, target_len).astype(int)
-                seq = seq[indices]
-            elif len(seq) < target_len:
-                # 마지막 값으로 패딩
-                padding = np.tile(seq[-1:], (target_len - len(seq), 1))
-                seq = np.vstack([seq, padding])
+    def run_model_inference(self, processed_data: pd.DataFrame, include_windows: bool = False) -> Dict:
+        """전처리된 세션에 대한 기준 모델 윈도우 추론 (include_windows이면 창별 결과 포함)"""
+        if self.window_inference is None:
+            raise ValueError("모델이 초기화되지 않았습니다. train_reference_model을 먼저 실행하세요.")
+        
+        return self.window_inference.run(processed_data, include_windows)
+    
+    def _attach_model_inference(self, report: Dict, processed_data: pd.DataFrame,
+                                include_inference: Optional[bool] = None, inference_windows: bool = False):
+        # 모델이 있는 분석기에서만 수행 (일괄 분석은 워커 수와 무관하게 지표만 계산)
+        if include_inference is None:
+            include_inference = self.config['inference']['enabled'] or inference_windows
+        if self.window_inference is not None and include_inference:
+            with stage_metrics.span('analyze.inference'):
+                report['model_inference'] = self.run_model_inference(processed_data, inference_windows)
+    
+    def analyze_sessions_batch(self, sessions: List[pd.DataFrame], max_workers: Optional[int] = None) -> Dict:
+        """여러 테스트 세션 일괄 분석 (프로세스 풀 병렬 처리)
+        
+        세션별 리포트(그래프, 모델 윈도우 추론 제외)와 전체 불합률 집계를 반환한다.
+        워커 프로세스에는 모델이 없으므로 max_workers와 관계없이 같은 지표만 계산한다.
+        분석에 실패한 세션은 {'error': 메시지}로 표시된다.
+        """
+        if self.accuracy_calculator is None or self.accuracy_calculator.reference_patterns is None:
+            raise ValueError("기준 패턴이 설정되지 않았습니다. train_reference_model을 먼저 실행하세요.")
+        
+        # 워커마다 따로 fit되지 않도록 전처리기를 먼저 학습
+        with self.preprocessor._lock:
+            if not self.preprocessor.is_fitted:
+                first_valid = next((data for data in sessions if len(data) > 0), None)
+                if first_valid is not None:
+                    self.preprocessor.fit(first_valid)
+        
+        if max_workers is None:
+            max_workers = self.config['batch']['max_workers'] or os.cpu_count() or 1
+        max_workers = min(max_workers, len(sessions))
+        
+        if max_workers <= 1:
+            reports = [_analyze_session_safely(self, data) for data in sessions]
+        else:
+            # 프로세스 간 전송 횟수를 줄이기 위해 워커당 여러 세션씩 묶어서 전달
+            chunksize = max(1, len(sessions) // (max_workers * 4))
+            initargs = (self.config, self.preprocessor, self.accuracy_calculator.reference_patterns)
+            try:
+                reports = list(_map_batch_sessions(sessions, max_workers, initargs, chunksize))
+            except BrokenProcessPool:
+                # 다음 요청은 새 풀에서 처리
+                _shutdown_batch_pool(wait=False)
+                raise
+        
+        return {
+            'results': reports,
+            'aggregate': self._aggregate_defect_metrics(reports)
+        }
+    
+    def _compute_session_metrics(self, test_data: pd.DataFrame
+                                 ) -> Tuple[pd.DataFrame, SessionStatistics, Dict, Dict]:
+        """전처리 후 정확도 및 불합률 지표 계산 (이후 단계가 공유할 세션 통계도 반환)"""
+        # 1. 데이터 전처리
+        with stage_metrics.span('analyze.preprocess'):
+            processed_data = self.preprocessor.preprocess(test_data)
+        stats = SessionStatistics(processed_data)
+        
+        # 2. 기준 모델과 비교
+        with stage_metrics.span('analyze.accuracy'):
+            accuracy_metrics = self.accuracy_calculator.calculate_accuracy(processed_data, stats)
+        
+        # 3. 불합률 계산 (열 배열 기반 벡터화 분류)
+        with stage_metrics.span('analyze.defect_rate'):
+            values = stats.values
+            defect_metrics = self.accuracy_calculator.calculate_defect_rate_columnar(
+                values[:, 0], values[:, 1], values[:, 2]
+            )
+        
+        return processed_data, stats, accuracy_metrics, defect_metrics
+    
+    def _aggregate_defect_metrics(self, reports: List[Dict]) -> Dict:
+        """세션별 불합률을 전체 측정값 기준으로 집계"""
+        defect_counts = {key: 0 for key, _ in AccuracyDefectCalculator.DEFECT_KEYS}
+        total_tests = 0
+        failed_sessions = 0
+        
+        for report in reports:
+            if 'error' in report:
+                failed_sessions += 1
+                continue
             
-            padded_sequences.append(seq)
+            session_defects = report['defect_metrics']
+            session_total = session_defects['total_tests']
+            total_tests += session_total
+            for key in defect_counts:
+                rate = session_defects['defect_breakdown'].get(key, 0.0)
+                defect_counts[key] += int(round(rate * session_total / 100))
+        
+        if total_tests == 0:
+            aggregate = {
+                'overall_defect_rate': 0.0,
+                'defect_breakdown': {},
+                'total_tests': 0,
+                'pass_rate': 0.0
+            }
+        else:
+            aggregate = self.accuracy_calculator._build_defect_metrics(defect_counts, total_tests)
+        
+        aggregate['sessions_analyzed'] = len(reports) - failed_sessions
+        aggregate['sessions_failed'] = failed_sessions
+        return aggregate
+    
+    def open_stream_session(self) -> HipotStreamingSession:
+        """실시간 측정용 증분 분석 세션 생성"""
+        if self.accuracy_calculator is None or self.accuracy_calculator.reference_patterns is None:
+            raise ValueError("기준 패턴이 설정되지 않았습니다. train_reference_model을 먼저 실행하세요.")
         
-        sequences_tensor = torch.FloatTensor(np.array(padded_sequences))
-        return TensorDataset(sequences_tensor, sequences_tensor)  # Autoencoder용
+        return HipotStreamingSession(self.accuracy_calculator)
+    
+    def _create_dataset(self, data_list: List[pd.DataFrame]) -> HipotWindowDataset:
+        """세션별 슬라이딩 윈도우 훈련 데이터셋 생성 (추론과 같은 특성 열 사용)"""
+        _load_torch()
+        training = self.config['training']
+        return HipotWindowDataset([_model_features(data) for data in data_list],
+                                  window_size=training.get('window_size', 100),
+                                  stride=training.get('window_stride', 50))
     
-    def _train_model(self, train_loader: DataLoader) -> Dict:
-        """모델 훈련 실행"""
+    def _create_data_loader(self, dataset: HipotWindowDataset) -> 'DataLoader':
+        """창 인덱스 배치 단위로 데이터셋을 조회하는 로더
+        
+        samples_per_epoch를 설정하면 매 epoch 전체 창 대신 임의 창을 그만큼 복원 추출한다.
+        """
+        _load_torch()
+        training = self.config['training']
+        samples = training.get('samples_per_epoch')
+        sampler = RandomSampler(dataset, replacement=samples is not None, num_samples=samples)
+        # batch_size=None: 배치 샘플러의 인덱스 목록을 그대로 데이터셋에 넘기고 자동 병합은 하지 않음
+        return DataLoader(dataset, sampler=BatchSampler(sampler, training['batch_size'], drop_last=False),
+                          batch_size=None)
+    
+    def _compile_for_training(self):
+        """훈련 forward에 사용할 모듈 (training.compile: None, 'torchscript', 'inductor')
+        
+        반환 모듈은 원본과 파라미터를 공유하므로 원본 state_dict로 저장/복원한다.
+        """
+        mode = self.config['training'].get('compile')
+        if not mode:
+            return self.reference_model
+        if mode == 'torchscript':
+            return torch.jit.script(self.reference_model)
+        if mode == 'inductor':
+            if not hasattr(torch, 'compile'):
+                raise ValueError("torch.compile을 지원하지 않는 torch 버전입니다.")
+            return torch.compile(self.reference_model, backend='inductor', dynamic=True)
+        raise ValueError(f"알 수 없는 훈련 컴파일 방식: {mode}")
+    
+    def _train_model(self, train_loader: 'DataLoader') -> Dict:
+        """모델 훈련 실행
+        
+        최적 가중치는 디스크 대신 메모리에 복사해 두었다가 마지막에 복원한다.
+        training.num_threads를 지정하면 훈련 동안만 torch 연산 스레드 수를 바꾼다.
+        """
+        training = self.config['training']
         self.reference_model.train()
+        model = self._compile_for_training()
         
         optimizer = optim.Adam(self.reference_model.parameters(), 
-                              lr=self.config['training']['learning_rate'])
+                              lr=training['learning_rate'])
         
         reconstruction_criterion = nn.MSELoss()
         classification_criterion = nn.CrossEntropyLoss()
+        classification_weight = training.get('classification_weight', 0.1)
         
         train_losses = []
+        epoch_throughput = []
         best_loss = float('inf')
+        best_state = None
         patience_counter = 0
         
-        for epoch in range(self.config['training']['epochs']):
-            epoch_loss = 0.0
-            
-            for batch_idx, (data, target) in enumerate(train_loader):
-                data = data.to(self.device)
-                target = target.to(self.device)
-                
-                optimizer.zero_grad()
-                
-                # Forward pass
-                outputs = self.reference_model(data)
-                
-                # Loss 계산
-                reconstruction_loss = reconstruction_criterion(outputs['decoded'], outputs['lstm_output'])
+        previous_threads = torch.get_num_threads()
+        if training.get('num_threads'):
+            torch.set_num_threads(training['num_threads'])
+        
+        try:
+            for epoch in range(training['epochs']):
+                epoch_loss = 0.0
+                epoch_samples = 0
+                batches = 0
+                started = time.perf_counter()
                 
-                # 가상의 분류 타겟 생성 (실제로는 라벨링된 데이터 필요)
-                batch_size = data.size(0)
-                fake_labels = torch.zeros(batch_size, dtype=torch.long).to(self.device)  # 모두 'VALID'로 가정
-                classification_loss = classification_criterion(outputs['classified'], fake_labels)
+                for batch_idx, data in enumerate(train_loader):
+                    data = data.to(self.device)
+                    
+                    optimizer.zero_grad(set_to_none=True)
+                    
+                    # Forward pass
+                    outputs = model(data)
+                    
+                    # Loss 계산
+                    total_loss = reconstruction_criterion(outputs['decoded'], outputs['lstm_output'])
+                    
+                    # 가상의 분류 타겟 (실제로는 라벨링된 데이터 필요) - 모두 'VALID'로 가정, 가중치 0이면 생략
+                    if classification_weight:
+                        fake_labels = torch.zeros(data.size(0), dtype=torch.long, device=self.device)
+                        classification_loss = classification_criterion(outputs['classified'], fake_labels)
+                        total_loss = total_loss + classification_weight * classification_loss
+                    
+                    total_loss.backward()
+                    optimizer.step()
+                    
+                    epoch_loss += total_loss.item()
+                    epoch_samples += data.size(0)
+                    batches += 1
                 
-                total_loss = reconstruction_loss + 0.1 * classification_loss
+                elapsed = time.perf_counter() - started
+                avg_loss = epoch_loss / max(batches, 1)
+                train_losses.append(avg_loss)
+                epoch_throughput.append(epoch_samples / elapsed if elapsed > 0 else 0.0)
                 
-                total_loss.backward()
-                optimizer.step()
+                # Early stopping
+                if avg_loss < best_loss:
+                    best_loss = avg_loss
+                    patience_counter = 0
+                    # 최적 가중치를 메모리에 복사
+                    best_state = {name: value.detach().clone()
+                                  for name, value in self.reference_model.state_dict().items()}
+                else:
+                    patience_counter += 1
+                    if patience_counter >= training['early_stopping_patience']:
+                        print(f"Early stopping at epoch {epoch}")
+                        break
                 
-                epoch_loss += total_loss.item()
-            
-            avg_loss = epoch_loss / len(train_loader)
-            train_losses.append(avg_loss)
-            
-            # Early stopping
-            if avg_loss < best_loss:
-                best_loss = avg_loss
-                patience_counter = 0
-                # 모델 저장
-                torch.save(self.reference_model.state_dict(), 'best_model.pth')
-            else:
-                patience_counter += 1
-                if patience_counter >= self.config['training']['early_stopping_patience']:
-                    print(f"Early stopping at epoch {epoch}")
-                    break
-            
-            if epoch % 10 == 0:
-                print(f"Epoch {epoch}, Loss: {avg_loss:.6f}")
-        
-        # 최적 모델 로드
-        self.reference_model.load_state_dict(torch.load('best_model.pth'))
+                if epoch % 10 == 0:
+                    print(f"Epoch {epoch}, Loss: {avg_loss:.6f}, {epoch_throughput[-1]:.1f} samples/s")
+        finally:
+            torch.set_num_threads(previous_threads)
+        
+        # 최적 모델 복원
+        if best_state is not None:
+            self.reference_model.load_state_dict(best_state)
         self.reference_model.eval()
         
         return {
             'final_loss': best_loss,
             'training_losses': train_losses,
-            'epochs_trained': len(train_losses)
+            'epochs_trained': len(train_losses),
+            'samples_per_second': epoch_throughput
         }
     
     def _set_reference_data(self, processed_data: List[pd.DataFrame]):
-        """기준 데이터 설정"""
+        """기준 데이터 설정 (세션이 여러 개면 병합 통계와 평균 템플릿으로 결합)"""
         if not processed_data:
             return
         
-        # 첫 번째 데이터를 기준으로 사용 (실제로는 더 정교한 로직 필요)
-        ref_data = processed_data[0]
+        self.reference_data = None
+        self._fold_reference_sessions(processed_data)
+    
+    def update_reference_data(self, sessions: List[pd.DataFrame]) -> Dict:
+        """새 기준(골든 샘플) 세션을 재훈련 없이 기준 데이터에 병합 - 새 데이터 크기에 비례하는 비용"""
+        if self.accuracy_calculator is None:
+            raise ValueError("모델이 초기화되지 않았습니다. train_reference_model을 먼저 실행하세요.")
+        
+        processed_data = [self.preprocessor.preprocess(data) for data in sessions if len(data) > 0]
+        if not processed_data:
+            raise ValueError("업데이트할 데이터가 없습니다.")
+        
+        self._fold_reference_sessions(processed_data)
+        return self.reference_summary()
+    
+    def reference_summary(self) -> Dict:
+        """기준 데이터 버전 정보"""
+        if self.reference_data is None:
+            return {'version': None, 'revision': 0, 'sessions': 0, 'samples': 0}
+        
+        return {
+            'version': self.reference_version,
+            'revision': self.reference_data.get('revision', 1),
+            'sessions': self.reference_data.get('sessions', 1),
+            'samples': int(self._reference_moments(self.reference_data).count)
+        }
+    
+    def _fold_reference_sessions(self, processed_data: List[pd.DataFrame]):
+        """기준 통계(개수/평균/M2)와 템플릿(세션 평균 파형)에 세션 병합
+        
+        기존 기준 데이터는 수정하지 않고 새 딕셔너리로 교체하므로
+        진행 중인 분석은 이전 기준을 그대로 사용한다.
+        """
+        current = self.reference_data
+        if current is None:
+            first = processed_data[0][list(REFERENCE_PARAMETERS)].to_numpy(dtype=np.float64)
+            features = first.copy()
+            moments = RunningStatistics(len(REFERENCE_PARAMETERS))
+            moments.update(first)
+            sessions, revision = 1, 0
+            processed_data = processed_data[1:]
+        else:
+            features = np.array(current['features'], dtype=np.float64)
+            moments = self._reference_moments(current)
+            sessions, revision = current.get('sessions', 1), current.get('revision', 1)
+        
+        for data in processed_data:
+            values = data[list(REFERENCE_PARAMETERS)].to_numpy(dtype=np.float64)
+            moments.update(values)
+            sessions += 1
+            # 템플릿 길이에 맞춰 정렬한 파형의 누적 평균
+            features += (self._align_to_template(values, len(features)) - features) / sessions
+        
+        std = moments.std()
+        statistics = {}
+        for i, param in enumerate(REFERENCE_PARAMETERS):
+            statistics[f'{param}_mean'] = float(moments.mean[i])
+            statistics[f'{param}_std'] = float(std[i])
         
         self.reference_data = {
-            'features': ref_data[['voltage', 'current', 'resistance']].values,
-            'voltage_ref': ref_data['voltage'].values,
-            'current_ref': ref_data['current'].values,
-            'resistance_ref': ref_data['resistance'].values,
-            'statistics': {
-                'voltage_mean': ref_data['voltage'].mean(),
-                'voltage_std': ref_data['voltage'].std(),
-                'current_mean': ref_data['current'].mean(),
-                'current_std': ref_data['current'].std(),
-                'resistance_mean': ref_data['resistance'].mean(),
-                'resistance_std': ref_data['resistance'].std()
-            }
+            'features': features,
+            'voltage_ref': features[:, 0],
+            'current_ref': features[:, 1],
+            'resistance_ref': features[:, 2],
+            'statistics': statistics,
+            'moments': moments.get_state(),
+            'sessions': sessions,
+            'revision': revision + 1
         }
         
         # 정확도 계산기에 기준 패턴 설정
         self.accuracy_calculator.set_reference_patterns(self.reference_data)
+        self._update_reference_version()
+    
+    def _reference_moments(self, reference_data: Dict) -> RunningStatistics:
+        """기준 데이터의 병합 통계 (병합 상태가 없는 이전 형식은 평균/표준편차로 복원)"""
+        if 'moments' in reference_data:
+            return RunningStatistics.from_state(reference_data['moments'])
+        
+        count = len(reference_data['features'])
+        moments = RunningStatistics(len(REFERENCE_PARAMETERS))
+        moments.count = count
+        moments.mean = np.array([reference_data['statistics'][f'{param}_mean'] for param in REFERENCE_PARAMETERS],
+                                dtype=np.float64)
+        std = np.array([reference_data['statistics'][f'{param}_std'] for param in REFERENCE_PARAMETERS],
+                       dtype=np.float64)
+        moments.m2 = std ** 2 * max(count - 1, 0)
+        return moments
+    
+    @staticmethod
+    def _align_to_template(values: np.ndarray, length: int) -> np.ndarray:
+        """세션 파형을 템플릿 길이로 선형 보간 (시작/끝 정렬)"""
+        if len(values) == length:
+            return values
+        
+        positions = np.linspace(0, len(values) - 1, length)
+        source = np.arange(len(values))
+        return np.column_stack([np.interp(positions, source, values[:, i]) for i in range(values.shape[1])])
+    
+    def _update_reference_version(self):
+        """기준 데이터/모델 가중치/전처리 파라미터가 바뀔 때마다 달라지는 버전 식별자 갱신
+        
+        같은 기준 데이터로 다시 훈련하거나 이상치 판정 방식을 바꿔도 버전이 달라지므로
+        이 버전을 키로 쓰는 분석 결과 캐시가 이전 결과를 반환하지 않는다.
+        """
+        if self.reference_data is None:
+            self.reference_version = None
+            return
+        
+        digest = hashlib.blake2b(digest_size=8)
+        digest.update(REFERENCE_VERSION_FORMAT.to_bytes(2, 'little'))
+        digest.update(json.dumps([self.config['model'], self.preprocessor.outlier_method], sort_keys=True).encode())
+        digest.update(json.dumps([self.reference_data.get('revision'), self.reference_data.get('sessions')]).encode())
+        for key in ('features', 'voltage_ref', 'current_ref', 'resistance_ref'):
+            if key in self.reference_data:
+                digest.update(key.encode())
+                digest.update(np.ascontiguousarray(self.reference_data[key]).tobytes())
+        if self.reference_model is not None:
+            _update_state_digest(digest, {name: tensor.detach().cpu().numpy()
+                                          for name, tensor in self.reference_model.state_dict().items()})
+        _update_state_digest(digest, self.preprocessor.get_state())
+        self.reference_version = digest.hexdigest()
     
     def _generate_analysis_report(self, accuracy_metrics: Dict, defect_metrics: Dict, 
-                                plot_paths: List[str], processed_data: pd.DataFrame) -> Dict:
+                                plot_paths: List[str], processed_data: pd.DataFrame,
+                                stats: Optional[SessionStatistics] = None) -> Dict:
         """분석 리포트 생성"""
         
+        if stats is None:
+            stats = SessionStatistics(processed_data)
+        low, high = stats.extrema()
+        
         return {
             'timestamp': datetime.now().isoformat(),
             'test_summary': {
                 'data_points': len(processed_data),
-                'test_duration': processed_data['time'].max() - processed_data['time'].min() if 'time' in processed_data.columns else 0,
-                'voltage_range': [processed_data['voltage'].min(), processed_data['voltage'].max()],
-                'current_range': [processed_data['current'].min(), processed_data['current'].max()],
-                'resistance_range': [processed_data['resistance'].min(), processed_data['resistance'].max()]
+                'test_duration': stats.duration,
+                'voltage_range': [low[0], high[0]],
+                'current_range': [low[1], high[1]],
+                'resistance_range': [low[2], high[2]]
             },
             'accuracy_metrics': accuracy_metrics,
             'defect_metrics': defect_metrics,
@@ -902,25 +2910,403 @@ class HipotAIAnalyzer:
         return recommendations
     
     def save_model(self, filepath: str):
-        """모델 저장"""
+        """모델 저장 (텐서와 기본 타입만 포함 - weights_only 로드 가능)
+        
+        기준 템플릿 배열은 체크포인트 옆의 <이름>.ref-<버전>.npy 파일에 따로 저장하고
+        체크포인트에는 파일 이름과 작은 메타데이터만 남긴다. 전처리기의 큰 배열(판정 격자 등)도
+        내용 해시로 이름 붙인 <이름>.ref-pre-<해시>.npy에 저장한다. 모든 파일은 임시 파일에 쓴 뒤 교체한다.
+        """
+        if self.reference_model is None:
+            return
+        
+        reference_data = self.reference_data
+        array_path = None
+        if reference_data is not None and 'features' in reference_data:
+            array_path = _reference_array_path(filepath, self.reference_version)
+            # 버전이 같으면 내용도 같으므로 기존 배열 파일 재사용
+            if not os.path.exists(array_path):
+                with open(f'{array_path}.tmp', 'wb') as f:
+                    # 파라미터별로 연속된 (3, N) 배치 - 매핑된 행을 그대로 *_ref로 사용
+                    np.save(f, np.ascontiguousarray(np.asarray(reference_data['features'], dtype=np.float64).T))
+                os.replace(f'{array_path}.tmp', array_path)
+            reference_data = {key: value for key, value in reference_data.items()
+                              if key not in REFERENCE_ARRAY_KEYS}
+            reference_data['features_file'] = os.path.basename(array_path)
+        
+        array_paths = [array_path] if array_path else []
+        preprocessor_state = _store_sidecar_arrays(self.preprocessor.get_state(), filepath, array_paths)
+        torch.save(self._checkpoint(reference_data, preprocessor_state), f'{filepath}.tmp')
+        os.replace(f'{filepath}.tmp', filepath)
+        _remove_stale_reference_arrays(filepath, keep=array_paths)
+    
+    def export_checkpoint(self, fileobj):
+        """기준 배열을 포함한 단일 파일 체크포인트 (다른 환경으로 옮길 때 사용, load_model로 로드 가능)"""
         if self.reference_model is not None:
-            torch.save({
-                'model_state_dict': self.reference_model.state_dict(),
-                'config': self.config,
-                'reference_data': self.reference_data
-            }, filepath)
+            torch.save(self._checkpoint(self.reference_data), fileobj)
+    
+    def _checkpoint(self, reference_data: Optional[Dict], preprocessor_state: Optional[Dict] = None) -> Dict:
+        if preprocessor_state is None:
+            preprocessor_state = self.preprocessor.get_state()
+        return {
+            'model_state_dict': self.reference_model.state_dict(),
+            'config': self.config,
+            'reference_data': _to_checkpoint(reference_data),
+            'reference_version': self.reference_version,
+            'reference_version_format': REFERENCE_VERSION_FORMAT,
+            'preprocessor': _to_checkpoint(preprocessor_state)
+        }
     
     def load_model(self, filepath: str):
-        """모델 로드"""
-        checkpoint = torch.load(filepath, map_location=self.device)
+        """모델 로드 (분리 저장된 기준 배열은 mmap_mode='r'로 매핑하여 프로세스 간 페이지 공유)"""
+        _load_torch()
+        checkpoint = torch.load(filepath, map_location='cpu', weights_only=True)
         
         self.config.update(checkpoint['config'])
+        # 체크포인트의 전처리 설정(이상치 판정 방식 등)으로 전처리기 재생성 후 아래에서 학습 파라미터 복원
+        self.preprocessor = HipotDataPreprocessor(**self.config['preprocessing'])
         self.initialize_model()
         self.reference_model.load_state_dict(checkpoint['model_state_dict'])
-        self.reference_data = checkpoint['reference_data']
+        reference_data = _from_checkpoint(checkpoint['reference_data'])
+        
+        if reference_data and 'features_file' in reference_data:
+            array_path = os.path.join(os.path.dirname(filepath), reference_data.pop('features_file'))
+            columns = np.load(array_path, mmap_mode='r')
+            reference_data.update(features=columns.T, voltage_ref=columns[0],
+                                  current_ref=columns[1], resistance_ref=columns[2])
+        self.reference_data = reference_data
         
+        if 'preprocessor' in checkpoint:
+            self.preprocessor.load_state(_load_sidecar_arrays(_from_checkpoint(checkpoint['preprocessor']), filepath))
         if self.reference_data:
             self.accuracy_calculator.set_reference_patterns(self.reference_data)
+        if (checkpoint.get('reference_version') and checkpoint.get('reference_version_format') == REFERENCE_VERSION_FORMAT
+                and reference_data and 'features' in reference_data):
+            # 저장 시 버전 재사용 - 다시 해시하면 매핑된 배열 전체를 읽게 됨 (이전 형식 버전은 다시 계산)
+            self.reference_version = checkpoint['reference_version']
+        else:
+            self._update_reference_version()
+
+# 기준 버전 해시 구성이 바뀌면 올림 (이전 형식으로 저장된 버전은 로드 시 다시 계산)
+REFERENCE_VERSION_FORMAT = 2
+
+def _update_state_digest(digest, value):
+    """중첩된 상태 사전(배열/기본 타입)을 키 순서대로 해시에 반영"""
+    if isinstance(value, dict):
+        for key in sorted(value):
+            digest.update(str(key).encode())
+            _update_state_digest(digest, value[key])
+    elif isinstance(value, np.ndarray):
+        digest.update(f'{value.dtype.str}:{value.shape}'.encode())
+        digest.update(np.ascontiguousarray(value).tobytes())
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            _update_state_digest(digest, item)
+    else:
+        digest.update(repr(value).encode())
+
+def _to_checkpoint(value):
+    """NumPy 배열/스칼라를 텐서/파이썬 기본 타입으로 변환 (weights_only 언피클러 호환)"""
+    if isinstance(value, np.ndarray):
+        return torch.from_numpy(np.ascontiguousarray(value))
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, dict):
+        return {key: _to_checkpoint(item) for key, item in value.items()}
+    return value
+
+def _from_checkpoint(value):
+    if isinstance(value, torch.Tensor):
+        return value.numpy()
+    if isinstance(value, dict):
+        return {key: _from_checkpoint(item) for key, item in value.items()}
+    return value
+
+def _reference_array_path(filepath: str, version: Optional[str]) -> str:
+    stem = os.path.splitext(filepath)[0]
+    return f'{stem}.ref-{version or "none"}.npy'
+
+# 이 크기 이상의 전처리기 배열은 체크포인트 옆 .npy 파일로 분리
+SIDECAR_ARRAY_MIN_SIZE = 4096
+
+def _store_sidecar_arrays(value, filepath: str, written: List[str]):
+    """큰 배열을 내용 해시로 이름 붙인 .npy 파일에 저장하고 {'array_file': 파일 이름}으로 대체"""
+    if isinstance(value, dict):
+        return {key: _store_sidecar_arrays(item, filepath, written) for key, item in value.items()}
+    if not isinstance(value, np.ndarray) or value.size < SIDECAR_ARRAY_MIN_SIZE:
+        return value
+    
+    array = np.ascontiguousarray(value)
+    digest = hashlib.blake2b(array.tobytes(), digest_size=8)
+    digest.update(repr((array.dtype.str, array.shape)).encode())
+    path = _reference_array_path(filepath, f'pre-{digest.hexdigest()}')
+    if not os.path.exists(path):
+        with open(f'{path}.tmp', 'wb') as f:
+            np.save(f, array)
+        os.replace(f'{path}.tmp', path)
+    written.append(path)
+    return {'array_file': os.path.basename(path)}
+
+def _load_sidecar_arrays(value, filepath: str):
+    """_store_sidecar_arrays로 분리한 배열을 mmap_mode='r'로 매핑하여 되돌림"""
+    if isinstance(value, dict):
+        if set(value) == {'array_file'}:
+            return np.load(os.path.join(os.path.dirname(filepath), value['array_file']), mmap_mode='r')
+        return {key: _load_sidecar_arrays(item, filepath) for key, item in value.items()}
+    return value
+
+# 체크포인트가 더 이상 가리키지 않는 배열 파일을 남겨 두는 시간 (초)
+REFERENCE_ARRAY_GRACE_SECONDS = 300.0
+
+def _remove_stale_reference_arrays(filepath: str, keep: Optional[List[str]] = None,
+                                   grace: float = REFERENCE_ARRAY_GRACE_SECONDS):
+    """체크포인트가 grace초 이상 가리키지 않은 이전 버전 배열 파일 삭제
+    
+    현재 체크포인트가 가리키는 파일은 수정 시각을 갱신하므로, 이전 파일의 수정 시각은
+    마지막으로 참조된 저장 시각이 된다. 교체 직전의 체크포인트를 읽은 다른 프로세스가
+    배열 파일을 열 때까지 유예 시간 동안 남겨 둔다. 이미 매핑한 프로세스는 삭제 후에도
+    기존 페이지를 계속 읽을 수 있다 (POSIX).
+    """
+    directory = os.path.dirname(os.path.abspath(filepath))
+    prefix = f'{os.path.basename(os.path.splitext(filepath)[0])}.ref-'
+    keep = {os.path.abspath(path) for path in keep or ()}
+    for path in keep:
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+    
+    now = time.time()
+    for filename in os.listdir(directory):
+        path = os.path.join(directory, filename)
+        if not (filename.startswith(prefix) and filename.endswith('.npy')) or path in keep:
+            continue
+        try:
+            if now - os.path.getmtime(path) >= grace:
+                os.remove(path)
+        except OSError:
+            pass
+
+class HipotReferenceRegistry:
+    """제품/시험 모드별 기준 모델 레지스트리
+    
+    (제품, 시험 모드)마다 base_dir/<제품>__<모드>.pth 체크포인트를 두고,
+    요청이 들어온 키만 디스크에서 지연 로드하여 최근 사용한 max_loaded개를 메모리에 유지한다.
+    refresh_interval(초)을 주면 메모리의 분석기도 그 주기로 체크포인트 수정 시각을 확인하여
+    다른 프로세스가 저장한 변경을 다시 로드한다 (다중 워커 서버용).
+    """
+    
+    TEST_MODES = ('AC', 'DC', 'IR')
+    _PRODUCT_PATTERN = re.compile(r'^[A-Za-z0-9][A-Za-z0-9_.-]{0,63}$')
+    
+    def __init__(self, base_dir: str, max_loaded: int = 8, config_path: Optional[str] = None,
+                 plot_queue: Optional[PlotRenderQueue] = None, refresh_interval: Optional[float] = None):
+        self.base_dir = base_dir
+        self.max_loaded = max_loaded
+        self.config_path = config_path
+        self.plot_queue = plot_queue if plot_queue is not None else PlotRenderQueue(HipotGraphGenerator())
+        self.refresh_interval = refresh_interval
+        
+        self._analyzers = OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        self._mtimes = {}
+        self._checked_at = {}
+        self._hits = 0
+        self._loads = 0
+        self._evictions = 0
+    
+    @classmethod
+    def make_key(cls, product: str, test_mode: str) -> Tuple[str, str]:
+        """키 검증 및 정규화 (제품명은 파일명으로 쓰이므로 경로 문자 불허)"""
+        test_mode = str(test_mode).upper()
+        if test_mode not in cls.TEST_MODES:
+            raise ValueError(f"지원하지 않는 시험 모드입니다: {test_mode} (가능: {', '.join(cls.TEST_MODES)})")
+        if not cls._PRODUCT_PATTERN.match(str(product)):
+            raise ValueError(f"잘못된 제품 식별자입니다: {product}")
+        return str(product), test_mode
+    
+    def path_for(self, key: Tuple[str, str]) -> str:
+        return os.path.join(self.base_dir, f'{key[0]}__{key[1]}.pth')
+    
+    def get(self, product: str, test_mode: str, create: bool = False,
+            refresh: bool = False) -> Optional['HipotAIAnalyzer']:
+        """키에 해당하는 분석기 반환 (메모리 → 디스크 순서, 없으면 create일 때만 새로 생성)
+        
+        refresh가 True이면 주기와 관계없이 디스크의 체크포인트가 바뀌었는지 확인한다.
+        """
+        key = self.make_key(product, test_mode)
+        
+        with self._lock:
+            analyzer = self._analyzers.get(key)
+            if analyzer is not None and self._is_stale(key, refresh):
+                del self._analyzers[key]
+                analyzer = None
+            if analyzer is not None:
+                self._analyzers.move_to_end(key)
+                self._hits += 1
+                return analyzer
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        
+        # 같은 키를 동시에 요청해도 체크포인트는 한 번만 로드
+        with key_lock:
+            with self._lock:
+                analyzer = self._analyzers.get(key)
+            if analyzer is not None:
+                return analyzer
+            
+            path = self.path_for(key)
+            if os.path.exists(path):
+                mtime = os.stat(path).st_mtime_ns
+                analyzer = self.new_analyzer()
+                analyzer.load_model(path)
+                with self._lock:
+                    self._loads += 1
+                    self._mtimes[key] = mtime
+            elif create:
+                analyzer = self.new_analyzer()
+                analyzer.initialize_model()
+            else:
+                return None
+            
+            self._insert(key, analyzer)
+            return analyzer
+    
+    def save(self, product: str, test_mode: str, analyzer: Optional['HipotAIAnalyzer'] = None):
+        """키의 분석기를 체크포인트로 저장 (analyzer를 주면 해당 키로 등록)"""
+        key = self.make_key(product, test_mode)
+        if analyzer is None:
+            with self._lock:
+                analyzer = self._analyzers[key]
+        else:
+            self._insert(key, analyzer)
+        
+        os.makedirs(self.base_dir, exist_ok=True)
+        # save_model이 임시 파일에 쓴 뒤 교체하므로 다른 프로세스가 쓰는 중인 파일을 읽지 않음
+        analyzer.save_model(self.path_for(key))
+        with self._lock:
+            self._mtimes[key] = os.stat(self.path_for(key)).st_mtime_ns
+    
+    def keys(self) -> List[Tuple[str, str]]:
+        """디스크에 저장되었거나 메모리에 있는 키 목록"""
+        keys = set()
+        if os.path.isdir(self.base_dir):
+            for filename in os.listdir(self.base_dir):
+                stem, ext = os.path.splitext(filename)
+                if ext == '.pth' and '__' in stem:
+                    product, test_mode = stem.rsplit('__', 1)
+                    keys.add((product, test_mode))
+        with self._lock:
+            keys.update(self._analyzers)
+        return sorted(keys)
+    
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'loaded': [list(key) for key in self._analyzers],
+                'max_loaded': self.max_loaded,
+                'hits': self._hits,
+                'loads': self._loads,
+                'evictions': self._evictions
+            }
+    
+    def new_analyzer(self) -> 'HipotAIAnalyzer':
+        """레지스트리 설정/렌더링 큐를 공유하는 새 분석기 (등록은 save로)"""
+        return HipotAIAnalyzer(self.config_path, plot_queue=self.plot_queue)
+    
+    def _is_stale(self, key: Tuple[str, str], force: bool) -> bool:
+        """메모리의 분석기가 디스크 체크포인트보다 오래되었는지 (self._lock 안에서 호출)"""
+        if not force:
+            if self.refresh_interval is None:
+                return False
+            now = time.monotonic()
+            if now - self._checked_at.get(key, 0.0) < self.refresh_interval:
+                return False
+            self._checked_at[key] = now
+        
+        try:
+            mtime = os.stat(self.path_for(key)).st_mtime_ns
+        except FileNotFoundError:
+            return False
+        return mtime != self._mtimes.get(key)
+    
+    def _insert(self, key: Tuple[str, str], analyzer: 'HipotAIAnalyzer'):
+        with self._lock:
+            self._analyzers[key] = analyzer
+            self._analyzers.move_to_end(key)
+            # 제거된 분석기는 진행 중인 요청이 끝나면 GC로 회수 (체크포인트는 디스크에 유지)
+            while len(self._analyzers) > self.max_loaded:
+                self._analyzers.popitem(last=False)
+                self._evictions += 1
+
+# 일괄 분석 프로세스 풀 워커
+_batch_worker_analyzer = None
+
+def _init_batch_worker(config: Dict, preprocessor: HipotDataPreprocessor, reference_patterns: Dict):
+    """워커 프로세스별 분석기 초기화 (학습된 전처리기와 기준 패턴 공유)"""
+    global _batch_worker_analyzer
+    analyzer = HipotAIAnalyzer()
+    analyzer.config = config
+    # 프로세스 단위로 병렬화하므로 워커 내부의 joblib 병렬 처리는 끔
+    if preprocessor.outlier_method == 'isolation_forest':
+        preprocessor.outlier_detector.set_params(n_jobs=1)
+    preprocessor.n_workers = 1
+    analyzer.preprocessor = preprocessor
+    analyzer.accuracy_calculator = AccuracyDefectCalculator(None, config['similarity'])
+    analyzer.accuracy_calculator.set_reference_patterns(reference_patterns)
+    _batch_worker_analyzer = analyzer
+
+def _analyze_batch_session(test_data: pd.DataFrame) -> Dict:
+    return _analyze_session_safely(_batch_worker_analyzer, test_data)
+
+# 프로세스당 하나의 일괄 분석 풀 (요청마다 워커를 새로 만들지 않고 재사용)
+_batch_pool = None
+_batch_pool_key = None
+_batch_pool_lock = threading.Lock()
+
+def _batch_pool_context():
+    """워커 시작 방식 - 스레드 서버에서 fork하면 다른 스레드가 잡은 잠금까지 복제되므로 forkserver/spawn 사용"""
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+
+def _map_batch_sessions(sessions: List[pd.DataFrame], max_workers: int, initargs: Tuple, chunksize: int):
+    """프로세스 풀로 세션 분석 작업 등록 후 결과 반복자 반환
+    
+    풀은 처음 사용할 때 만들고, 워커 수나 워커 상태(설정/전처리기/기준 패턴)가 바뀔 때만 다시 만든다.
+    이전 풀은 이미 등록된 작업을 마친 뒤 종료된다.
+    """
+    global _batch_pool, _batch_pool_key
+    digest = hashlib.blake2b(pickle.dumps(initargs, protocol=pickle.HIGHEST_PROTOCOL), digest_size=16)
+    key = (os.getpid(), max_workers, digest.hexdigest())
+    
+    with _batch_pool_lock:
+        if _batch_pool_key != key:
+            # 다른 프로세스(fork 이전 부모)의 풀은 이 프로세스에서 종료하지 않음
+            if _batch_pool is not None and _batch_pool_key[0] == os.getpid():
+                _batch_pool.shutdown(wait=False)
+            _batch_pool = ProcessPoolExecutor(max_workers=max_workers, mp_context=_batch_pool_context(),
+                                              initializer=_init_batch_worker, initargs=initargs)
+            _batch_pool_key = key
+        # 작업 등록까지 잠금 안에서 해야 다른 요청이 풀을 교체해도 등록이 실패하지 않음
+        return _batch_pool.map(_analyze_batch_session, sessions, chunksize=chunksize)
+
+def _shutdown_batch_pool(wait: bool = True):
+    """일괄 분석 풀 종료 (프로세스 종료 시, 워커가 비정상 종료되어 풀이 깨졌을 때)"""
+    global _batch_pool, _batch_pool_key
+    with _batch_pool_lock:
+        if _batch_pool is not None and _batch_pool_key[0] == os.getpid():
+            _batch_pool.shutdown(wait=wait, cancel_futures=True)
+        _batch_pool = _batch_pool_key = None
+
+atexit.register(_shutdown_batch_pool)
+
+def _analyze_session_safely(analyzer: 'HipotAIAnalyzer', test_data: pd.DataFrame) -> Dict:
+    """단일 세션 분석 - 실패 시 배치 전체를 중단하지 않고 오류 반환"""
+    try:
+        if len(test_data) == 0:
+            raise ValueError("분석할 데이터가 없습니다.")
+        return analyzer.analyze_session_metrics(test_data, include_inference=False)
+    except Exception as e:
+        return {'error': str(e)}
 
 # 사용 예시 및 테스트 함수
 def create_sample_data() -> pd.DataFrame:
@@ -972,8 +3358,11 @@ if __name__ == "__main__":
         print(f"- {recommendation}")
     
     print(f"\n생성된 그래프: {len(analysis_result['plots'])}개")
-    for plot_path in analysis_result['plots']:
-        print(f"- {plot_path}")
+    for artifact_id in analysis_result['plots']:
+        data, _ = analyzer.graph_generator.artifact_store.get(artifact_id)
+        with open(artifact_id, 'wb') as f:
+            f.write(data)
+        print(f"- {artifact_id}")
     
     # 모델 저장
     analyzer.save_model('hipot_reference_model.pth')
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Hipot AI Analyzer API 부하 테스트
+실행 중인 서버(또는 워커 수별로 직접 띄운 서버)에 동시 /analyze 요청을 보내
+처리량(요청/초)과 지연 시간 분위수를 보고합니다.
+
+    python flask_api.py --workers 4 &
+    python load_test.py --url http://127.0.0.1:5000 --concurrency 16 --requests 400
+    python load_test.py --spawn-workers 1 2 4 --concurrency 16 --requests 400 --output load.json
+"""
+
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import threading
+import subprocess
+import http.client
+from urllib.parse import urlsplit, urlencode
+from datetime import datetime
+import numpy as np
+
+from flask_api import COLUMNAR_CONTENT_TYPE, encode_columnar_session
+
+SERVER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'flask_api.py')
+LATENCY_QUANTILES = (0.5, 0.9, 0.95, 0.99)
+
+
+def make_payload(size: int, seed: int, binary: bool = True):
+    """create_sample_data와 같은 파형의 요청 본문 (시드마다 잡음이 달라 결과 캐시에 적중하지 않음)"""
+    rng = np.random.default_rng(seed)
+    time_values = np.linspace(0, 10 * size / 100, size)
+    voltage = 1000 + 500 * np.sin(0.5 * time_values) + rng.normal(0, 10, size)
+    current = 0.001 + 0.0005 * np.sin(0.3 * time_values + 0.5) + rng.normal(0, 0.00001, size)
+    resistance = voltage / current
+
+    if binary:
+        return encode_columnar_session(time_values, voltage, current, resistance), COLUMNAR_CONTENT_TYPE
+    body = json.dumps({
+        'Time': time_values.tolist(),
+        'Voltage': voltage.tolist(),
+        'Current': current.tolist(),
+        'Resistance': resistance.tolist()
+    }).encode()
+    return body, 'application/json'
+
+
+def run_load_test(url: str, payloads: list, concurrency: int, total_requests: int,
+                  query: dict = None, timeout: float = 60.0) -> dict:
+    """동시 연결 concurrency개로 total_requests개의 /analyze 요청을 보내고 처리량/지연 시간 집계
+
+    각 연결은 keep-alive로 재사용하며, payloads를 순서대로 돌려 사용한다.
+    """
+    parts = urlsplit(url)
+    path = '/analyze' + (f'?{urlencode(query)}' if query else '')
+    latencies = np.zeros(total_requests)
+    statuses = [None] * total_requests
+    counter = iter(range(total_requests))
+    counter_lock = threading.Lock()
+
+    def worker():
+        connection = None
+        while True:
+            with counter_lock:
+                index = next(counter, None)
+            if index is None:
+                break
+
+            body, content_type = payloads[index % len(payloads)]
+            started = time.perf_counter()
+            try:
+                if connection is None:
+                    connection = http.client.HTTPConnection(parts.hostname, parts.port, timeout=timeout)
+                connection.request('POST', path, body=body, headers={'Content-Type': content_type})
+                response = connection.getresponse()
+                response.read()
+                statuses[index] = response.status
+            except (OSError, http.client.HTTPException) as e:
+                statuses[index] = type(e).__name__
+                if connection is not None:
+                    connection.close()
+                connection = None
+            latencies[index] = time.perf_counter() - started
+        if connection is not None:
+            connection.close()
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    status_counts = {}
+    for status in statuses:
+        status_counts[str(status)] = status_counts.get(str(status), 0) + 1
+    ok = np.array([status == 200 for status in statuses])
+    ok_latencies = latencies[ok] if ok.any() else latencies
+
+    return {
+        'requests': total_requests,
+        'concurrency': concurrency,
+        'errors': int((~ok).sum()),
+        'status_counts': status_counts,
+        'seconds': elapsed,
+        'requests_per_second': total_requests / elapsed,
+        'latency_ms': {
+            **{f'p{int(q * 100)}': float(np.quantile(ok_latencies, q) * 1000) for q in LATENCY_QUANTILES},
+            'mean': float(ok_latencies.mean() * 1000),
+            'max': float(ok_latencies.max() * 1000)
+        }
+    }
+
+
+def spawn_server(workers: int, port: int, cwd: str = None, timeout: float = 120.0) -> subprocess.Popen:
+    """워커 workers개로 API 서버를 띄우고 /ready가 200을 반환할 때까지 대기"""
+    process = subprocess.Popen([sys.executable, SERVER_SCRIPT, '--workers', str(workers), '--port', str(port)],
+                               cwd=cwd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f'서버가 시작 중 종료되었습니다 (종료 코드 {process.returncode})')
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=2)
+            connection.request('GET', '/ready')
+            if connection.getresponse().status == 200:
+                connection.close()
+                return process
+            connection.close()
+        except OSError:
+            pass
+        time.sleep(0.2)
+    stop_server(process)
+    raise RuntimeError(f'{timeout:.0f}초 안에 서버가 준비되지 않았습니다.')
+
+
+def stop_server(process: subprocess.Popen):
+    process.terminate()
+    try:
+        process.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+def _print_result(label: str, result: dict):
+    latency = result['latency_ms']
+    print(f"{label:<12} {result['requests_per_second']:8.1f} req/s | "
+          f"p50 {latency['p50']:8.1f} ms | p95 {latency['p95']:8.1f} ms | p99 {latency['p99']:8.1f} ms | "
+          f"오류 {result['errors']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Hipot AI Analyzer API 부하 테스트')
+    parser.add_argument('--url', default='http://127.0.0.1:5000', help='실행 중인 서버 주소')
+    parser.add_argument('--spawn-workers', type=int, nargs='+', default=None,
+                        help='지정한 워커 수마다 서버를 직접 띄워 측정 (현재 디렉토리의 모델 사용)')
+    parser.add_argument('--port', type=int, default=5055, help='--spawn-workers로 띄우는 서버 포트')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=400)
+    parser.add_argument('--size', type=int, default=1000, help='세션당 측정 포인트 수')
+    parser.add_argument('--distinct', type=int, default=None,
+                        help='서로 다른 요청 본문 수 (기본: 요청 수 - 결과 캐시 미적중)')
+    parser.add_argument('--json', action='store_true', help='이진 열 블록 대신 JSON 본문 사용')
+    parser.add_argument('--product', help='기준 모델 레지스트리 제품 키')
+    parser.add_argument('--test-mode', help='기준 모델 레지스트리 시험 모드 키')
+    parser.add_argument('--output', help='측정 결과 JSON 저장 경로')
+    args = parser.parse_args()
+
+    query = None
+    if args.product or args.test_mode:
+        query = {'product': args.product, 'test_mode': args.test_mode}
+
+    # 워밍업 요청과 측정 요청이 같은 본문을 쓰지 않도록 시드를 나눔
+    distinct = args.distinct or args.requests
+    payloads = [make_payload(args.size, seed, binary=not args.json) for seed in range(distinct)]
+    warmup_payloads = [make_payload(args.size, distinct + seed, binary=not args.json)
+                       for seed in range(args.concurrency)]
+
+    def measure(url):
+        run_load_test(url, warmup_payloads, args.concurrency, args.concurrency, query)
+        return run_load_test(url, payloads, args.concurrency, args.requests, query)
+
+    results = []
+    print(f"=== /analyze 부하 테스트 (동시 {args.concurrency}, 요청 {args.requests}, {args.size} 포인트) ===")
+    if args.spawn_workers:
+        for workers in args.spawn_workers:
+            process = spawn_server(workers, args.port)
+            try:
+                result = measure(f'http://127.0.0.1:{args.port}')
+            finally:
+                stop_server(process)
+            result['workers'] = workers
+            results.append(result)
+            _print_result(f'워커 {workers}', result)
+
+        base = results[0]['requests_per_second']
+        for result in results:
+            result['scaling'] = result['requests_per_second'] / base
+        print("처리량 배율: " + " | ".join(f"{r['workers']}w {r['scaling']:.2f}x" for r in results))
+    else:
+        result = measure(args.url)
+        results.append(result)
+        _print_result(args.url, result)
+
+    if args.output:
+        environment = {
+            'timestamp': datetime.now().isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count()
+        }
+        with open(args.output, 'w') as f:
+            json.dump({'environment': environment, 'results': results}, f, indent=2)
+        print(f"\n결과 저장: {args.output}")
+
+    return 1 if any(result['errors'] for result in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
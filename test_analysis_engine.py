@@ -0,0 +1,864 @@
+#!/usr/bin/env python3
+"""
+분석 엔진 최적화 경로 검증 스크립트
+벡터화/고속 경로가 기존 스칼라 구현과 동일한 결과를 내는지 확인합니다.
+"""
+
+import io
+import os
+import sys
+import time
+import tempfile
+import threading
+import numpy as np
+import pandas as pd
+from datetime import datetime
+
+import torch
+
+import hipot_ai_analyzer
+from hipot_ai_analyzer import (AccuracyDefectCalculator, DataClassification, DOWNSAMPLE_METHODS, HipotAIAnalyzer,
+                               HipotDataPreprocessor, HipotGraphGenerator, HipotStreamingSession, HipotWindowDataset,
+                               HipotWindowInference, OUTLIER_METHODS, PatternSimilarityEngine, PlotArtifactStore, PlotRenderQueue, StageMetrics,
+                               _load_matplotlib, _remove_stale_reference_arrays, compute_anomaly_heatmap, create_sample_data, downsample_series,
+                               make_outlier_detector, SessionStatistics, stage_metrics)
+
+
+def _make_edge_case_arrays(size: int = 20000, seed: int = 7):
+    """분류 경계값을 포함한 측정값 배열 생성"""
+    rng = np.random.default_rng(seed)
+
+    voltage = rng.normal(1000, 400, size)
+    current = rng.normal(0.005, 0.006, size)
+    resistance = 10 ** rng.uniform(2, 13, size)
+
+    # 규칙 경계값 및 우선순위 충돌 케이스 주입
+    voltage[:50] = 0
+    current[:25] = 0
+    current[50:75] = 0.01
+    current[75:100] = np.nextafter(0.01, 1)
+    resistance[100:125] = 1e3
+    resistance[125:150] = 1e12
+    resistance[150:175] = -5
+    voltage[175:200] = -1
+    current[200:225] = np.nan
+    resistance[225:250] = np.inf
+
+    return voltage, current, resistance
+
+
+def test_vectorized_classification_parity():
+    """벡터화 분류와 스칼라 분류 규칙의 일치 여부"""
+    print("=== 벡터화 분류 일치성 테스트 ===")
+
+    calculator = AccuracyDefectCalculator(None)
+
+    for dtype in (np.float64, np.float32):
+        voltage, current, resistance = (arr.astype(dtype) for arr in _make_edge_case_arrays())
+        frame = pd.DataFrame({'voltage': voltage, 'current': current, 'resistance': resistance})
+        records = frame.to_dict('records')
+
+        codes = calculator.classify_measurements(voltage, current, resistance)
+        expected = [calculator._classify_test_result(record) for record in records]
+        actual = [calculator.CLASSIFICATION_CODES[code] for code in codes]
+        assert actual == expected, f"{dtype.__name__} 분류 결과 불일치"
+
+        scalar_metrics = calculator.calculate_defect_rate(records)
+        columnar_metrics = calculator.calculate_defect_rate_columnar(voltage, current, resistance)
+        assert columnar_metrics == scalar_metrics, f"{dtype.__name__} 불합률 결과 불일치"
+
+        # 모든 분류가 실제로 등장해야 의미 있는 비교
+        assert set(actual) == set(DataClassification)
+        print(f"✓ {dtype.__name__}: {len(records)}개 측정값 분류 및 불합률 일치")
+
+    empty = np.array([], dtype=np.float32)
+    assert calculator.calculate_defect_rate_columnar(empty, empty, empty) == calculator.calculate_defect_rate([])
+    print("✓ 빈 입력 결과 일치")
+
+
+def _make_reference_calculator(size: int = 500, seed: int = 11) -> AccuracyDefectCalculator:
+    """훈련 없이 기준 패턴만 설정한 계산기 생성"""
+    rng = np.random.default_rng(seed)
+    reference = pd.DataFrame({
+        'voltage': rng.normal(1000, 50, size),
+        'current': rng.normal(0.001, 0.0001, size),
+        'resistance': rng.normal(1e9, 1e8, size)
+    })
+
+    calculator = AccuracyDefectCalculator(None)
+    calculator.set_reference_patterns({
+        'features': reference.values,
+        'statistics': {
+            f'{param}_{stat}': getattr(reference[param], stat)()
+            for param in reference.columns for stat in ('mean', 'std')
+        }
+    })
+    return calculator
+
+
+def test_streaming_session_matches_batch():
+    """증분 분석 세션 누적 지표와 전체 배치 계산 비교"""
+    print("\n=== 증분 분석 세션 테스트 ===")
+
+    calculator = _make_reference_calculator()
+    voltage, current, resistance = _make_edge_case_arrays(size=3000, seed=3)
+    frame = pd.DataFrame({
+        'time': np.arange(len(voltage)) * 0.01,
+        'voltage': voltage,
+        'current': np.nan_to_num(current),
+        'resistance': np.nan_to_num(resistance, posinf=1e13)
+    })
+
+    session = HipotStreamingSession(calculator)
+    assert session.snapshot()['defect_metrics']['total_tests'] == 0
+
+    chunk_times = []
+    for start in range(0, len(frame), 128):
+        chunk = frame.iloc[start:start + 128]
+        started = time.perf_counter()
+        snapshot = session.push(chunk['time'].values, chunk['voltage'].values,
+                                chunk['current'].values, chunk['resistance'].values)
+        chunk_times.append(time.perf_counter() - started)
+
+    # 불합률은 배치 결과와 정확히 일치
+    expected_defects = calculator.calculate_defect_rate_columnar(
+        frame['voltage'].values, frame['current'].values, frame['resistance'].values
+    )
+    assert snapshot['defect_metrics'] == expected_defects
+    print("✓ 누적 불합률 배치 결과와 일치")
+
+    # 누적 평균/표준편차 및 패턴 유사도는 부동소수점 오차 범위에서 일치
+    np.testing.assert_allclose(session.statistics.mean, frame[['voltage', 'current', 'resistance']].mean().values)
+    np.testing.assert_allclose(session.statistics.std(), frame[['voltage', 'current', 'resistance']].std().values)
+    assert abs(snapshot['accuracy_metrics']['statistical_match'] - calculator._calculate_statistical_match(frame)) < 1e-9
+    # 스트리밍 패턴 유사도는 기준 템플릿과 겹치는 앞부분의 코사인 유사도
+    overlap = min(len(frame), len(calculator.reference_patterns['features']))
+    test_part = frame[['voltage', 'current', 'resistance']].values[:overlap].ravel()
+    ref_part = calculator.reference_patterns['features'][:overlap].ravel()
+    expected_similarity = np.dot(test_part, ref_part) / (np.linalg.norm(test_part) * np.linalg.norm(ref_part))
+    assert abs(snapshot['accuracy_metrics']['pattern_similarity'] - min(1.0, expected_similarity)) < 1e-9
+    print("✓ 누적 통계량 및 패턴 유사도 배치 결과와 일치")
+
+    assert snapshot['test_summary']['data_points'] == len(frame)
+    assert snapshot['test_summary']['voltage_range'] == [frame['voltage'].min(), frame['voltage'].max()]
+    print(f"✓ 청크당 평균 갱신 시간: {np.mean(chunk_times) * 1000:.3f} ms")
+
+
+def test_batch_analysis_matches_serial():
+    """프로세스 풀 일괄 분석과 단일 프로세스 분석 결과 비교"""
+    print("\n=== 일괄 분석 테스트 ===")
+
+    analyzer = HipotAIAnalyzer()
+    # 모델이 있어도 단일 프로세스 경로가 윈도우 추론을 붙이지 않아야 워커 수와 무관한 결과가 됨
+    analyzer.initialize_model()
+    analyzer.accuracy_calculator = _make_reference_calculator()
+
+    sessions = [create_sample_data() for _ in range(6)] + [create_sample_data().iloc[:0]]
+    serial = analyzer.analyze_sessions_batch(sessions, max_workers=1)
+    parallel = analyzer.analyze_sessions_batch(sessions, max_workers=2)
+
+    for serial_report, parallel_report in zip(serial['results'], parallel['results']):
+        serial_report.pop('timestamp', None)
+        parallel_report.pop('timestamp', None)
+        assert 'model_inference' not in serial_report
+        assert serial_report == parallel_report
+    assert serial['aggregate'] == parallel['aggregate']
+    assert serial['aggregate']['sessions_failed'] == 1
+    # 같은 상태로 다시 요청하면 프로세스 풀을 재사용
+    pool = hipot_ai_analyzer._batch_pool
+    assert analyzer.analyze_sessions_batch(sessions, max_workers=2)['aggregate'] == parallel['aggregate']
+    assert hipot_ai_analyzer._batch_pool is pool
+    assert serial['aggregate']['total_tests'] == sum(
+        report['defect_metrics']['total_tests'] for report in serial['results'] if 'error' not in report
+    )
+    print(f"✓ 세션 {len(sessions)}개 일괄 분석 결과 및 집계 일치")
+
+
+class _CountingGraphGenerator:
+    """렌더링 횟수만 세는 그래프 생성기"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def create_comparison_plots(self, test_data, reference_data, timestamp=None):
+        self.calls += 1
+        return [f'plot_{timestamp}.png']
+
+
+def test_plot_render_queue_cache():
+    """같은 세션 데이터는 한 번만 렌더링되는지 확인"""
+    print("\n=== 그래프 렌더링 큐 테스트 ===")
+
+    generator = _CountingGraphGenerator()
+    queue = PlotRenderQueue(generator)
+    reference = {'voltage_ref': np.arange(10.0)}
+
+    first = queue.submit(create_sample_data(), reference)
+    second = queue.submit(create_sample_data(), reference)
+    other = queue.submit(create_sample_data().iloc[:50], reference)
+    queue._executor.shutdown(wait=True)
+
+    assert first == second and first != other
+    assert generator.calls == 2
+    job = queue.status(first)
+    assert job['status'] == PlotRenderQueue.DONE and first[:8] in job['plots'][0]
+    assert queue.status('unknown') is None
+    print("✓ 내용 해시 기반 작업 ID 재사용 및 렌더링 1회 수행")
+
+
+def _make_session_frame(size: int, dtype=np.float64, seed: int = 5) -> pd.DataFrame:
+    """create_sample_data와 같은 파형의 임의 길이 세션"""
+    rng = np.random.default_rng(seed)
+    time_values = np.linspace(0, size / 10, size)
+    voltage = 1000 + 500 * np.sin(0.5 * time_values) + rng.normal(0, 10, size)
+    current = 0.001 + 0.0005 * np.sin(0.5 * time_values + np.pi / 4) + rng.normal(0, 0.0001, size)
+    resistance = voltage / (current + 1e-10) + rng.normal(0, 1e6, size)
+    return pd.DataFrame({
+        'time': time_values, 'voltage': voltage, 'current': current, 'resistance': resistance
+    }).astype(dtype)
+
+
+def _assert_frames_close(actual: pd.DataFrame, expected: pd.DataFrame, rtol: float):
+    assert list(actual.columns) == list(expected.columns)
+    assert actual.index.equals(expected.index)
+    for column in expected.columns:
+        scale = np.abs(expected[column].values).max()
+        np.testing.assert_allclose(actual[column].values, expected[column].values,
+                                   rtol=rtol, atol=rtol * scale, err_msg=column)
+
+
+def test_fused_preprocessing_matches_stepwise():
+    """융합 전처리와 단계별 전처리 결과 비교"""
+    print("\n=== 융합 전처리 테스트 ===")
+
+    preprocessor = HipotDataPreprocessor()
+    preprocessor.fit(_make_session_frame(2000))
+
+    for dtype, rtol in ((np.float64, 1e-9), (np.float32, 1e-5)):
+        for size in (15, 100, 20000):
+            data = _make_session_frame(size, dtype)
+            data.iloc[3, 1] = np.nan
+            expected = preprocessor._preprocess_small_data(data)
+            actual = preprocessor._preprocess_fused(data)
+            _assert_frames_close(actual, expected, rtol)
+            assert (actual.dtypes == dtype).all()
+        print(f"✓ {dtype.__name__}: 단계별 전처리와 결과 일치")
+
+
+def test_parallel_preprocessing_matches_serial():
+    """구간 병렬 전처리와 단일 블록 전처리의 비트 단위 일치"""
+    print("\n=== 구간 병렬 전처리 테스트 ===")
+
+    preprocessor = HipotDataPreprocessor(n_workers=4, chunk_size=1000)
+    preprocessor.fit(_make_session_frame(2000))
+
+    for dtype in (np.float64, np.float32):
+        # 구간 경계가 이동평균 창 안에 걸리는 길이 포함
+        for size in (1003, 20000):
+            data = _make_session_frame(size, dtype)
+            data.iloc[3, 1] = np.nan
+            expected = preprocessor._preprocess_fused(data)
+            actual = preprocessor._preprocess_large_data(data)
+            assert list(actual.columns) == list(expected.columns)
+            assert actual.index.equals(expected.index)
+            assert np.array_equal(actual.values, expected.values)
+        print(f"✓ {dtype.__name__}: 구간 병렬 결과 비트 단위 일치")
+
+    assert len(preprocessor._split_ranges(20000)) == 8
+    assert preprocessor._split_ranges(10) == [(0, 10)]
+    print("✓ 워커 수와 구간 크기에 따른 분할")
+
+
+def test_window_inference_matches_single_windows():
+    """배치 윈도우 추론과 창별 단일 추론 결과 비교"""
+    print("\n=== 슬라이딩 윈도우 추론 테스트 ===")
+
+    analyzer = HipotAIAnalyzer()
+    analyzer.initialize_model()
+    analyzer.reference_model.train()  # 추론 시 eval 모드로 전환되는지 확인
+    inference = HipotWindowInference(analyzer.reference_model, analyzer.device,
+                                     window_size=50, stride=20, batch_size=8)
+
+    preprocessor = HipotDataPreprocessor()
+    data = _make_session_frame(1000)
+    preprocessor.fit(data)
+    processed = preprocessor.preprocess(data)
+
+    result = inference.run(processed, include_windows=True)
+    assert not analyzer.reference_model.training
+    windows, starts = inference.make_windows(processed)
+    assert result['num_windows'] == len(windows) == (len(processed) - 50) // 20 + 1
+    assert result['window_starts'] == starts.tolist()
+
+    with torch.no_grad():
+        for index in (0, len(windows) // 2, len(windows) - 1):
+            outputs = analyzer.reference_model(torch.from_numpy(windows[index:index + 1].copy()))
+            error = ((outputs['decoded'] - outputs['lstm_output']) ** 2).mean().item()
+            probabilities = torch.softmax(outputs['classified'], dim=1)[0].numpy()
+            assert abs(result['reconstruction_error'][index] - error) < 1e-5
+            np.testing.assert_allclose(result['class_probabilities'][index], probabilities, atol=1e-5)
+    assert sum(result['predicted_classes'].values()) == result['num_windows']
+    print(f"✓ 창 {result['num_windows']}개 배치 추론 결과 단일 추론과 일치")
+
+    short = inference.run(processed.iloc[:10])
+    assert short['num_windows'] == 1
+    print("✓ 창 길이보다 짧은 세션은 패딩 후 1개 창으로 추론")
+
+    # 창 수 상한 - 간격을 정수배로 늘린 창만 추론하고 창별 목록은 요청할 때만 반환
+    inference.max_windows = 10
+    capped = inference.run(processed)
+    assert capped['num_windows'] <= 10 and capped['stride'] % 20 == 0 and 'reconstruction_error' not in capped
+    step = capped['stride'] // 20
+    capped_windows = inference.run(processed, include_windows=True)
+    assert capped_windows['window_starts'] == starts[::step].tolist()
+    np.testing.assert_allclose(capped_windows['reconstruction_error'], result['reconstruction_error'][::step],
+                               atol=1e-6)
+    print(f"✓ 창 수 상한 적용 ({result['num_windows']}개 → {capped['num_windows']}개)")
+
+    # 분석 기본값은 추론 생략, 요청 시 요약만 포함
+    analyzer._set_reference_data([data])
+    assert 'model_inference' not in analyzer.analyze_session_metrics(data)
+    summary = analyzer.analyze_session_metrics(data, include_inference=True)['model_inference']
+    assert summary['num_windows'] <= analyzer.config['inference']['max_windows'] and 'class_probabilities' not in summary
+    print("✓ 윈도우 추론은 요청할 때만 요약으로 포함")
+
+
+def test_stage_metrics():
+    """단계별 계측 히스토그램/분위수 및 비활성화 동작"""
+    print("\n=== 단계별 계측 테스트 ===")
+
+    metrics = StageMetrics(window=4)
+    for seconds in (0.001, 0.002, 0.003, 0.004, 2.0):
+        metrics.record('stage', seconds)
+    with metrics.span('span'):
+        pass
+
+    snapshot = metrics.snapshot()
+    assert snapshot['stage']['count'] == 5 and snapshot['span']['count'] == 1
+    assert abs(snapshot['stage']['total_seconds'] - 2.01) < 1e-12
+    assert abs(snapshot['stage']['p50'] - 0.0035) < 1e-12  # 최근 4개 기준
+    text = metrics.render_prometheus()
+    assert 'hipot_stage_duration_seconds_bucket{stage="stage",le="0.001"} 1' in text
+    assert 'hipot_stage_duration_seconds_bucket{stage="stage",le="1.0"} 4' in text
+    assert 'hipot_stage_duration_seconds_bucket{stage="stage",le="+Inf"} 5' in text
+    assert 'hipot_stage_recent_duration_seconds_count{stage="stage"} 4' in text
+    print("✓ 누적 히스토그램 및 최근 구간 분위수")
+
+    metrics.configure(enabled=False)
+    with metrics.span('disabled'):
+        pass
+    assert 'disabled' not in metrics.snapshot()
+    print("✓ 비활성화 시 기록 없음")
+
+    analyzer = HipotAIAnalyzer()
+    analyzer.accuracy_calculator = _make_reference_calculator()
+    stage_metrics.reset()
+    analyzer.analyze_session_metrics(create_sample_data())
+    recorded = stage_metrics.snapshot()
+    for stage in ('analyze.preprocess', 'preprocess.outliers', 'analyze.accuracy', 'analyze.defect_rate'):
+        assert recorded[stage]['count'] == 1, stage
+    print("✓ 분석 단계별 구간 기록")
+
+
+def test_incremental_reference_update():
+    """기준 데이터 증분 병합이 전체 데이터로 계산한 통계/평균 템플릿과 일치하는지 확인"""
+    print("\n=== 기준 데이터 증분 업데이트 테스트 ===")
+
+    analyzer = HipotAIAnalyzer()
+    analyzer.accuracy_calculator = AccuracyDefectCalculator(None)
+    sessions = [_make_session_frame(size, seed=seed) for size, seed in ((400, 1), (300, 2), (500, 3))]
+    analyzer.preprocessor.fit(sessions[0])
+    processed = [analyzer.preprocessor.preprocess(session) for session in sessions]
+    columns = ['voltage', 'current', 'resistance']
+
+    analyzer._set_reference_data(processed[:1])
+    first_version = analyzer.reference_version
+    summary = analyzer.update_reference_data(sessions[1:])
+    assert summary['revision'] == 2 and summary['sessions'] == 3
+    assert summary['samples'] == sum(len(data) for data in processed)
+    assert summary['version'] != first_version
+    print("✓ 리비전/세션 수/버전 갱신")
+
+    combined = pd.concat(processed)[columns]
+    statistics = analyzer.reference_data['statistics']
+    for column in columns:
+        assert abs(statistics[f'{column}_mean'] - combined[column].mean()) <= 1e-12 * abs(combined[column].mean())
+        assert abs(statistics[f'{column}_std'] - combined[column].std()) <= 1e-9 * combined[column].std()
+    print("✓ 병합 평균/표준편차가 전체 데이터 계산과 일치")
+
+    template_length = len(processed[0])
+    aligned = [analyzer._align_to_template(data[columns].to_numpy(), template_length) for data in processed]
+    np.testing.assert_allclose(analyzer.reference_data['features'], np.mean(aligned, axis=0), rtol=1e-12)
+    assert analyzer.accuracy_calculator.reference_patterns is analyzer.reference_data
+    print("✓ 기준 템플릿은 정렬된 세션 파형의 평균")
+
+    # 병합 상태가 없는 이전 형식의 기준 데이터도 이어서 병합
+    legacy = {key: analyzer.reference_data[key] for key in ('features', 'statistics')}
+    analyzer.reference_data = legacy
+    analyzer.update_reference_data(sessions[:1])
+    assert analyzer.reference_data['sessions'] == 2
+    print("✓ 이전 형식 기준 데이터에서 병합 상태 복원")
+
+
+def test_reference_version_tracks_model_state():
+    """모델 가중치나 전처리 파라미터가 바뀌면 기준 버전(결과 캐시 키)도 바뀌는지 확인"""
+    print("\n=== 기준 버전 테스트 ===")
+
+    analyzer = HipotAIAnalyzer()
+    analyzer.initialize_model()
+    session = _make_session_frame(400, seed=1)
+    analyzer.preprocessor.fit(session)
+    analyzer._set_reference_data([session])
+    version = analyzer.reference_version
+    analyzer._update_reference_version()
+    assert analyzer.reference_version == version
+
+    # 같은 기준 데이터로 다시 훈련한 경우 (가중치만 변경)
+    with torch.no_grad():
+        next(analyzer.reference_model.parameters()).add_(1e-3)
+    analyzer._update_reference_version()
+    retrained = analyzer.reference_version
+    assert retrained != version
+    print("✓ 가중치가 바뀌면 버전 변경")
+
+    # 이상치 판정 방식 변경
+    analyzer.preprocessor = HipotDataPreprocessor(outlier_method='robust_z')
+    analyzer.preprocessor.fit(session)
+    analyzer._update_reference_version()
+    assert analyzer.reference_version not in (version, retrained)
+    print("✓ 전처리 파라미터가 바뀌면 버전 변경")
+
+
+def test_memory_mapped_reference_checkpoint():
+    """기준 배열이 별도 .npy 파일로 저장되고 로드 시 메모리 매핑되는지 확인"""
+    print("\n=== 메모리 매핑 기준 체크포인트 테스트 ===")
+
+    analyzer = HipotAIAnalyzer()
+    analyzer.initialize_model()
+    sessions = [_make_session_frame(size, seed=seed) for size, seed in ((400, 1), (300, 2))]
+    analyzer._set_reference_data(sessions[:1])
+    test_data = analyzer.preprocessor.preprocess(_make_session_frame(350, seed=7))
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, 'reference.pth')
+        analyzer.save_model(path)
+        previous = f'reference.ref-{analyzer.reference_version}.npy'
+        analyzer.update_reference_data(sessions[1:])
+        analyzer.save_model(path)
+        checkpoint = torch.load(path, weights_only=True)
+        grid_file = checkpoint['preprocessor']['outlier_detector']['grid']['array_file']
+        current = sorted([f'reference.ref-{analyzer.reference_version}.npy', grid_file])
+        # 교체 직전 체크포인트를 읽은 프로세스를 위해 이전 배열은 유예 시간 동안 남김
+        arrays = sorted(name for name in os.listdir(temp_dir) if name.endswith('.npy'))
+        assert arrays == sorted(current + [previous]), arrays
+        _remove_stale_reference_arrays(path, keep=[os.path.join(temp_dir, name) for name in current], grace=0)
+        arrays = sorted(name for name in os.listdir(temp_dir) if name.endswith('.npy'))
+        assert arrays == current, arrays
+        print("✓ 유예 시간이 지난 이전 배열 파일만 삭제")
+
+        assert 'features' not in checkpoint['reference_data']
+        assert 'fit_data' not in checkpoint['preprocessor']
+
+        loaded = HipotAIAnalyzer()
+        loaded.load_model(path)
+        assert isinstance(loaded.reference_data['voltage_ref'], np.memmap)
+        assert loaded.reference_data['voltage_ref'].flags.c_contiguous
+        np.testing.assert_array_equal(loaded.reference_data['features'], analyzer.reference_data['features'])
+        assert loaded.reference_version == analyzer.reference_version
+        assert (loaded.accuracy_calculator.calculate_accuracy(test_data)
+                == analyzer.accuracy_calculator.calculate_accuracy(test_data))
+        print("✓ 매핑된 기준 배열로 동일한 버전/정확도 결과")
+
+        # 전처리기는 저장된 학습 파라미터로 복원 (재학습 없음)
+        assert loaded.preprocessor.outlier_detector.forest_ is None
+        assert not loaded.preprocessor.outlier_detector.grid_.flags.owndata  # 매핑된 격자 파일의 뷰
+        raw = _make_session_frame(350, seed=7)
+        pd.testing.assert_frame_equal(loaded.preprocessor.preprocess(raw), analyzer.preprocessor.preprocess(raw))
+        print("✓ 저장된 스케일러/판정 격자로 동일한 전처리 결과")
+
+        # 내보내기 파일은 기준 배열을 포함한 단일 파일
+        exported = io.BytesIO()
+        loaded.export_checkpoint(exported)
+        exported.seek(0)
+        imported = HipotAIAnalyzer()
+        imported.load_model(exported)
+        np.testing.assert_array_equal(imported.reference_data['features'], analyzer.reference_data['features'])
+        assert imported.reference_version == analyzer.reference_version
+        print("✓ 내보낸 단일 파일 체크포인트 로드")
+
+        # 매핑된 기준에서 이어서 병합해도 원본 파일은 변경되지 않음
+        loaded.update_reference_data(sessions[:1])
+        assert loaded.reference_data['sessions'] == 3
+        del loaded
+    print("✓ 매핑된 기준 데이터 증분 병합")
+
+
+def test_outlier_engines():
+    """이상치 판정 엔진별 판정 비율과 IsolationForest 격자 근사의 일치율 확인"""
+    print("\n=== 이상치 판정 엔진 테스트 ===")
+
+    columns = ['voltage', 'current', 'resistance']
+    fit_data = _make_session_frame(2000, seed=1)[columns]
+    test_data = _make_session_frame(20000, seed=2)[columns].to_numpy()
+    predictions = {method: make_outlier_detector(method).fit(fit_data).predict(test_data)
+                   for method in OUTLIER_METHODS}
+    for method, predicted in predictions.items():
+        assert set(np.unique(predicted)) <= {1, -1}, method
+        assert 0.8 < (predicted == 1).mean() < 0.97, (method, (predicted == 1).mean())
+    agreement = (predictions['forest_grid'] == predictions['isolation_forest']).mean()
+    assert agreement > 0.98, agreement
+    print(f"✓ 엔진별 판정 비율 정상, 격자 근사 일치율 {agreement:.2%}")
+
+    try:
+        make_outlier_detector('unknown')
+        assert False, "알 수 없는 방식은 ValueError"
+    except ValueError:
+        pass
+
+    analyzer = HipotAIAnalyzer()
+    analyzer.config['preprocessing']['outlier_method'] = 'histogram'
+    analyzer.preprocessor = HipotDataPreprocessor(**analyzer.config['preprocessing'])
+    analyzer.initialize_model()
+    analyzer._set_reference_data([_make_session_frame(500)])
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, 'reference.pth')
+        analyzer.save_model(path)
+        loaded = HipotAIAnalyzer()
+        loaded.load_model(path)
+    assert loaded.preprocessor.outlier_method == 'histogram'
+    sample = _make_session_frame(300, seed=9)
+    pd.testing.assert_frame_equal(loaded.preprocessor.preprocess(sample), analyzer.preprocessor.preprocess(sample))
+    print("✓ 체크포인트에 저장된 판정 방식으로 전처리기 복원")
+
+
+def test_window_training_dataset():
+    """훈련 창 데이터셋이 세션별 슬라이딩 창을 복사 없이 보관하고 배치를 올바르게 모으는지 확인"""
+    print("\n=== 훈련 창 데이터셋 테스트 ===")
+
+    sequences = [np.random.default_rng(seed).normal(size=(size, 4)).astype(np.float32)
+                 for seed, size in ((0, 260), (1, 40), (2, 175))]
+    dataset = HipotWindowDataset(sequences, window_size=50, stride=25)
+    expected = [seq[start:start + 50] for seq in sequences[::2] for start in range(0, len(seq) - 49, 25)]
+    expected.insert(9, np.concatenate([sequences[1], np.repeat(sequences[1][-1:], 10, axis=0)]))
+    assert len(dataset) == len(expected) == 16
+    assert all(np.shares_memory(windows, seq) for windows, seq in zip(dataset.sessions[::2], sequences[::2]))
+    print("✓ 세션별 창 뷰 (짧은 세션은 마지막 값으로 패딩)")
+
+    indices = [15, 0, 9, 3, 10]
+    batch = dataset[indices]
+    assert isinstance(batch, torch.Tensor) and batch.shape == (5, 50, 4)
+    for row, index in zip(batch.numpy(), indices):
+        np.testing.assert_array_equal(row, expected[index])
+    np.testing.assert_array_equal(dataset[4].numpy(), expected[4])
+    print("✓ 여러 세션에 걸친 인덱스 배치 수집")
+
+    analyzer = HipotAIAnalyzer()
+    analyzer.config['training'].update(batch_size=4, samples_per_epoch=10)
+    batches = list(analyzer._create_data_loader(dataset))
+    assert [len(batch) for batch in batches] == [4, 4, 2]
+    analyzer.config['training']['samples_per_epoch'] = None
+    assert sum(len(batch) for batch in analyzer._create_data_loader(dataset)) == len(dataset)
+    print("✓ epoch당 임의 추출 창 수 설정")
+
+    # 최적 가중치는 메모리에서 복원하고 디스크에 best_model.pth를 남기지 않음
+    analyzer.initialize_model()
+    analyzer.config['training'].update(epochs=3, samples_per_epoch=8, compile='torchscript', num_threads=1)
+    threads = torch.get_num_threads()
+    with tempfile.TemporaryDirectory() as tmpdir:
+        cwd = os.getcwd()
+        os.chdir(tmpdir)
+        try:
+            training = analyzer._train_model(analyzer._create_data_loader(dataset))
+        finally:
+            os.chdir(cwd)
+        assert os.listdir(tmpdir) == []
+    assert torch.get_num_threads() == threads
+    assert len(training['samples_per_second']) == training['epochs_trained'] == 3
+    assert training['final_loss'] == min(training['training_losses'])
+    assert not analyzer.reference_model.training
+    print(f"✓ 메모리 체크포인트 훈련 (TorchScript, {training['samples_per_second'][-1]:.0f} 창/초)")
+
+
+def test_plot_downsampling():
+    """그래프 점 축소가 끝점과 스파이크를 보존하고 full_resolution이면 원본을 그리는지 확인"""
+    print("\n=== 그래프 점 축소 테스트 ===")
+
+    rng = np.random.default_rng(0)
+    x = np.linspace(0, 100, 100001)
+    y = np.sin(x) + rng.normal(0, 0.05, x.size)
+    y[31337], y[77777] = 8.0, -8.0
+    for method in DOWNSAMPLE_METHODS:
+        small_x, small_y = downsample_series(x, y, 2000, method)
+        assert len(small_y) <= 2000 and np.all(np.diff(small_x) > 0)
+        assert small_x[0] == x[0] and small_x[-1] == x[-1]
+        assert small_y.max() == 8.0 and small_y.min() == -8.0
+        assert np.abs(np.interp(x, small_x, small_y) - np.sin(x)).mean() < 0.2
+        print(f"✓ {method}: {len(y)} → {len(small_y)} 점 (스파이크/끝점 보존)")
+
+    _, short_y = downsample_series(x[:50], y[:50], 2000)
+    assert len(short_y) == 50
+
+    _load_matplotlib()
+    generator = HipotGraphGenerator(dpi=100)
+    _, axes = generator._new_figure(1, 1, figsize=(6, 4))
+    reduced, _ = generator._line_data(axes[0, 0], x, y)
+    full, _ = generator._line_data(axes[0, 0], x, y, full_resolution=True)
+    assert len(reduced) <= 2 * 6 * 100 and len(full) == len(x)
+    print(f"✓ 축 픽셀 폭 기준 축소 ({len(reduced)} 점), full_resolution은 원본 유지")
+
+
+def test_in_memory_plot_rendering():
+    """그래프를 파일 없이 메모리로 렌더링하고, 형식/DPI 옵션과 저장소 상한이 적용되는지 확인"""
+    print("\n=== 메모리 그래프 렌더링 테스트 ===")
+
+    store = PlotArtifactStore(max_items=4)
+    generator = HipotGraphGenerator(dpi=40, artifact_store=store)
+    data = create_sample_data()
+    reference = {'voltage_ref': data['voltage'].to_numpy(), 'current_ref': data['current'].to_numpy(),
+                 'resistance_ref': data['resistance'].to_numpy()}
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        cwd = os.getcwd()
+        os.chdir(tmpdir)
+        try:
+            low = generator.render_figures(data, reference, 'test')
+            high = generator.render_figures(data, reference, 'test', dpi=80)
+            svg = generator.render_figures(data, reference, 'test', fmt='svg')
+            first = generator.create_comparison_plots(data, reference, 'test')
+            second = generator.create_comparison_plots(data, reference, 'test')
+        finally:
+            os.chdir(cwd)
+        assert os.listdir(tmpdir) == []
+
+    assert [image['name'] for image in low] == [name for name, _ in HipotGraphGenerator.FIGURES]
+    assert all(image['data'].startswith(b'\x89PNG') for image in low)
+    assert all(len(h['data']) > len(l['data']) for h, l in zip(high, low))
+    assert all(b'<svg' in image['data'][:1000] and image['mimetype'] == 'image/svg+xml' for image in svg)
+    print("✓ PNG(40/80 DPI)/SVG 메모리 렌더링, 작업 디렉토리에 파일 없음")
+
+    # 같은 입력을 같은 시각에 렌더링해도 ID가 겹치지 않고, 상한을 넘으면 오래된 이미지부터 제거
+    assert len(set(first + second)) == 6
+    assert all(artifact_id not in store for artifact_id in first[:2])
+    data_bytes, mimetype = store.get(second[0])
+    assert mimetype == 'image/png' and data_bytes.startswith(b'\x89PNG')
+    assert store.stats()['items'] == 4
+
+    # 바이트 상한: 제거 시 이미지 크기만큼 줄고, 가장 최근 이미지는 남음
+    small = PlotArtifactStore(max_items=2, max_bytes=1000)
+    ids = [small.put('plot', 'png', bytes([i]) * 400) for i in range(3)]
+    assert ids[0] not in small and all(small.get(artifact_id) is not None for artifact_id in ids[1:])
+    assert small.stats()['bytes'] == 800 == sum(len(small.get(artifact_id)[0]) for artifact_id in ids[1:])
+    oversized = small.put('plot', 'png', b'x' * 1500)
+    assert small.get(oversized)[0] == b'x' * 1500 and small.stats()['items'] == 1
+    assert small.stats()['bytes'] == 1500
+
+    try:
+        generator.render_figures(data, reference, fmt='bmp')
+        assert False, "지원하지 않는 형식은 ValueError"
+    except ValueError:
+        pass
+    print("✓ 충돌 없는 이미지 ID, 저장소 개수 상한, 형식 검증")
+
+    # 템플릿을 재사용해도 새로 만든 그림과 픽셀 단위로 같아야 함
+    import matplotlib.image as mpimg
+    fresh = HipotGraphGenerator(dpi=40, reuse_figures=False)
+    short = _make_session_frame(700, seed=9)
+    for session in (data, short):
+        reused = generator.render_figures(session, reference, 'test')
+        expected = fresh.render_figures(session, reference, 'test')
+        for actual_image, expected_image in zip(reused, expected):
+            np.testing.assert_array_equal(mpimg.imread(io.BytesIO(actual_image['data'])),
+                                          mpimg.imread(io.BytesIO(expected_image['data'])),
+                                          err_msg=actual_image['name'])
+    print("✓ 그림 템플릿 재사용 결과가 새 그림과 픽셀 단위로 동일")
+
+    # 요청마다 새 스레드에서 렌더링해도 그림 구성별 템플릿을 공용 풀에서 재사용
+    for _ in range(3):
+        thread = threading.Thread(target=generator.render_figures, args=(data, reference, 'test'))
+        thread.start()
+        thread.join()
+    pools = generator._templates
+    assert {name for name, _ in pools} == {name for name, _ in HipotGraphGenerator.FIGURES}
+    assert all(len(pool) == 1 and not pool[0]['busy'] for pool in pools.values()), pools
+    print("✓ 스레드가 바뀌어도 그림 템플릿 재사용")
+
+
+def test_vectorized_anomaly_heatmap():
+    """창별 평균/상관계수가 기존 pandas 반복 계산과 같은지 확인"""
+    print("\n=== 이상 탐지 히트맵 데이터 테스트 ===")
+
+    params = ['voltage', 'current', 'resistance']
+    for size in (7, 39, 1000, 50001):
+        data = _make_session_frame(size, seed=size)
+        if size == 1000:
+            data.loc[[3, 500], 'voltage'] = np.nan
+
+        normalized = data[params].apply(lambda x: (x - x.min()) / (x.max() - x.min() + 1e-8))
+        window_size = max(1, len(normalized) // 20)
+        expected = np.array([normalized.iloc[i:i + window_size].mean().values
+                             for i in range(0, len(normalized), window_size)]).T
+
+        heatmap = compute_anomaly_heatmap(data)
+        assert heatmap['parameters'] == params and heatmap['window_size'] == window_size
+        np.testing.assert_allclose(heatmap['evolution'], expected, rtol=1e-9, atol=1e-12)
+        np.testing.assert_allclose(heatmap['correlation'], data[params].corr().to_numpy(), rtol=1e-9, atol=1e-12)
+        assert heatmap['window_starts'][-1] < size
+    print("✓ 창별 평균/상관계수 일치 (NaN 포함 세션 포함)")
+
+    empty = compute_anomaly_heatmap(data.iloc[:0])
+    single = compute_anomaly_heatmap(data.iloc[:1])
+    assert empty['evolution'] is None and empty['correlation'] is None
+    assert single['evolution'].shape == (3, 1) and single['correlation'] is None
+    print("✓ 빈 세션/단일 측정값 처리")
+
+
+def test_shared_session_statistics():
+    """세션 통계 컨텍스트가 pandas 열 단위 계산과 같고, 분석 단계들이 같은 값을 재사용하는지 확인"""
+    print("\n=== 세션 통계 컨텍스트 테스트 ===")
+
+    params = ['voltage', 'current', 'resistance']
+    preprocessor = HipotDataPreprocessor()
+    processed = preprocessor.preprocess(_make_session_frame(5000))
+    with_nan = _make_session_frame(500)
+    with_nan.loc[[0, 7, 250], 'voltage'] = np.nan
+
+    for data in (processed, with_nan):
+        stats = SessionStatistics(data)
+        moments = stats.moments()
+        low, high = stats.extrema()
+        np.testing.assert_allclose(moments['mean'], data[params].mean().to_numpy(), rtol=1e-12)
+        np.testing.assert_allclose(moments['std'], data[params].std().to_numpy(), rtol=1e-9)
+        np.testing.assert_allclose(moments['correlation'], data[params].corr().to_numpy(), rtol=1e-9, atol=1e-12)
+        np.testing.assert_array_equal(low, data[params].min().to_numpy())
+        np.testing.assert_array_equal(high, data[params].max().to_numpy())
+        for param in params:
+            heights, edges = stats.histogram(param, 30)
+            expected_heights, expected_edges = np.histogram(data[param].dropna(), 30, density=True)
+            np.testing.assert_array_equal(edges, expected_edges)
+            np.testing.assert_allclose(heights, expected_heights, rtol=1e-12)
+    # 전처리된 미분 열 재사용 결과가 diff()와 같음
+    np.testing.assert_array_equal(SessionStatistics(processed).diffs(),
+                                  processed[['voltage', 'current']].diff().to_numpy()[1:])
+    print("✓ 평균/표준편차/상관계수/최소·최대/히스토그램이 pandas 계산과 일치 (NaN 포함)")
+
+    # 정확도 지표는 기존 열 단위 계산과 같음
+    calculator = AccuracyDefectCalculator(None)
+    reference = processed[params].to_numpy()
+    calculator.set_reference_patterns({
+        'features': reference,
+        'statistics': {f'{param}_{name}': getattr(processed[param], name)() * 1.05
+                       for param in params for name in ('mean', 'std')}
+    })
+    accuracy = calculator.calculate_accuracy(processed)
+    expected_stability = np.mean([1.0 - (diff.abs() > diff.std() * 3).mean()
+                                  for diff in (processed[param].diff().dropna() for param in ('voltage', 'current'))])
+    assert abs(accuracy['temporal_consistency'] - expected_stability) < 1e-12
+    assert abs(accuracy['statistical_match'] - 1 / 1.05) < 1e-9
+
+    # 한 번 계산된 값은 같은 객체로 재사용됨
+    stats = SessionStatistics(processed)
+    calculator.calculate_accuracy(processed, stats)
+    moments = stats.moments()
+    heatmap = stats.anomaly_heatmap()
+    assert stats.moments() is moments and stats.anomaly_heatmap() is heatmap
+    assert heatmap['correlation'] is moments['correlation']
+    print("✓ 정확도/히트맵 단계가 같은 통계 객체를 재사용")
+
+
+def _make_ramp_session(size: int, shift: float = 0.0, seed: int = 0) -> np.ndarray:
+    """전압 상승 구간 시점을 shift(세션 길이 비율)만큼 옮긴 (N, 3) 측정값"""
+    rng = np.random.default_rng(seed)
+    progress = np.linspace(0, 1, size)
+    ramp = np.clip((progress - 0.2 - shift) / 0.2, 0, 1)
+    voltage = 1000 * ramp + rng.normal(0, 10, size)
+    current = 0.0001 + 0.001 * ramp + rng.normal(0, 1e-6, size)
+    return np.column_stack([voltage, current, voltage / current])
+
+
+def test_aligned_pattern_similarity():
+    """FFT 교차상관 지연 탐색이 직접 계산과 같고, 시간 지연/크기 차이에 강건한지 확인"""
+    print("\n=== 정렬 패턴 유사도 테스트 ===")
+
+    reference = _make_ramp_session(1500)
+    engine = PatternSimilarityEngine(reference, grid_size=512, max_lag=0.25)
+    assert engine.grid_size == 512 and engine.max_lag == 128
+
+    # 지연별 점수를 격자에서 직접 계산한 결과와 비교
+    test_values = _make_ramp_session(20000, shift=0.05, seed=1)
+    test_time = np.linspace(0, 50, len(test_values))
+    result = engine.match(test_values, test_time)
+    ref_grid = engine._standardize(engine._resample(engine._progress(len(reference)), reference))
+    test_grid = engine._standardize(engine._resample(engine._progress(len(test_values), test_time), test_values))
+    size = engine.grid_size
+    scores = []
+    for lag in range(-engine.max_lag, engine.max_lag + 1):
+        test_part = test_grid[max(lag, 0):size + min(lag, 0)]
+        ref_part = ref_grid[max(-lag, 0):size - max(lag, 0)]
+        scores.append(np.sum(test_part * ref_part) / np.sqrt(np.sum(test_part ** 2) * np.sum(ref_part ** 2)))
+    best = int(np.argmax(scores))
+    assert abs(result['similarity'] - scores[best]) < 1e-9
+    assert result['lag'] == (best - engine.max_lag) / size
+    assert 0.04 <= result['lag'] <= 0.06
+    print(f"✓ FFT 지연 탐색이 직접 계산과 일치 (지연 {result['lag']:.3f})")
+
+    # 상승 시점이 밀린 세션도 앞부분만 자른 코사인보다 높은 점수, 채널 크기 변화에는 무관
+    calculator = _make_reference_calculator()
+    calculator.set_reference_patterns({'features': reference, 'statistics': {}})
+    shifted = pd.DataFrame(_make_ramp_session(3000, shift=0.1, seed=2), columns=['voltage', 'current', 'resistance'])
+    aligned = calculator._match_pattern(shifted)
+    assert aligned['similarity'] > 0.95 and aligned['lag'] > 0.05
+    scaled = shifted.assign(resistance=shifted['resistance'] * 1e3)
+    assert abs(calculator._calculate_pattern_similarity(scaled) - aligned['similarity']) < 1e-9
+    noise = pd.DataFrame(np.random.default_rng(3).normal(size=(3000, 3)), columns=['voltage', 'current', 'resistance'])
+    assert calculator._calculate_pattern_similarity(noise) < 0.2
+    print(f"✓ 지연된 세션 {aligned['similarity']:.3f}, 잡음 세션 {calculator._calculate_pattern_similarity(noise):.3f}")
+
+    # 기준 스펙트럼은 기준 패턴이 바뀔 때만 다시 계산
+    engine = calculator.similarity_engine()
+    assert calculator.similarity_engine() is engine
+    calculator.set_reference_patterns({'features': reference[::2], 'statistics': {}})
+    assert calculator.similarity_engine() is not engine
+    print("✓ 기준 패턴별 스펙트럼 캐시")
+
+
+def main():
+    """메인 테스트 함수"""
+    print("🔧 Hipot 분석 엔진 최적화 경로 검증")
+    print(f"📅 테스트 시간: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+
+    tests = [
+        test_vectorized_classification_parity,
+        test_streaming_session_matches_batch,
+        test_batch_analysis_matches_serial,
+        test_plot_render_queue_cache,
+        test_fused_preprocessing_matches_stepwise,
+        test_parallel_preprocessing_matches_serial,
+        test_window_inference_matches_single_windows,
+        test_stage_metrics,
+        test_incremental_reference_update,
+        test_reference_version_tracks_model_state,
+        test_memory_mapped_reference_checkpoint,
+        test_outlier_engines,
+        test_window_training_dataset,
+        test_plot_downsampling,
+        test_in_memory_plot_rendering,
+        test_vectorized_anomaly_heatmap,
+        test_shared_session_statistics,
+        test_aligned_pattern_similarity,
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except Exception as e:
+            print(f"✗ {test.__name__} 실패: {e}")
+
+    print("\n" + "="*50)
+    print(f"통과: {passed}/{len(tests)}")
+    return 0 if passed == len(tests) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,442 @@
+#!/usr/bin/env python3
+"""
+Flask API 엔드포인트 검증 스크립트
+Flask 테스트 클라이언트로 분석 API의 동작을 확인합니다.
+"""
+
+import os
+import sys
+import json
+import base64
+import time
+import tempfile
+import threading
+import subprocess
+import http.client
+import numpy as np
+from datetime import datetime
+
+import flask_api
+from flask_api import (AnalysisResultCache, COLUMNAR_CONTENT_TYPE, decode_columnar_sessions,
+                       encode_columnar_session)
+from hipot_ai_analyzer import HipotAIAnalyzer, HipotReferenceRegistry, create_sample_data
+from load_test import make_payload, run_load_test, spawn_server, stop_server
+
+
+def _prepare_api():
+    """훈련 없이 기준 데이터만 설정한 API 테스트 클라이언트 생성"""
+    if flask_api.analyzer is None:
+        assert flask_api.initialize_analyzer()
+        flask_api.analyzer._set_reference_data([create_sample_data()])
+        flask_api.model_initialized = True
+    return flask_api.app.test_client()
+
+
+def _without_plot_job(response):
+    """렌더링 작업 상태(요청 시점에 따라 달라짐)를 뺀 분석 결과"""
+    result = dict(response.json)
+    result.pop('plot_job')
+    return result
+
+
+def _session_payload(data):
+    return {
+        'Time': data['time'].tolist(),
+        'Voltage': data['voltage'].tolist(),
+        'Current': data['current'].tolist(),
+        'Resistance': data['resistance'].tolist()
+    }
+
+
+def test_result_cache_lru_and_persistence():
+    """결과 캐시 LRU 제거, 바이트 제한, sqlite 영속화"""
+    print("=== 분석 결과 캐시 테스트 ===")
+
+    cache = AnalysisResultCache(max_entries=2, max_bytes=9)
+    cache.put('a', b'1234')
+    cache.put('b', b'1234')
+    assert cache.get('a') == b'1234'   # a가 최근 사용 항목이 됨
+    cache.put('c', b'1234')            # 항목 수 초과 → b 제거
+    assert cache.get('b') is None
+    cache.put('d', b'123456')          # 바이트 초과 → a, c 순서로 제거
+    stats = cache.stats()
+    assert stats['entries'] == 1 and stats['bytes'] == 6
+    assert stats['evictions'] == 3 and stats['hits'] == 1 and stats['misses'] == 1
+    print("✓ 항목 수/바이트 제한에 따른 LRU 제거")
+
+    key_a = AnalysisResultCache.make_key([np.arange(3, dtype=np.float32)], 'v1')
+    assert key_a != AnalysisResultCache.make_key([np.arange(3, dtype=np.float32)], 'v2')
+    assert key_a != AnalysisResultCache.make_key([np.arange(3, dtype=np.float64)], 'v1')
+    print("✓ 데이터 타입과 기준 버전이 캐시 키에 반영됨")
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db_path = os.path.join(temp_dir, 'cache.db')
+        AnalysisResultCache(db_path=db_path).put(key_a, b'{"status": "success"}')
+        restarted = AnalysisResultCache(db_path=db_path)
+        assert restarted.get(key_a) == b'{"status": "success"}'
+        assert restarted.stats()['disk_hits'] == 1
+    print("✓ 재시작 후 디스크 캐시 적중")
+
+
+def test_analyze_uses_result_cache():
+    """같은 세션을 다시 요청하면 캐시된 결과 반환"""
+    print("\n=== /analyze 캐시 적용 테스트 ===")
+
+    client = _prepare_api()
+    flask_api._result_cache.clear()
+    before = flask_api._result_cache.stats()
+
+    payload = _session_payload(create_sample_data())
+    first = client.post('/analyze', json=payload)
+    second = client.post('/analyze', json=payload)
+    assert first.status_code == 200 and second.status_code == 200
+    assert _without_plot_job(first) == _without_plot_job(second)
+    assert first.json['plot_job']['job_id'] == second.json['plot_job']['job_id']
+
+    stats = client.get('/cache_stats').json['cache']
+    assert stats['hits'] == before['hits'] + 1
+    assert stats['misses'] == before['misses'] + 1
+    print("✓ 두 번째 요청은 캐시에서 응답")
+
+    # 렌더링 작업이 큐에서 사라져도 캐시 적중 시 같은 작업 ID로 다시 등록
+    job_id = first.json['plot_job']['job_id']
+    plot_queue = flask_api._registry.plot_queue
+    with plot_queue._lock:
+        plot_queue._jobs.clear()
+    third = client.post('/analyze', json=payload)
+    assert third.json['plot_job']['job_id'] == job_id and plot_queue.status(job_id) is not None
+    assert client.get('/cache_stats').json['cache']['hits'] == before['hits'] + 2
+    print("✓ 캐시 적중 시 그래프 작업 재등록")
+
+    # 윈도우 추론은 요청할 때만 포함 (요청 플래그별로 다른 캐시 항목)
+    assert first.json['model_inference'] is None
+    summary = client.post('/analyze?plots=none&inference=1', json=payload).json['model_inference']
+    windows = client.post('/analyze?plots=none&inference_windows=1', json=payload).json['model_inference']
+    assert 'reconstruction_error' not in summary
+    assert len(windows['reconstruction_error']) == windows['num_windows'] == summary['num_windows']
+    print("✓ inference/inference_windows 요청 플래그")
+
+
+def test_binary_columnar_ingest():
+    """이진 열 블록 요청이 JSON 요청과 같은 입력으로 처리되는지 확인"""
+    print("\n=== 이진 열 블록 수신 테스트 ===")
+
+    data = create_sample_data()
+    body = encode_columnar_session(data['time'], data['voltage'], data['current'], data['resistance'])
+    sessions = decode_columnar_sessions(body + body)
+    assert len(sessions) == 2
+    np.testing.assert_array_equal(sessions[1]['voltage'], data['voltage'].values.astype(np.float32))
+    print("✓ 여러 세션 블록 디코딩")
+
+    client = _prepare_api()
+    flask_api._result_cache.clear()
+    before = flask_api._result_cache.stats()
+
+    binary = client.post('/analyze', data=body, content_type=COLUMNAR_CONTENT_TYPE)
+    as_json = client.post('/analyze', json=_session_payload(data))
+    assert binary.status_code == 200
+    # JSON 요청이 이진 요청의 캐시 항목에 적중하면 두 경로의 입력 배열이 동일함
+    assert _without_plot_job(as_json) == _without_plot_job(binary)
+    assert flask_api._result_cache.stats()['hits'] == before['hits'] + 1
+    print("✓ 이진/JSON 요청 입력 일치")
+
+    truncated = client.post('/analyze', data=body[:-4], content_type=COLUMNAR_CONTENT_TYPE)
+    assert truncated.status_code == 400
+    print("✓ 잘린 이진 본문은 400 응답")
+
+
+def test_plot_rendering_options():
+    """그래프 인라인 응답, 렌더링 작업 이미지 조회, 형식/DPI 검증"""
+    print("\n=== 그래프 렌더링 옵션 테스트 ===")
+
+    client = _prepare_api()
+    payload = _session_payload(create_sample_data())
+
+    inline = client.post('/analyze?plots=inline&plot_format=svg&plot_dpi=30', json=payload)
+    assert inline.status_code == 200, inline.get_data(as_text=True)
+    images = inline.json['plot_images']
+    assert len(images) == 3 and inline.json['plot_job'] is None
+    assert all(image['mimetype'] == 'image/svg+xml' and b'<svg' in base64.b64decode(image['data'])
+               for image in images)
+    print("✓ plots=inline 응답에 SVG 이미지 포함")
+
+    job_id = client.post('/analyze?plot_dpi=30', json=payload).json['plot_job']['job_id']
+    deadline = time.monotonic() + 60
+    while client.get(f'/plot_job/{job_id}').json['job']['status'] == 'pending' and time.monotonic() < deadline:
+        time.sleep(0.1)
+    job = client.get(f'/plot_job/{job_id}').json['job']
+    assert job['status'] == 'done' and len(job['plots']) == 3
+
+    by_index = client.get(f'/get_plot/{job_id}/0')
+    by_id = client.get(f"/get_plot/{job['plots'][0]}")
+    assert by_index.status_code == 200 and by_index.mimetype == 'image/png'
+    assert by_index.get_data() == by_id.get_data() and by_id.get_data().startswith(b'\x89PNG')
+    assert client.get('/get_plot/missing.png').status_code == 404
+    assert client.get('/cache_stats').json['plots']['items'] >= 3
+    print("✓ 렌더링 작업 이미지를 메모리 저장소에서 조회")
+
+    # 히트맵 데이터는 렌더링 없이 전용 API와 분석 결과(heatmap=1)로 같은 값을 반환
+    heatmap = client.post('/heatmap_data', json=payload)
+    analyzed = client.post('/analyze?heatmap=1', json=payload)
+    assert heatmap.status_code == 200 and analyzed.status_code == 200
+    assert heatmap.json['heatmap'] == analyzed.json['anomaly_heatmap']
+    assert np.shape(heatmap.json['heatmap']['evolution']) == (3, len(heatmap.json['heatmap']['window_starts']))
+    assert np.shape(client.post('/heatmap_data?windows=5', json=payload).json['heatmap']['evolution']) == (3, 5)
+    print("✓ /heatmap_data와 /analyze?heatmap=1 히트맵 데이터 일치")
+
+    assert client.post('/analyze?plot_format=bmp', json=payload).status_code == 400
+    assert client.post('/analyze?plot_dpi=5000', json=payload).status_code == 400
+    assert client.post('/analyze?plots=files', json=payload).status_code == 400
+    print("✓ 잘못된 형식/DPI/방식은 400 응답")
+
+
+def test_stream_session_lifecycle():
+    """동시 청크 추가는 세션 잠금으로 직렬화되고, 버려진 세션은 개수/유휴 시간 상한으로 제거"""
+    print("\n=== 스트리밍 세션 수명 테스트 ===")
+
+    client = _prepare_api()
+    chunk = _session_payload(create_sample_data())
+
+    session_id = client.post('/stream/open').json['session_id']
+
+    def push():
+        assert flask_api.app.test_client().post(f'/stream/{session_id}/push', json=chunk).status_code == 200
+
+    threads = [threading.Thread(target=push) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    closed = client.post(f'/stream/{session_id}/close').json
+    assert closed['test_summary']['data_points'] == 8 * len(chunk['Time'])
+    assert client.post(f'/stream/{session_id}/push', json=chunk).status_code == 404
+    print("✓ 같은 세션의 동시 청크 추가 누락 없음")
+
+    max_sessions, ttl = flask_api.MAX_STREAM_SESSIONS, flask_api.STREAM_SESSION_TTL
+    try:
+        flask_api.MAX_STREAM_SESSIONS = 2
+        opened = [client.post('/stream/open').json['session_id'] for _ in range(3)]
+        assert client.post(f'/stream/{opened[0]}/push', json=chunk).status_code == 404
+        assert client.post(f'/stream/{opened[2]}/push', json=chunk).status_code == 200
+
+        flask_api.STREAM_SESSION_TTL = 0
+        assert client.post(f'/stream/{opened[2]}/push', json=chunk).status_code == 404
+        assert not flask_api._stream_sessions
+    finally:
+        flask_api.MAX_STREAM_SESSIONS, flask_api.STREAM_SESSION_TTL = max_sessions, ttl
+    print("✓ 개수 상한/유휴 시간을 넘은 세션 제거")
+
+
+def test_metrics_endpoint():
+    """/metrics가 요청 및 분석 단계 지표를 Prometheus 형식으로 노출"""
+    print("\n=== /metrics 테스트 ===")
+
+    client = _prepare_api()
+    flask_api._result_cache.clear()
+    assert client.post('/analyze', json=_session_payload(create_sample_data())).status_code == 200
+
+    response = client.get('/metrics')
+    assert response.status_code == 200 and response.mimetype == 'text/plain'
+    text = response.get_data(as_text=True)
+    for stage in ('request.analyze_data', 'api.parse', 'api.analyze', 'api.serialize', 'analyze.preprocess'):
+        assert f'hipot_stage_duration_seconds_count{{stage="{stage}"}}' in text, stage
+    assert '# TYPE hipot_stage_duration_seconds histogram' in text
+    assert 'hipot_process_peak_rss_bytes' in text
+    print("✓ 요청/단계별 지표 노출")
+
+
+def test_update_reference_merges_sessions():
+    """/update_reference가 새 기준 세션을 병합하고 캐시 키 버전을 바꾸는지 확인"""
+    print("\n=== /update_reference 증분 병합 테스트 ===")
+
+    client = _prepare_api()
+    before = flask_api.analyzer.reference_summary()
+    data = create_sample_data()
+    body = encode_columnar_session(data['time'], data['voltage'], data['current'], data['resistance'])
+
+    original_dir = os.getcwd()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        os.chdir(temp_dir)  # 업데이트된 모델 파일은 임시 디렉토리에 저장
+        try:
+            as_json = client.post('/update_reference', json=_session_payload(data))
+            as_binary = client.post('/update_reference', data=body + body, content_type=COLUMNAR_CONTENT_TYPE)
+        finally:
+            os.chdir(original_dir)
+
+    assert as_json.status_code == 200 and as_binary.status_code == 200
+    after = as_binary.json['reference']
+    assert after['revision'] == before['revision'] + 2
+    assert after['sessions'] == before['sessions'] + 3
+    assert after['version'] not in (before['version'], as_json.json['reference']['version'])
+    assert client.get('/get_statistics').json['statistics']['reference'] == after
+    print("✓ JSON/이진 기준 세션 병합 및 버전 갱신")
+
+
+def test_reference_registry_routing():
+    """제품/시험 모드별 기준 모델 라우팅, 지연 로드 및 LRU 제거"""
+    print("\n=== 기준 모델 레지스트리 라우팅 테스트 ===")
+
+    client = _prepare_api()
+    saved_registry = flask_api._registry
+    with tempfile.TemporaryDirectory() as temp_dir:
+        registry = HipotReferenceRegistry(temp_dir, max_loaded=1, plot_queue=saved_registry.plot_queue)
+        for product, scale in (('PX-100', 1.0), ('PX-200', 1.05)):
+            reference = create_sample_data()
+            reference['voltage'] *= scale
+            target = HipotAIAnalyzer(plot_queue=registry.plot_queue)
+            target.initialize_model()
+            target._set_reference_data([reference])
+            registry.save(product, 'AC', target)
+        flask_api._registry = HipotReferenceRegistry(temp_dir, max_loaded=1, plot_queue=saved_registry.plot_queue)
+        try:
+            payload = _session_payload(create_sample_data())
+            first = client.post('/analyze?product=PX-100&test_mode=ac', json=payload)
+            second = client.post('/analyze', json=dict(payload, Product='PX-200', TestMode='AC'))
+            assert first.status_code == 200 and second.status_code == 200
+            assert first.json['accuracy_metrics'] != second.json['accuracy_metrics']
+            print("✓ 쿼리 문자열/JSON 키로 제품별 기준 모델 선택")
+
+            assert client.post('/analyze?product=PX-300&test_mode=AC', json=payload).status_code == 404
+            assert client.post('/analyze?product=PX-100&test_mode=XX', json=payload).status_code == 400
+            assert client.post('/analyze?product=PX-100', json=payload).status_code == 400
+            print("✓ 미등록 키 404, 잘못된 키 400")
+
+            listing = client.get('/references').json
+            assert [r['product'] for r in listing['references']] == ['PX-100', 'PX-200']
+            assert listing['registry']['loads'] == 2 and listing['registry']['evictions'] == 1
+            assert listing['registry']['loaded'] == [['PX-200', 'AC']]
+            print("✓ 최근 사용 키만 메모리에 유지")
+        finally:
+            flask_api._registry = saved_registry
+
+
+def test_lazy_startup_and_warmup():
+    """모듈 임포트 시 무거운 라이브러리를 로드하지 않고, 워밍업 후 준비 상태 보고"""
+    print("\n=== 지연 로딩 및 워밍업 테스트 ===")
+
+    code = ("import sys, flask_api; "
+            "print(','.join(m for m in ('torch', 'sklearn', 'matplotlib') if m in sys.modules))")
+    loaded = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    assert loaded == '', f'임포트 시 로드된 라이브러리: {loaded}'
+    print("✓ flask_api 임포트 시 torch/sklearn/matplotlib 미로드")
+
+    saved = flask_api.analyzer, flask_api.model_initialized, dict(flask_api._warmup_state)
+    try:
+        flask_api.analyzer = None
+        flask_api._warmup_state.update(status='idle')
+        client = flask_api.app.test_client()
+        assert client.get('/ready').status_code == 503
+        assert client.get('/health').json['ready'] is False
+
+        flask_api.start_warmup().join(timeout=120)
+        ready = client.get('/ready')
+        assert ready.status_code == 200, ready.json
+        assert set(ready.json['warmup']['stage_seconds']) == {'analyzer', 'plotting', 'inference'}
+        assert client.get('/health').json['ready'] is True
+        print("✓ 워밍업 전 503, 완료 후 준비 상태 보고")
+    finally:
+        flask_api.analyzer, flask_api.model_initialized = saved[0], saved[1]
+        flask_api._warmup_state.clear()
+        flask_api._warmup_state.update(saved[2])
+
+
+def test_multi_worker_server():
+    """다중 워커 서버가 동시 요청을 오류 없이 처리하고 기준 갱신을 다른 워커에 반영"""
+    print("\n=== 다중 워커 서버 테스트 ===")
+
+    if not hasattr(os, 'fork'):
+        print("✓ fork 미지원 플랫폼 - 건너뜀")
+        return
+
+    def request(connection, method, path, body=None):
+        connection.request(method, path, body=json.dumps(body) if body else None,
+                           headers={'Content-Type': 'application/json'})
+        response = connection.getresponse()
+        return response.status, json.loads(response.read())
+
+    port = 5000 + os.getpid() % 1000 + 100
+    with tempfile.TemporaryDirectory() as temp_dir:
+        reference = HipotAIAnalyzer()
+        reference.initialize_model()
+        reference._set_reference_data([create_sample_data()])
+        reference.save_model(os.path.join(temp_dir, flask_api.MODEL_PATH))
+
+        process = spawn_server(2, port, cwd=temp_dir)
+        try:
+            payloads = [make_payload(500, seed) for seed in range(6)]
+            result = run_load_test(f'http://127.0.0.1:{port}', payloads, concurrency=4, total_requests=12)
+            assert result['errors'] == 0, result['status_counts']
+            print(f"✓ 동시 요청 {result['requests']}개 처리 ({result['requests_per_second']:.1f} req/s)")
+
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+            status, updated = request(connection, 'POST', '/update_reference', _session_payload(create_sample_data()))
+            connection.close()
+            assert status == 200, updated
+            revision = updated['reference']['revision']
+
+            # 모든 워커가 동기화 주기 안에 새 리비전을 보고해야 함 (keep-alive 연결은 한 워커가 처리)
+            seen = {}
+            deadline = time.monotonic() + 10
+            while time.monotonic() < deadline and (len(seen) < 2 or min(seen.values()) < revision):
+                connection = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+                pid = request(connection, 'GET', '/health')[1]['pid']
+                statistics = request(connection, 'GET', '/get_statistics')[1]['statistics']
+                seen[pid] = statistics['reference']['revision']
+                connection.close()
+                time.sleep(0.1)
+            assert len(seen) == 2 and min(seen.values()) == revision, seen
+            print("✓ 한 워커의 기준 갱신이 다른 워커에 반영됨")
+
+            # 워커 메모리 상태에 의존하는 API는 어느 워커가 받아도 같은 응답 (비동기 그래프/스트리밍 비활성)
+            body = _session_payload(create_sample_data())
+            for _ in range(4):
+                connection = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+                status, analyzed = request(connection, 'POST', '/analyze', body)
+                assert status == 200 and analyzed['plot_job'] is None and analyzed['plots'] == [], analyzed
+                assert request(connection, 'POST', '/analyze?plots=async', body)[0] == 400
+                assert request(connection, 'POST', '/stream/open', {})[0] == 501
+                assert request(connection, 'GET', '/plot_job/0123')[0] == 501
+                connection.close()
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+            status, inline = request(connection, 'POST', '/analyze?plots=inline&plot_dpi=20', body)
+            connection.close()
+            assert status == 200 and len(inline['plot_images']) == 3
+            print("✓ 다중 워커 모드: 스트리밍/비동기 그래프 501, 그래프는 plots=inline으로 제공")
+        finally:
+            stop_server(process)
+
+
+def main():
+    """메인 테스트 함수"""
+    print("🔧 Hipot Flask API 엔드포인트 검증")
+    print(f"📅 테스트 시간: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+
+    tests = [
+        test_result_cache_lru_and_persistence,
+        test_analyze_uses_result_cache,
+        test_binary_columnar_ingest,
+        test_plot_rendering_options,
+        test_stream_session_lifecycle,
+        test_metrics_endpoint,
+        test_update_reference_merges_sessions,
+        test_reference_registry_routing,
+        test_multi_worker_server,
+        test_lazy_startup_and_warmup,
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except Exception as e:
+            print(f"✗ {test.__name__} 실패: {e}")
+
+    print("\n" + "="*50)
+    print(f"통과: {passed}/{len(tests)}")
+    return 0 if passed == len(tests) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -45,8 +45,8 @@ def test_flask_structure():
         print("✓ Flask 앱 임포트 성공")
         
         # 성능 최적화 요소들 확인
-        from flask_api import monitor_performance, cache_result
-        print("✓ 성능 최적화 데코레이터 임포트 성공")
+        from flask_api import monitor_performance, AnalysisResultCache
+        print("✓ 성능 최적화 데코레이터 및 결과 캐시 임포트 성공")
         
         return True
         